@@ -7,6 +7,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import asyncio
+import logging
 import time
 import streamlit as st
 from datetime import datetime, timedelta
@@ -15,6 +16,9 @@ import os
 
 load_dotenv()
 
+# Mensagens do coletor vão para o stdout (collector.log no service.sh)
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(message)s")
+
 from core import (
     XCollector,
     CollectionParams,
@@ -27,10 +31,11 @@ from core import (
     stop_chrome,
     restart_chrome,
     get_chrome_log,
+    metric_totals,
 )
 from exporters import export_to_docx, export_to_json, export_to_csv
 from scheduler import start_scheduler, get_runner
-from email_service import test_email_config, send_collection_email
+from email_service import test_email_config, send_collection_email_sync
 
 # Configuração da página
 st.set_page_config(
@@ -333,7 +338,7 @@ if page == "📥 Coleta Manual":
                         temp_collector = XCollector(headless=True)
                         try:
                             await temp_collector.start()
-                            is_logged = await temp_collector.is_logged_in()
+                            is_logged = await temp_collector.is_logged_in(use_cache=False)
                             await temp_collector.stop()
                             return is_logged
                         except Exception as e:
@@ -650,10 +655,11 @@ if page == "📥 Coleta Manual":
             st.metric("Erros", errors)
         
         # Métricas de engajamento
-        total_likes = sum(p.metrics.likes or 0 for p in result.posts)
-        total_reposts = sum(p.metrics.reposts or 0 for p in result.posts)
-        total_views = sum(p.metrics.views or 0 for p in result.posts)
-        total_replies = sum(p.metrics.replies or 0 for p in result.posts)
+        totals = metric_totals(result.posts)
+        total_likes = totals["likes"]
+        total_reposts = totals["reposts"]
+        total_views = totals["views"]
+        total_replies = totals["replies"]
         
         st.markdown("#### 📈 Engajamento Total")
         col1, col2, col3, col4 = st.columns(4)
@@ -720,12 +726,12 @@ if page == "📥 Coleta Manual":
             if st.button("📧 Enviar por E-mail", use_container_width=True, type="secondary"):
                 with st.spinner("Enviando e-mail..."):
                     try:
-                        success = asyncio.run(send_collection_email(
+                        success = send_collection_email_sync(
                             recipients=recipients_list,
                             result=result,
                             query_or_url=input_value,
                             attachments=exported_files,
-                        ))
+                        )
                         if success:
                             st.success(f"✅ E-mail enviado com sucesso para: {', '.join(recipients_list)}")
                         else:
@@ -1072,14 +1078,12 @@ elif page == "⚙️ Configurações":
     from scheduler.persistence import get_db
     
     db = get_db()
-    jobs = db.get_all_jobs()
-    runs = db.get_all_runs()
     
     col1, col2 = st.columns(2)
     with col1:
-        st.metric("Agendamentos criados", len(jobs))
+        st.metric("Agendamentos criados", db.count_jobs())
     with col2:
-        st.metric("Execuções registradas", len(runs))
+        st.metric("Execuções registradas", db.count_runs())
     
     st.markdown("---")
     
@@ -11,12 +11,22 @@ from core.models import (
     ScheduleType,
     RunHistory,
     RunStatus,
+    metric_totals,
+)
+from core.collector import (
+    XCollector,
+    BrowserPool,
+    CollectionSession,
+    get_browser_pool,
+    close_browser_pool,
+    quick_collect,
+    CollectorConfig,
 )
-from core.collector import XCollector, quick_collect, CollectorConfig
 from core.extractor import PostExtractor
 from core.url_builder import URLBuilder, build_example_queries
 from core.chrome_manager import (
     is_chrome_running,
+    is_chrome_running_async,
     get_chrome_status,
     start_chrome,
     stop_chrome,
@@ -36,13 +46,19 @@ __all__ = [
     "ScheduleType",
     "RunHistory",
     "RunStatus",
+    "metric_totals",
     "XCollector",
+    "BrowserPool",
+    "CollectionSession",
+    "get_browser_pool",
+    "close_browser_pool",
     "quick_collect",
     "CollectorConfig",
     "PostExtractor",
     "URLBuilder",
     "build_example_queries",
     "is_chrome_running",
+    "is_chrome_running_async",
     "get_chrome_status",
     "start_chrome",
     "stop_chrome",
@@ -2,11 +2,32 @@
 from __future__ import annotations
 import os
 import json
+import hashlib
+import heapq
+import time
+from pathlib import Path
 from typing import Optional, List
 from datetime import datetime
-from dotenv import load_dotenv
+from core.models import metric_totals
 
-load_dotenv()
+# Cache em disco das respostas da OpenAI (chave = hash do prompt)
+ANALYSIS_CACHE_DIR = Path(
+    os.getenv("ANALYSIS_CACHE_DIR", "~/.cache/x-collector/analyses")
+).expanduser()
+ANALYSIS_CACHE_TTL = int(os.getenv("ANALYSIS_CACHE_TTL", str(24 * 3600)))  # segundos
+
+# Tabela de tradução para separador de milhar pt-BR ("1,234" -> "1.234")
+_COMMA2DOT = str.maketrans(",", ".")
+
+
+def fmt_br(n: int) -> str:
+    """Formata inteiro com ponto como separador de milhar."""
+    return format(n, ",d").translate(_COMMA2DOT)
+
+
+def fmt_br_f(x: float, p: int = 1) -> str:
+    """Formata float com ponto como separador de milhar."""
+    return format(x, f",.{p}f").translate(_COMMA2DOT)
 
 
 class TopPost:
@@ -29,12 +50,12 @@ class TopPost:
         lines = [
             f"  #{self.rank} - {self.author_name} ({self.author})",
             f"     📝 \"{self.text}\"",
-            f"     ❤️ {self.likes:,} curtidas | 🔁 {self.reposts:,} reposts | 💬 {self.replies:,} respostas | 👁️ {self.views:,} views",
-            f"     📊 Engajamento total: {self.engagement_total:,} interações",
+            f"     ❤️ {fmt_br(self.likes)} curtidas | 🔁 {fmt_br(self.reposts)} reposts | 💬 {fmt_br(self.replies)} respostas | 👁️ {fmt_br(self.views)} views",
+            f"     📊 Engajamento total: {fmt_br(self.engagement_total)} interações",
             f"     🔗 {self.url}",
             f"     ✨ Critério de destaque: {self.criteria}",
         ]
-        return "\n".join(lines).replace(",", ".")
+        return "\n".join(lines)
     
     def to_html(self) -> str:
         """Retorna HTML formatado do post."""
@@ -43,16 +64,16 @@ class TopPost:
             <strong>#{self.rank}</strong> - {self.author_name} (<span style="color: #1DA1F2;">{self.author}</span>)
             <p style="margin: 10px 0; font-style: italic;">"{self.text}"</p>
             <div style="display: flex; gap: 15px; flex-wrap: wrap; font-size: 14px;">
-                <span>❤️ {self.likes:,} curtidas</span>
-                <span>🔁 {self.reposts:,} reposts</span>
-                <span>💬 {self.replies:,} respostas</span>
-                <span>👁️ {self.views:,} views</span>
+                <span>❤️ {fmt_br(self.likes)} curtidas</span>
+                <span>🔁 {fmt_br(self.reposts)} reposts</span>
+                <span>💬 {fmt_br(self.replies)} respostas</span>
+                <span>👁️ {fmt_br(self.views)} views</span>
             </div>
-            <p style="margin: 5px 0; font-weight: bold; color: #28a745;">📊 Engajamento total: {self.engagement_total:,} interações</p>
+            <p style="margin: 5px 0; font-weight: bold; color: #28a745;">📊 Engajamento total: {fmt_br(self.engagement_total)} interações</p>
             <p style="margin: 5px 0; font-size: 12px; color: #666;">✨ Critério: {self.criteria}</p>
             <a href="{self.url}" style="color: #1DA1F2; font-size: 12px;">🔗 Ver post original</a>
         </div>
-        """.replace(",", ".")
+        """
 
 
 class DiagnosticReport:
@@ -70,7 +91,11 @@ class DiagnosticReport:
         self.observacoes: List[str] = []
         self.resumo_metricas: dict = {}
         self.top_5_posts: List[TopPost] = []
-        self.generated_at: datetime = datetime.now()
+        now = datetime.now()
+        self.generated_at: datetime = now
+        # Formatos pré-calculados (o relatório é renderizado em vários formatos)
+        self._generated_at_display = now.strftime('%d/%m/%Y às %H:%M')
+        self._generated_at_iso = now.isoformat()
     
     def to_dict(self) -> dict:
         """Converte para dicionário."""
@@ -86,7 +111,7 @@ class DiagnosticReport:
             "observacoes": self.observacoes,
             "resumo_metricas": self.resumo_metricas,
             "top_5_posts": [vars(p) for p in self.top_5_posts],
-            "generated_at": self.generated_at.isoformat(),
+            "generated_at": self._generated_at_iso,
         }
     
     def to_text(self) -> str:
@@ -182,45 +207,45 @@ class DiagnosticReport:
             lines.append("")
         
         lines.append("=" * 70)
-        lines.append(f"Relatório gerado em: {self.generated_at.strftime('%d/%m/%Y às %H:%M')}")
+        lines.append(f"Relatório gerado em: {self._generated_at_display}")
         lines.append("=" * 70)
         
         return "\n".join(lines)
     
     def to_html(self) -> str:
         """Converte para HTML formatado."""
-        html = """
+        parts = ["""
         <div style="font-family: Arial, sans-serif; max-width: 900px; margin: 0 auto;">
             <h2 style="color: #1DA1F2; border-bottom: 2px solid #1DA1F2; padding-bottom: 10px;">
                 📊 Relatório de Diagnóstico do Resultado
             </h2>
-        """
+        """]
         
         # Métricas
         if self.resumo_metricas:
-            html += """
+            parts.append("""
             <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 20px; border-radius: 12px; margin: 20px 0;">
                 <h3 style="margin-top: 0;">📈 Resumo de Métricas</h3>
                 <div style="display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 15px;">
-            """
+            """)
             for key, value in self.resumo_metricas.items():
-                html += f"""
+                parts.append(f"""
                 <div style="background: rgba(255,255,255,0.2); padding: 10px; border-radius: 8px; text-align: center;">
                     <div style="font-size: 24px; font-weight: bold;">{value}</div>
                     <div style="font-size: 12px; opacity: 0.9;">{key}</div>
                 </div>
-                """
-            html += "</div></div>"
+                """)
+            parts.append("</div></div>")
         
         # TOP 5 POSTS
         if self.top_5_posts:
-            html += """
+            parts.append("""
             <div style="background: #fff3cd; padding: 20px; border-radius: 12px; margin: 20px 0; border: 2px solid #ffc107;">
                 <h3 style="margin-top: 0; color: #856404;">🏆 TOP 5 POSTS COM MAIOR ENGAJAMENTO</h3>
-            """
+            """)
             for post in self.top_5_posts:
-                html += post.to_html()
-            html += "</div>"
+                parts.append(post.to_html())
+            parts.append("</div>")
         
         # Seções principais
         sections = [
@@ -230,12 +255,12 @@ class DiagnosticReport:
         
         for title, content, bg_color in sections:
             if content:
-                html += f"""
+                parts.append(f"""
                 <div style="background: {bg_color}; padding: 15px; border-radius: 8px; margin: 15px 0;">
                     <h3 style="margin-top: 0;">{title}</h3>
                     <p>{content}</p>
                 </div>
-                """
+                """)
         
         # Listas
         list_sections = [
@@ -248,92 +273,100 @@ class DiagnosticReport:
         
         for title, items, bg_color in list_sections:
             if items:
-                html += f"""
+                parts.append(f"""
                 <div style="background: {bg_color}; padding: 15px; border-radius: 8px; margin: 15px 0;">
                     <h3 style="margin-top: 0;">{title}</h3>
                     <ul>
-                """
-                for item in items:
-                    html += f"<li>{item}</li>"
-                html += "</ul></div>"
+                """)
+                parts.extend(f"<li>{item}</li>" for item in items)
+                parts.append("</ul></div>")
         
         # Percepção de qualidade
         if self.percepcao_qualidade:
-            html += f"""
+            parts.append(f"""
             <div style="background: #e3f2fd; padding: 15px; border-radius: 8px; margin: 15px 0;">
                 <h3 style="margin-top: 0;">📊 Percepção Geral da Qualidade</h3>
                 <p>{self.percepcao_qualidade}</p>
             </div>
-            """
+            """)
         
         # Observações
         if self.observacoes:
-            html += """
+            parts.append("""
             <div style="background: #fffde7; padding: 15px; border-radius: 8px; margin: 15px 0; border-left: 4px solid #ffc107;">
                 <h3 style="margin-top: 0;">💡 Observações para Tomada de Decisão</h3>
                 <ul>
-            """
-            for obs in self.observacoes:
-                html += f"<li>{obs}</li>"
-            html += "</ul></div>"
+            """)
+            parts.extend(f"<li>{obs}</li>" for obs in self.observacoes)
+            parts.append("</ul></div>")
         
-        html += f"""
+        parts.append(f"""
             <p style="color: #666; font-size: 12px; text-align: center; margin-top: 20px;">
-                Relatório gerado em: {self.generated_at.strftime('%d/%m/%Y às %H:%M')}
+                Relatório gerado em: {self._generated_at_display}
             </p>
         </div>
-        """
+        """)
         
-        return html
+        return "".join(parts)
 
 
 class ContentAnalyzer:
     """Analisador de conteúdo usando OpenAI."""
     
     def __init__(self, api_key: Optional[str] = None):
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY", "")
+        if not api_key:
+            # Carrega o .env apenas quando a chave não é fornecida
+            from dotenv import load_dotenv
+            load_dotenv()
+            api_key = os.getenv("OPENAI_API_KEY", "")
+        self.api_key = api_key
     
     def is_configured(self) -> bool:
         """Verifica se a API key está configurada."""
         return bool(self.api_key and self.api_key.startswith("sk-"))
     
+    @staticmethod
+    def _engagement(post) -> int:
+        """Engajamento total de um post (curtidas + reposts + respostas)."""
+        m = post.metrics
+        return (m.likes or 0) + (m.reposts or 0) + (m.replies or 0)
+    
+    @staticmethod
+    def _criteria(post, engagement: int) -> str:
+        """Determina o critério principal de destaque de um post."""
+        likes = post.metrics.likes or 0
+        reposts = post.metrics.reposts or 0
+        replies = post.metrics.replies or 0
+        views = post.metrics.views or 0
+        
+        criteria_parts = []
+        if likes > 0:
+            criteria_parts.append(f"{fmt_br(likes)} curtidas")
+        if reposts > 0:
+            criteria_parts.append(f"{fmt_br(reposts)} reposts")
+        if replies > 0:
+            criteria_parts.append(f"{fmt_br(replies)} respostas")
+        if views > 0:
+            criteria_parts.append(f"{fmt_br(views)} views")
+        
+        return f"Engajamento total: {fmt_br(engagement)} ({', '.join(criteria_parts)})"
+    
     def _calculate_top_5_posts(self, posts: list) -> List[TopPost]:
         """Calcula os Top 5 posts com maior engajamento."""
         if not posts:
             return []
         
-        # Calcular engajamento total para cada post
-        posts_with_engagement = []
-        for p in posts:
-            engagement = (p.metrics.likes or 0) + (p.metrics.reposts or 0) + (p.metrics.replies or 0)
-            posts_with_engagement.append((p, engagement))
-        
-        # Ordenar por engajamento total (decrescente)
-        sorted_posts = sorted(posts_with_engagement, key=lambda x: x[1], reverse=True)
-        
-        top_5 = []
-        for i, (post, engagement) in enumerate(sorted_posts[:5], 1):
-            # Determinar critério principal de destaque
-            likes = post.metrics.likes or 0
-            reposts = post.metrics.reposts or 0
-            replies = post.metrics.replies or 0
-            views = post.metrics.views or 0
-            
-            criteria_parts = []
-            if likes > 0:
-                criteria_parts.append(f"{likes:,} curtidas".replace(",", "."))
-            if reposts > 0:
-                criteria_parts.append(f"{reposts:,} reposts".replace(",", "."))
-            if replies > 0:
-                criteria_parts.append(f"{replies:,} respostas".replace(",", "."))
-            if views > 0:
-                criteria_parts.append(f"{views:,} views".replace(",", "."))
-            
-            criteria = f"Engajamento total: {engagement:,} ({', '.join(criteria_parts)})".replace(",", ".")
-            
-            top_5.append(TopPost(post, i, criteria))
+        # Ordenar por engajamento total (decrescente); com até 5 posts basta
+        # ordenar todos, senão seleciona só os 5 maiores sem ordenar a lista inteira
+        if len(posts) <= 5:
+            ranked = sorted(posts, key=self._engagement, reverse=True)
+        else:
+            ranked = heapq.nlargest(5, posts, key=self._engagement)
         
-        return top_5
+        return [
+            TopPost(post, i, self._criteria(post, self._engagement(post)))
+            for i, post in enumerate(ranked, 1)
+        ]
     
     async def analyze_posts(self, posts: list, query: str) -> DiagnosticReport:
         """
@@ -350,23 +383,20 @@ class ContentAnalyzer:
         
         # Calcular métricas básicas
         total_posts = len(posts)
-        total_likes = sum(p.metrics.likes or 0 for p in posts)
-        total_reposts = sum(p.metrics.reposts or 0 for p in posts)
-        total_views = sum(p.metrics.views or 0 for p in posts)
-        total_replies = sum(p.metrics.replies or 0 for p in posts)
+        totals = metric_totals(posts)
+        total_likes = totals["likes"]
+        total_reposts = totals["reposts"]
+        total_views = totals["views"]
+        total_replies = totals["replies"]
         total_engagement = total_likes + total_reposts + total_replies
         
-        # Formatar números com ponto como separador de milhar
-        def fmt(n):
-            return f"{n:,}".replace(",", ".")
-        
         report.resumo_metricas = {
-            "Total de posts": fmt(total_posts),
-            "Total de curtidas": fmt(total_likes),
-            "Total de reposts": fmt(total_reposts),
-            "Total de respostas": fmt(total_replies),
-            "👁️ TOTAL DE VISUALIZAÇÕES": fmt(total_views),
-            "Engajamento total": fmt(total_engagement),
+            "Total de posts": fmt_br(total_posts),
+            "Total de curtidas": fmt_br(total_likes),
+            "Total de reposts": fmt_br(total_reposts),
+            "Total de respostas": fmt_br(total_replies),
+            "👁️ TOTAL DE VISUALIZAÇÕES": fmt_br(total_views),
+            "Engajamento total": fmt_br(total_engagement),
             "Média de curtidas/post": f"{total_likes/max(total_posts,1):.1f}",
             "Média de views/post": f"{total_views/max(total_posts,1):.1f}",
         }
@@ -376,20 +406,24 @@ class ContentAnalyzer:
         
         # Se não tem API key, gerar relatório básico
         if not self.is_configured():
-            return self._generate_basic_report(posts, query, report)
+            return self._generate_basic_report(posts, query, report, totals)
         
         # Usar OpenAI para análise avançada
         try:
-            return await self._analyze_with_openai(posts, query, report)
+            return await self._analyze_with_openai(posts, query, report, totals)
         except Exception as e:
             print(f"⚠️ Erro na análise OpenAI: {e}. Gerando relatório básico.")
-            return self._generate_basic_report(posts, query, report)
+            return self._generate_basic_report(posts, query, report, totals)
     
-    def _generate_basic_report(self, posts: list, query: str, report: DiagnosticReport) -> DiagnosticReport:
+    def _generate_basic_report(
+        self, posts: list, query: str, report: DiagnosticReport, totals: Optional[dict] = None
+    ) -> DiagnosticReport:
         """Gera relatório básico sem IA."""
         total_posts = len(posts)
-        total_views = sum(p.metrics.views or 0 for p in posts)
-        total_likes = sum(p.metrics.likes or 0 for p in posts)
+        if totals is None:
+            totals = metric_totals(posts)
+        total_views = totals["views"]
+        total_likes = totals["likes"]
         
         # Análise básica por frequência de palavras e métricas
         all_hashtags = []
@@ -412,9 +446,9 @@ class ContentAnalyzer:
         top_mentions = sorted(mention_counts.items(), key=lambda x: x[1], reverse=True)[:5]
         
         # Preencher relatório
-        report.valor_percebido = f"Conteúdo relacionado a '{query}' com {total_posts:,} publicações coletadas e {total_views:,} visualizações totais, demonstrando interesse e discussão ativa sobre o tema.".replace(",", ".")
+        report.valor_percebido = f"Conteúdo relacionado a '{query}' com {fmt_br(total_posts)} publicações coletadas e {fmt_br(total_views)} visualizações totais, demonstrando interesse e discussão ativa sobre o tema."
         
-        report.mensagem_principal = f"O tema '{query}' gera discussão significativa na plataforma X, acumulando {total_likes:,} curtidas em {total_posts:,} posts analisados.".replace(",", ".")
+        report.mensagem_principal = f"O tema '{query}' gera discussão significativa na plataforma X, acumulando {fmt_br(total_likes)} curtidas em {fmt_br(total_posts)} posts analisados."
         
         report.submensagens = []
         if top_hashtags:
@@ -425,11 +459,11 @@ class ContentAnalyzer:
         report.possiveis_vieses = [
             "A coleta pode refletir o algoritmo do X que prioriza certos conteúdos",
             "Posts mais recentes podem ter menos engajamento por tempo de exposição",
-            f"Amostra de {total_posts:,} posts pode não representar todo o universo de discussões".replace(",", "."),
+            f"Amostra de {fmt_br(total_posts)} posts pode não representar todo o universo de discussões",
         ]
         
         # Análise de engajamento
-        total_engagement = sum((p.metrics.likes or 0) + (p.metrics.reposts or 0) for p in posts)
+        total_engagement = total_likes + totals["reposts"]
         avg_engagement = total_engagement / max(total_posts, 1)
         
         report.pontos_positivos = []
@@ -438,29 +472,31 @@ class ContentAnalyzer:
         elif avg_engagement > 10:
             report.pontos_positivos.append(f"Engajamento moderado: {avg_engagement:.0f} interações/post")
         
-        report.pontos_positivos.append(f"{total_posts:,} posts coletados com sucesso".replace(",", "."))
-        report.pontos_positivos.append(f"{total_views:,} visualizações totais alcançadas".replace(",", "."))
+        report.pontos_positivos.append(f"{fmt_br(total_posts)} posts coletados com sucesso")
+        report.pontos_positivos.append(f"{fmt_br(total_views)} visualizações totais alcançadas")
         
         if report.top_5_posts:
             top = report.top_5_posts[0]
-            report.pontos_positivos.append(f"Post mais engajado: {top.author} com {top.engagement_total:,} interações".replace(",", "."))
+            report.pontos_positivos.append(f"Post mais engajado: {top.author} com {fmt_br(top.engagement_total)} interações")
         
         report.pontos_negativos = [
             "Análise sem IA - insights limitados à estatística básica",
             "Para análise semântica avançada, configure OPENAI_API_KEY no .env",
         ]
         
-        report.percepcao_qualidade = f"Dataset de {total_posts:,} posts coletados com {total_views:,} views totais. O Top 5 de posts mais engajados está destacado acima. Qualidade dos dados: adequada para análise quantitativa.".replace(",", ".")
+        report.percepcao_qualidade = f"Dataset de {fmt_br(total_posts)} posts coletados com {fmt_br(total_views)} views totais. O Top 5 de posts mais engajados está destacado acima. Qualidade dos dados: adequada para análise quantitativa."
         
         report.observacoes = [
             "Os Top 5 posts foram selecionados pelo critério de engajamento total (curtidas + reposts + respostas)",
-            f"O alcance total de {total_views:,} views indica visibilidade significativa do tema".replace(",", "."),
+            f"O alcance total de {fmt_br(total_views)} views indica visibilidade significativa do tema",
             "Considere filtros adicionais para refinar a amostra se necessário",
         ]
         
         return report
     
-    async def _analyze_with_openai(self, posts: list, query: str, report: DiagnosticReport) -> DiagnosticReport:
+    async def _analyze_with_openai(
+        self, posts: list, query: str, report: DiagnosticReport, totals: Optional[dict] = None
+    ) -> DiagnosticReport:
         """Analisa posts usando a API da OpenAI."""
         import httpx
         
@@ -468,9 +504,11 @@ class ContentAnalyzer:
         sample_posts = posts[:50]
         
         # Calcular totais
-        total_views = sum(p.metrics.views or 0 for p in posts)
-        total_likes = sum(p.metrics.likes or 0 for p in posts)
-        total_reposts = sum(p.metrics.reposts or 0 for p in posts)
+        if totals is None:
+            totals = metric_totals(posts)
+        total_views = totals["views"]
+        total_likes = totals["likes"]
+        total_reposts = totals["reposts"]
         
         posts_text = "\n\n".join([
             f"Post {i+1} (@{p.author_handle}):\n"
@@ -512,6 +550,12 @@ Gere um JSON com a seguinte estrutura (responda APENAS com o JSON, sem markdown)
     "observacoes": ["recomendação 1 baseada nos dados", "recomendação 2"]
 }}"""
 
+        # Resposta já em cache para o mesmo prompt: evita nova chamada à API
+        cache_path = self._cache_path(prompt)
+        analysis = self._load_cached_analysis(cache_path)
+        if analysis is not None:
+            return self._fill_report(report, analysis)
+
         async with httpx.AsyncClient(timeout=90.0) as client:
             response = await client.post(
                 "https://api.openai.com/v1/chat/completions",
@@ -546,19 +590,50 @@ Gere um JSON com a seguinte estrutura (responda APENAS com o JSON, sem markdown)
             
             # Parse do JSON
             analysis = json.loads(content)
+            self._save_cached_analysis(cache_path, analysis)
             
-            # Preencher relatório (mantendo Top 5 já calculado)
-            report.valor_percebido = analysis.get("valor_percebido", "")
-            report.mensagem_principal = analysis.get("mensagem_principal", "")
-            report.submensagens = analysis.get("submensagens", [])
-            report.possiveis_vieses = analysis.get("possiveis_vieses", [])
-            report.pontos_positivos = analysis.get("pontos_positivos", [])
-            report.pontos_negativos = analysis.get("pontos_negativos", [])
-            report.elementos_destaque = analysis.get("elementos_destaque", [])
-            report.percepcao_qualidade = analysis.get("percepcao_qualidade", "")
-            report.observacoes = analysis.get("observacoes", [])
-            
-            return report
+            return self._fill_report(report, analysis)
+    
+    @staticmethod
+    def _fill_report(report: DiagnosticReport, analysis: dict) -> DiagnosticReport:
+        """Preenche o relatório com a análise (mantendo Top 5 já calculado)."""
+        report.valor_percebido = analysis.get("valor_percebido", "")
+        report.mensagem_principal = analysis.get("mensagem_principal", "")
+        report.submensagens = analysis.get("submensagens", [])
+        report.possiveis_vieses = analysis.get("possiveis_vieses", [])
+        report.pontos_positivos = analysis.get("pontos_positivos", [])
+        report.pontos_negativos = analysis.get("pontos_negativos", [])
+        report.elementos_destaque = analysis.get("elementos_destaque", [])
+        report.percepcao_qualidade = analysis.get("percepcao_qualidade", "")
+        report.observacoes = analysis.get("observacoes", [])
+        return report
+    
+    @staticmethod
+    def _cache_path(prompt: str) -> Path:
+        """Retorna o caminho do cache para um prompt."""
+        key = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+        return ANALYSIS_CACHE_DIR / f"{key}.json"
+    
+    @staticmethod
+    def _load_cached_analysis(path: Path) -> Optional[dict]:
+        """Carrega análise do cache se existir e não estiver expirada."""
+        try:
+            if time.time() - path.stat().st_mtime > ANALYSIS_CACHE_TTL:
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def _save_cached_analysis(path: Path, analysis: dict) -> None:
+        """Salva análise no cache (falhas são ignoradas)."""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(analysis, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"⚠️ Não foi possível salvar cache da análise: {e}")
 
 
 async def generate_diagnostic_report(posts: list, query: str, api_key: Optional[str] = None) -> DiagnosticReport:
@@ -1,22 +1,39 @@
 """Gerenciador do Chrome/Chromium para coleta de dados do X."""
+import asyncio
+import socket
 import subprocess
 import time
 import os
 from pathlib import Path
 from typing import Tuple
 
+CHROME_DEBUG_HOST = "127.0.0.1"
+CHROME_DEBUG_PORT = 9222
+HEALTH_CHECK_TIMEOUT = 0.2  # segundos
+
 
 def is_chrome_running() -> bool:
     """Verifica se o Chrome está rodando na porta 9222."""
     try:
-        result = subprocess.run(
-            ["lsof", "-i", ":9222"],
-            capture_output=True,
-            text=True,
-            timeout=5
+        with socket.create_connection(
+            (CHROME_DEBUG_HOST, CHROME_DEBUG_PORT), timeout=HEALTH_CHECK_TIMEOUT
+        ):
+            return True
+    except OSError:
+        return False
+
+
+async def is_chrome_running_async() -> bool:
+    """Versão assíncrona de is_chrome_running (não bloqueia o event loop)."""
+    try:
+        _, writer = await asyncio.wait_for(
+            asyncio.open_connection(CHROME_DEBUG_HOST, CHROME_DEBUG_PORT),
+            HEALTH_CHECK_TIMEOUT,
         )
-        return bool(result.stdout.strip())
-    except Exception:
+        writer.close()
+        await writer.wait_closed()
+        return True
+    except (OSError, asyncio.TimeoutError):
         return False
 
 
@@ -1,18 +1,30 @@
 """Coletor de posts do X usando Playwright."""
 from __future__ import annotations
 import asyncio
+import gc
+import logging
 import os
+import random
 import subprocess
+import threading
 import time
+import weakref
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import AsyncGenerator, Callable, Optional, List
-from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+from functools import lru_cache
+from typing import TYPE_CHECKING, AsyncGenerator, Callable, Optional, List
+from urllib.parse import urlsplit
 from core.models import Post, CollectionParams, CollectionResult
 from core.extractor import PostExtractor
 from core.url_builder import URLBuilder
 from core.cookie_manager import CookieManager
 
+# Playwright e httpx são importados só quando um browser é de fato usado
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page
+
+logger = logging.getLogger(__name__)
+
 
 def utc_now() -> datetime:
     """Retorna datetime atual em UTC."""
@@ -26,19 +38,69 @@ class CollectorConfig:
     
     # Timeouts
     PAGE_LOAD_TIMEOUT = 60000  # 60s
-    SCROLL_WAIT = 2000  # 2s entre scrolls
+    FIRST_POST_TIMEOUT = 15000  # 15s até o primeiro post (ou estado vazio/erro)
+    LOGIN_CHECK_TIMEOUT = 10000  # 10s até o menu da conta aparecer
+    LOGIN_CACHE_TTL = 300  # segundos em que um login confirmado é reaproveitado
+    LOGIN_WAIT_TIMEOUT = 300000  # 5 minutos para o usuário concluir o login
+    SCROLL_WAIT = 2000  # 2s entre scrolls (intervalo inicial do ritmo adaptativo)
     NO_NEW_POSTS_LIMIT = 5  # Scrolls sem novos posts antes de parar
     
     # Rate limiting conservador
-    MIN_SCROLL_INTERVAL = 1.5  # segundos
+    MIN_SCROLL_INTERVAL = 1.5  # segundos (piso do ritmo adaptativo)
+    MAX_SCROLL_INTERVAL = 15.0  # segundos (teto do ritmo adaptativo)
     MAX_SCROLLS_PER_MINUTE = 20
     
+    # Ritmo adaptativo: encurta após scrolls com posts novos, alonga após scrolls vazios
+    PACING_SPEEDUP = 0.85
+    PACING_BACKOFF = 1.6
+    
+    # Scroll executado no browser: SCROLL_STEPS passos de uma tela a cada
+    # SCROLL_STEP_MS; resolve quando SCROLL_BATCH_TARGET articles novos
+    # aparecem ou quando o intervalo do ritmo adaptativo se esgota
+    SCROLL_STEPS = 2  # passos iniciais (ajustados pelo ritmo adaptativo)
+    MIN_SCROLL_STEPS = 1
+    MAX_SCROLL_STEPS = 4  # mais que isso arrisca pular posts desmontados pelo X
+    SCROLL_STEP_MS = 400
+    SCROLL_BATCH_TARGET = 10
+    
+    # Coletas grandes: gc.collect() a cada GC_EVERY_SCROLLS scrolls
+    LARGE_COLLECTION = 10_000
+    GC_EVERY_SCROLLS = 50
+    
     # Porta para debug do Chrome
     CHROME_DEBUG_PORT = 9222
+    CHROME_STARTUP_TIMEOUT = 15.0  # segundos até o Chrome recém-iniciado responder
+    DISK_CACHE_SIZE = 500 * 1024 * 1024  # bytes (--disk-cache-size)
+    MEDIA_CACHE_SIZE = 250 * 1024 * 1024  # bytes (--media-cache-size)
+    
+    # Bloqueio de recursos não usados na extração (economiza banda e CPU)
+    BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "true").lower() == "true"
+    BLOCKED_RESOURCE_TYPES = frozenset({"image", "media", "font"})
+    # Hosts de vídeo/anúncios/telemetria (bloqueados também por domínio pai)
+    BLOCKED_HOSTS = frozenset({
+        "video.twimg.com",
+        "ads-twitter.com",
+        "ads-api.twitter.com",
+        "doubleclick.net",
+        "google-analytics.com",
+        "googletagmanager.com",
+    })
+    
+    # Coletas paralelas (BrowserPool.collect_many)
+    MULTI_COLLECT_CONCURRENCY = 3
+    START_JITTER = 2.0  # segundos (máx.) de atraso aleatório por contexto
+    
+    # Opções dos contextos criados por sessão (BrowserPool)
+    CONTEXT_OPTIONS = {
+        "viewport": {"width": 1366, "height": 768},
+        "locale": "pt-BR",
+        "timezone_id": "America/Sao_Paulo",
+    }
 
 
+@lru_cache(maxsize=None)
 def get_chrome_path() -> str:
-    """Retorna o caminho do Chrome baseado no OS."""
+    """Retorna o caminho do Chrome baseado no OS (resolvido uma vez por processo)."""
     import platform
     system = platform.system()
     
@@ -83,16 +145,337 @@ def get_chrome_user_data_dir() -> str:
         return os.path.expanduser("~/.config/google-chrome")
 
 
+def _cdp_url() -> str:
+    """URL do endpoint CDP do Chrome em modo debug."""
+    return f"http://127.0.0.1:{CollectorConfig.CHROME_DEBUG_PORT}"
+
+
+def _spawn_chrome(headless: bool) -> subprocess.Popen:
+    """Inicia um processo do Chrome com porta de debug e perfil próprio."""
+    chrome_path = get_chrome_path()
+    
+    # Usar diretório temporário baseado no perfil original
+    temp_profile = Path(CollectorConfig.BROWSER_DATA_DIR) / "chrome_profile"
+    temp_profile.mkdir(parents=True, exist_ok=True)
+    
+    logger.info("🚀 Iniciando Chrome com seu perfil...")
+    logger.info("   Chrome: %s", chrome_path)
+    logger.info("   Perfil: %s", temp_profile)
+    
+    # Iniciar Chrome com debug port
+    args = [
+        chrome_path,
+        f"--remote-debugging-port={CollectorConfig.CHROME_DEBUG_PORT}",
+        f"--user-data-dir={temp_profile}",
+        "--no-first-run",
+        "--no-default-browser-check",
+        "--disable-default-apps",
+        # Trabalho de inicialização desnecessário para a coleta
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--disable-dev-shm-usage",
+        # Cache em disco generoso: bundles do X reaproveitados entre coletas
+        f"--disk-cache-size={CollectorConfig.DISK_CACHE_SIZE}",
+        f"--media-cache-size={CollectorConfig.MEDIA_CACHE_SIZE}",
+    ]
+    
+    if headless:
+        args.append("--headless=new")
+    
+    return subprocess.Popen(
+        args,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def _wait_for_cdp(
+    process: Optional[subprocess.Popen] = None,
+    timeout: float = CollectorConfig.CHROME_STARTUP_TIMEOUT,
+):
+    """
+    Aguarda o endpoint /json/version do Chrome responder.
+    
+    Sonda com backoff exponencial (10ms, 20ms, ... até 100ms) em vez de
+    esperas fixas, então a conexão sai assim que o Chrome fica pronto.
+    """
+    import httpx
+    
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    
+    async with httpx.AsyncClient(timeout=1.0) as client:
+        while True:
+            try:
+                response = await client.get(f"{_cdp_url()}/json/version")
+                if response.status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            
+            if process is not None and process.poll() is not None:
+                raise Exception("Chrome encerrou antes de abrir a porta de debug")
+            if time.monotonic() >= deadline:
+                raise Exception("Não foi possível conectar ao Chrome")
+            
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+
+async def _connect_cdp_with_retry(playwright, process: Optional[subprocess.Popen] = None) -> Browser:
+    """Conecta via CDP ao Chrome recém-iniciado, assim que a porta de debug responder."""
+    await _wait_for_cdp(process)
+    return await playwright.chromium.connect_over_cdp(_cdp_url())
+
+
+class _SharedChrome:
+    """
+    Chrome iniciado pelo coletor, compartilhado via CDP entre XCollector e
+    BrowserPool (um processo, várias conexões/abas).
+    
+    Contagem de referências: o processo só é encerrado quando o último
+    usuário o libera.
+    """
+    
+    process: Optional[subprocess.Popen] = None
+    users: int = 0
+    lock = threading.Lock()
+    
+    @classmethod
+    def acquire(cls, headless: bool, spawn: bool) -> Optional[subprocess.Popen]:
+        """
+        Conta uma referência ao Chrome do coletor e retorna o processo.
+        
+        Com spawn=True, inicia o Chrome se nenhum processo nosso estiver vivo;
+        sem spawn, retorna None quando o Chrome conectado não é o nosso.
+        """
+        with cls.lock:
+            if cls.process is None or cls.process.poll() is not None:
+                cls.process = None
+                cls.users = 0
+                if not spawn:
+                    return None
+                cls.process = _spawn_chrome(headless)
+            cls.users += 1
+            return cls.process
+    
+    @classmethod
+    def release(cls):
+        """Libera uma referência; encerra o Chrome na última."""
+        with cls.lock:
+            cls.users -= 1
+            if cls.users <= 0 and cls.process:
+                cls.process.terminate()
+                cls.process = None
+                cls.users = 0
+
+
+# Elemento presente apenas para usuários logados
+LOGGED_IN_SELECTOR = '[data-testid="SideNav_AccountSwitcher_Button"]'
+# Elementos da tela de login (sessão ausente ou expirada)
+LOGGED_OUT_SELECTOR = '[data-testid="loginButton"], [data-testid="login"], input[autocomplete="username"]'
+
+# Timeline pronta: primeiro post renderizado, busca sem resultados ou erro
+TIMELINE_READY_SELECTOR = ", ".join([
+    PostExtractor.ARTICLE_SELECTOR,
+    '[data-testid="emptyState"]',
+    '[data-testid="empty_state_header_text"]',
+    '[data-testid="error-detail"]',
+])
+
+# Indicadores de bloqueio/verificação do X: (texto na página, mensagem)
+BLOCK_INDICATORS = [
+    ("Verify your identity", "Verificação de identidade necessária"),
+    ("Verify your phone", "Verificação de telefone necessária"),
+    ("Something went wrong", "Erro detectado - possível rate limit"),
+    ("Rate limit exceeded", "Rate limit excedido"),
+    ("Suspicious activity", "Atividade suspeita detectada"),
+    ("CAPTCHA", "CAPTCHA detectado"),
+    ("Are you a robot", "Verificação anti-bot detectada"),
+]
+_BLOCK_NEEDLES = [indicator.lower() for indicator, _ in BLOCK_INDICATORS]
+
+# Rola a página no próprio browser e aguarda articles ainda não processados.
+# A distância total é limitada (steps telas) para não passar de posts que o X
+# desmonta da timeline virtualizada antes de serem extraídos.
+# `stalled` indica fim do feed: nada novo, altura da página inalterada e
+# scroll já no fundo.
+_SCROLL_UNTIL_NEW_JS = """
+({selector, target, steps, stepMs, timeoutMs}) => new Promise((resolve) => {
+    const root = document.scrollingElement || document.documentElement;
+    const countNew = () => document.querySelectorAll(selector).length;
+    const startHeight = root.scrollHeight;
+    const started = Date.now();
+    let done = 0;
+    const iv = setInterval(() => {
+        if (done < steps) {
+            window.scrollBy(0, window.innerHeight);
+            done++;
+        }
+        const found = countNew();
+        if ((done >= steps && found >= target) || Date.now() - started >= timeoutMs) {
+            clearInterval(iv);
+            const atBottom = root.scrollTop + window.innerHeight >= root.scrollHeight - 2;
+            resolve({found, stalled: found === 0 && atBottom && root.scrollHeight === startHeight});
+        }
+    }, stepMs);
+})
+"""
+
+# Retorna o índice do primeiro indicador presente no texto visível (-1 se nenhum)
+# Todos os indicadores numa única alternância: o texto é varrido uma vez só,
+# em vez de um includes() por indicador. Desafios em iframe (sem texto no
+# documento) são detectados pelo seletor.
+_CHALLENGE_SELECTOR = 'iframe[src*="captcha"], iframe[src*="arkoselabs"], [data-testid="challenge"]'
+# Retorno de _FIND_BLOCK_INDICATOR_JS quando a página caiu na tela de login
+_LOGGED_OUT_INDEX = -2
+_FIND_BLOCK_INDICATOR_JS = r"""
+([needles, challengeSelector, loggedOutSelector]) => {
+    const path = location.pathname;
+    if (path.startsWith("/login") || path.startsWith("/i/flow/login")
+            || document.querySelector(loggedOutSelector)) return -2;
+    if (document.querySelector(challengeSelector)) return needles.indexOf("captcha");
+    const text = ((document.body && document.body.innerText) || "").toLowerCase();
+    const pattern = needles.map((n) => n.replace(/[.*+?^${}()|[\]\\]/g, "\\$&")).join("|");
+    const match = new RegExp(pattern).exec(text);
+    return match ? needles.indexOf(match[0]) : -1;
+}
+"""
+
+
+class TokenBucket:
+    """
+    Token bucket com relógio monotônico.
+    
+    Permite rajadas de até `capacity` chamadas e repõe `rate` tokens por
+    segundo; acquire() só dorme o necessário para cobrir o déficit.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+    
+    async def acquire(self):
+        """Consome um token, aguardando a reposição se o balde estiver vazio."""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        
+        if self._tokens < 1:
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+            self._tokens = 1.0
+            self._updated = time.monotonic()
+        
+        self._tokens -= 1
+
+
+def _scroll_bucket() -> TokenBucket:
+    """Token bucket para o teto de scrolls por minuto."""
+    limit = CollectorConfig.MAX_SCROLLS_PER_MINUTE
+    return TokenBucket(rate=limit / 60, capacity=limit)
+
+
+class AdaptivePacer:
+    """
+    Ritmo de scroll adaptativo (estilo controle de congestionamento).
+    
+    O intervalo entre scrolls encolhe após scrolls produtivos e cresce, com
+    jitter, após scrolls sem posts novos. A distância de cada scroll (em
+    telas) segue o sentido oposto: cresce quando nada chega e volta a
+    encolher quando há posts novos. Um teto de scrolls por minuto é
+    respeitado em qualquer caso.
+    """
+    
+    def __init__(
+        self,
+        initial: float = CollectorConfig.SCROLL_WAIT / 1000,
+        floor: float = CollectorConfig.MIN_SCROLL_INTERVAL,
+        ceiling: float = CollectorConfig.MAX_SCROLL_INTERVAL,
+        bucket: Optional[TokenBucket] = None,
+    ):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.interval = min(max(initial, floor), ceiling)
+        self.bucket = bucket or _scroll_bucket()
+        self._distance = float(CollectorConfig.SCROLL_STEPS)
+    
+    def productive(self):
+        """Scroll trouxe posts novos: acelera e encurta a distância."""
+        self.interval = max(self.floor, self.interval * CollectorConfig.PACING_SPEEDUP)
+        self._distance = max(CollectorConfig.MIN_SCROLL_STEPS, self._distance / 1.25)
+    
+    def barren(self):
+        """Scroll sem posts novos (ou sinal de throttling): desacelera com jitter e vai mais longe."""
+        self.interval = min(
+            self.ceiling,
+            self.interval * CollectorConfig.PACING_BACKOFF + random.uniform(0, 1),
+        )
+        self._distance = min(CollectorConfig.MAX_SCROLL_STEPS, self._distance * 1.5)
+    
+    @property
+    def steps(self) -> int:
+        """Número de telas a rolar no próximo scroll."""
+        return round(self._distance)
+    
+    async def before_scroll(self):
+        """Aguarda apenas se o teto de scrolls por minuto foi atingido."""
+        await self.bucket.acquire()
+    
+    @property
+    def timeout_ms(self) -> int:
+        """Intervalo atual em milissegundos (tempo máximo de espera por scroll)."""
+        return int(self.interval * 1000)
+
+
+def _is_blocked_host(url: str) -> bool:
+    """Indica se o host da URL (ou um domínio pai) está em BLOCKED_HOSTS."""
+    host = urlsplit(url).hostname or ""
+    while host:
+        if host in CollectorConfig.BLOCKED_HOSTS:
+            return True
+        _, _, host = host.partition(".")
+    return False
+
+
+async def _block_heavy_resources(route):
+    """
+    Aborta imagens, mídia, fontes e hosts de vídeo/anúncios (o extrator lê
+    só atributos). CSS é mantido: o innerText usado na extração depende dele.
+    """
+    request = route.request
+    if request.resource_type in CollectorConfig.BLOCKED_RESOURCE_TYPES or _is_blocked_host(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
 class XCollector:
     """Coletor de posts do X com Playwright - Modo Elon Musk."""
+    
+    # Último login confirmado, compartilhado entre instâncias (mesmo Chrome/cookies)
+    _login_ok: bool = False
+    _login_checked_at: float = 0.0
+    
+    # Instâncias usando o contexto padrão do Chrome (a 1ª fica com a aba existente)
+    _tabs_in_use: int = 0
 
-    def __init__(self, headless: bool = False):
+    def __init__(self, headless: bool = False, pool: Optional["BrowserPool"] = None):
         self.headless = headless
         self.browser: Optional[Browser] = None
         self.context: Optional[BrowserContext] = None
         self.page: Optional[Page] = None
+        # Com pool, start/stop só pegam e devolvem um contexto do browser já aberto
+        self._pool = pool
         self._playwright = None
-        self._chrome_process = None
+        self._uses_spawned_chrome = False
+        self._uses_tab_slot = False
+        self._owns_page = False
+        self._routed_page: Optional[Page] = None
+        self._cdp = None
+        # Teto de scrolls por minuto vale para a sessão, não para cada coleta
+        self._scroll_bucket = _scroll_bucket()
         self.cookie_manager = CookieManager(CollectorConfig.BROWSER_DATA_DIR)
     
     async def __aenter__(self):
@@ -104,115 +487,92 @@ class XCollector:
     
     async def start(self):
         """Inicia conexão com Chrome."""
+        if self._pool:
+            self.context = await self._pool.acquire()
+            self.browser = self._pool.browser
+            self.page = await self.context.new_page()
+            return
+        
+        from playwright.async_api import async_playwright
         self._playwright = await async_playwright().start()
         
         # Tentar conectar a um Chrome já rodando com debug
         try:
-            self.browser = await self._playwright.chromium.connect_over_cdp(
-                f"http://127.0.0.1:{CollectorConfig.CHROME_DEBUG_PORT}"
-            )
-            
-            # Usar contexto existente
-            contexts = self.browser.contexts
-            if contexts:
-                self.context = contexts[0]
-                if self.context.pages:
-                    self.page = self.context.pages[0]
-                else:
-                    self.page = await self.context.new_page()
-            else:
-                self.context = await self.browser.new_context()
-                self.page = await self.context.new_page()
-
-            print("✅ Conectado ao Chrome existente!")
-
-            # Carregar cookies salvos automaticamente
-            if self.cookie_manager.has_cookies():
-                print("🍪 Carregando cookies salvos...")
-                await self.load_cookies_to_context()
-
+            self.browser = await self._playwright.chromium.connect_over_cdp(_cdp_url())
+            logger.info("✅ Conectado ao Chrome existente!")
+            self._acquire_spawned_chrome()
+            await self._attach_context()
             return
             
         except Exception as e:
-            print(f"⚠️ Chrome não está em modo debug. Iniciando novo...")
+            logger.warning("⚠️ Chrome não está em modo debug. Iniciando novo...")
         
         # Se não conseguiu conectar, iniciar Chrome com perfil do usuário
         await self._start_chrome_with_profile()
     
     async def _start_chrome_with_profile(self):
         """Inicia Chrome usando o perfil real do usuário (com login salvo)."""
-        chrome_path = get_chrome_path()
-        user_data_dir = get_chrome_user_data_dir()
-        
-        print(f"🚀 Iniciando Chrome com seu perfil...")
-        print(f"   Chrome: {chrome_path}")
-        print(f"   Perfil: {user_data_dir}")
-        
-        # Verificar se Chrome já está rodando
-        # Se estiver, precisamos usar uma cópia do perfil ou pedir para fechar
-        
-        # Usar diretório temporário baseado no perfil original
-        temp_profile = Path(CollectorConfig.BROWSER_DATA_DIR) / "chrome_profile"
-        temp_profile.mkdir(parents=True, exist_ok=True)
-        
-        # Iniciar Chrome com debug port
-        args = [
-            chrome_path,
-            f"--remote-debugging-port={CollectorConfig.CHROME_DEBUG_PORT}",
-            f"--user-data-dir={temp_profile}",
-            "--no-first-run",
-            "--no-default-browser-check",
-            "--disable-default-apps",
-        ]
-        
-        if self.headless:
-            args.append("--headless=new")
-        
         try:
-            self._chrome_process = subprocess.Popen(
-                args,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-            )
-            
-            # Aguardar Chrome iniciar
-            await asyncio.sleep(2)
-            
-            # Conectar via CDP
-            for attempt in range(5):
-                try:
-                    self.browser = await self._playwright.chromium.connect_over_cdp(
-                        f"http://127.0.0.1:{CollectorConfig.CHROME_DEBUG_PORT}"
-                    )
-                    break
-                except Exception:
-                    await asyncio.sleep(1)
-            
-            if not self.browser:
-                raise Exception("Não foi possível conectar ao Chrome")
-            
-            contexts = self.browser.contexts
-            if contexts:
-                self.context = contexts[0]
-                if self.context.pages:
-                    self.page = self.context.pages[0]
-                else:
-                    self.page = await self.context.new_page()
+            process = self._acquire_spawned_chrome(spawn=True)
+            self.browser = await _connect_cdp_with_retry(self._playwright, process)
+            logger.info("✅ Chrome iniciado com sucesso!")
+            await self._attach_context()
+
+        except Exception as e:
+            logger.error("❌ Erro ao iniciar Chrome: %s", e)
+            # Fallback para Playwright puro
+            await self._start_playwright_browser()
+    
+    def _acquire_spawned_chrome(self, spawn: bool = False) -> Optional[subprocess.Popen]:
+        """Registra esta instância no Chrome compartilhado (ver _SharedChrome)."""
+        if self._uses_spawned_chrome:
+            return _SharedChrome.process
+        process = _SharedChrome.acquire(self.headless, spawn)
+        self._uses_spawned_chrome = process is not None
+        return process
+    
+    def _release_spawned_chrome(self):
+        """Libera a aba e a referência ao Chrome compartilhado."""
+        with _SharedChrome.lock:
+            if self._uses_tab_slot:
+                XCollector._tabs_in_use -= 1
+                self._uses_tab_slot = False
+        if self._uses_spawned_chrome:
+            self._uses_spawned_chrome = False
+            _SharedChrome.release()
+    
+    async def _attach_context(self):
+        """
+        Usa o contexto padrão do Chrome (perfil do usuário) ou cria um novo.
+        
+        Contexto novo recebe os cookies de uma vez via storage_state; no
+        contexto existente eles ainda são adicionados com add_cookies.
+        Com outra instância já usando o Chrome, abre uma aba própria em vez
+        de disputar a primeira.
+        """
+        contexts = self.browser.contexts
+        if contexts:
+            self.context = contexts[0]
+            with _SharedChrome.lock:
+                shared = XCollector._tabs_in_use > 0
+                XCollector._tabs_in_use += 1
+                self._uses_tab_slot = True
+            if self.context.pages and not shared:
+                self.page = self.context.pages[0]
             else:
-                self.context = await self.browser.new_context()
                 self.page = await self.context.new_page()
-
-            print("✅ Chrome iniciado com sucesso!")
+                self._owns_page = shared
 
             # Carregar cookies salvos automaticamente
             if self.cookie_manager.has_cookies():
-                print("🍪 Carregando cookies salvos...")
+                logger.info("🍪 Carregando cookies salvos...")
                 await self.load_cookies_to_context()
-
-        except Exception as e:
-            print(f"❌ Erro ao iniciar Chrome: {e}")
-            # Fallback para Playwright puro
-            await self._start_playwright_browser()
+        else:
+            state = self.cookie_manager.storage_state_path()
+            if state:
+                logger.info("🍪 Carregando cookies salvos (storage_state)...")
+            self.context = await self.browser.new_context(storage_state=state)
+            self.page = await self.context.new_page()
     
     async def _start_playwright_browser(self):
         """Fallback: inicia browser Playwright normal."""
@@ -234,20 +594,31 @@ class XCollector:
 
         # Carregar cookies salvos automaticamente
         if self.cookie_manager.has_cookies():
-            print("🍪 Carregando cookies salvos...")
+            logger.info("🍪 Carregando cookies salvos...")
             await self.load_cookies_to_context()
     
     async def stop(self):
         """Para o browser."""
-        if self.context and not self.browser:
-            # Contexto persistente
-            await self.context.close()
-        if self.browser:
-            await self.browser.close()
-        if self._playwright:
-            await self._playwright.stop()
-        if self._chrome_process:
-            self._chrome_process.terminate()
+        if self._pool:
+            # Browser compartilhado continua vivo: fecha só a página e o contexto
+            if self.page and not self.page.is_closed():
+                await self.page.close()
+            await self._pool.release(self.context)
+            return
+        
+        try:
+            if self._owns_page and self.page and not self.page.is_closed():
+                # Aba aberta só para esta instância num Chrome compartilhado
+                await self.page.close()
+            if self.context and not self.browser:
+                # Contexto persistente
+                await self.context.close()
+            if self.browser:
+                await self.browser.close()
+            if self._playwright:
+                await self._playwright.stop()
+        finally:
+            self._release_spawned_chrome()
     
     async def start_chrome_debug_mode(self) -> str:
         """
@@ -270,11 +641,12 @@ class XCollector:
         Tenta conectar ao Chrome do usuário rodando em modo debug.
         """
         if not self._playwright:
+            from playwright.async_api import async_playwright
             self._playwright = await async_playwright().start()
         
         try:
             self.browser = await self._playwright.chromium.connect_over_cdp(
-                f"http://127.0.0.1:{CollectorConfig.CHROME_DEBUG_PORT}",
+                _cdp_url(),
                 timeout=5000,
             )
             
@@ -285,9 +657,10 @@ class XCollector:
                 
                 # Procurar página do X já aberta
                 for p in pages:
-                    if "x.com" in p.url or "twitter.com" in p.url:
+                    url = p.url
+                    if URLBuilder.is_valid_x_url(url):
                         self.page = p
-                        print(f"✅ Encontrada página do X: {p.url}")
+                        logger.info("✅ Encontrada página do X: %s", url)
                         return True
                 
                 # Se não tem página do X, usar primeira página
@@ -301,21 +674,57 @@ class XCollector:
             return False
             
         except Exception as e:
-            print(f"❌ Não foi possível conectar: {e}")
+            logger.error("❌ Não foi possível conectar: %s", e)
             return False
     
-    async def is_logged_in(self) -> bool:
-        """Verifica se há sessão ativa."""
+    @classmethod
+    def invalidate_login_cache(cls):
+        """Descarta o último login confirmado (força nova verificação)."""
+        cls._login_ok = False
+        cls._login_checked_at = 0.0
+    
+    async def is_logged_in(self, use_cache: bool = True) -> bool:
+        """
+        Verifica se há sessão ativa.
+        
+        Um login confirmado há menos de LOGIN_CACHE_TTL segundos é reaproveitado
+        sem navegar para x.com/home.
+        """
         if not self.page:
             return False
         
+        cls = type(self)
+        if (
+            use_cache
+            and cls._login_ok
+            and time.monotonic() - cls._login_checked_at < CollectorConfig.LOGIN_CACHE_TTL
+        ):
+            return True
+        
+        logged = await self._check_login()
+        cls._login_ok = logged
+        cls._login_checked_at = time.monotonic()
+        return logged
+    
+    async def _check_login(self) -> bool:
+        """Navega para x.com/home e verifica se o usuário está logado."""
         try:
-            await self.page.goto("https://x.com/home", timeout=CollectorConfig.PAGE_LOAD_TIMEOUT)
-            await asyncio.sleep(3)
+            await self.page.goto(
+                "https://x.com/home",
+                timeout=CollectorConfig.PAGE_LOAD_TIMEOUT,
+                wait_until="domcontentloaded",
+            )
             
-            # Verificar elementos de usuário logado
-            logged = await self.page.query_selector('[data-testid="SideNav_AccountSwitcher_Button"]')
-            return logged is not None
+            # Aguarda o que aparecer primeiro: elemento de usuário logado ou a
+            # tela de login (deslogado responde na hora, sem esgotar o timeout)
+            element = await self.page.wait_for_selector(
+                f"{LOGGED_IN_SELECTOR}, {LOGGED_OUT_SELECTOR}",
+                state="attached",
+                timeout=CollectorConfig.LOGIN_CHECK_TIMEOUT,
+            )
+            if element is None:
+                return False
+            return await element.evaluate("(el, sel) => el.matches(sel)", LOGGED_IN_SELECTOR)
             
         except Exception:
             return False
@@ -325,28 +734,32 @@ class XCollector:
         if not self.page:
             await self.start()
         
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+        
         try:
             await self.page.goto("https://x.com/login", timeout=CollectorConfig.PAGE_LOAD_TIMEOUT)
             
-            print("🔐 Faça login no X. O navegador ficará aberto por até 5 minutos...")
+            logger.info("🔐 Faça login no X. O navegador ficará aberto por até 5 minutos...")
             
-            # Aguardar login
-            for _ in range(150):  # 5 minutos
-                await asyncio.sleep(2)
-                try:
-                    if "/home" in self.page.url or self.page.url == "https://x.com/":
-                        logged = await self.page.query_selector('[data-testid="SideNav_AccountSwitcher_Button"]')
-                        if logged:
-                            print("✅ Login detectado!")
-                            return True
-                except Exception:
-                    pass
+            # Aguardar login: o seletor só aparece para usuários logados e a
+            # espera sobrevive às navegações do fluxo de login
+            try:
+                await self.page.wait_for_selector(
+                    LOGGED_IN_SELECTOR,
+                    timeout=CollectorConfig.LOGIN_WAIT_TIMEOUT,
+                )
+            except PlaywrightTimeoutError:
+                logger.warning("⏰ Tempo limite atingido")
+                return False
             
-            print("⏰ Tempo limite atingido")
-            return False
+            logger.info("✅ Login detectado!")
+            cls = type(self)
+            cls._login_ok = True
+            cls._login_checked_at = time.monotonic()
+            return True
             
         except Exception as e:
-            print(f"❌ Erro: {e}")
+            logger.error("❌ Erro: %s", e)
             return False
     
     async def import_cookies_from_json(self, cookies_json: str) -> tuple[bool, str]:
@@ -359,6 +772,7 @@ class XCollector:
         Returns:
             Tupla (sucesso, mensagem)
         """
+        self.invalidate_login_cache()
         return self.cookie_manager.import_cookies(cookies_json)
 
     async def load_cookies_to_context(self) -> bool:
@@ -369,20 +783,20 @@ class XCollector:
             True se cookies foram carregados com sucesso
         """
         if not self.context:
-            print("⚠️ Contexto do browser não iniciado")
+            logger.warning("⚠️ Contexto do browser não iniciado")
             return False
 
         cookies = self.cookie_manager.load_cookies()
         if not cookies:
-            print("⚠️ Nenhum cookie salvo encontrado")
+            logger.warning("⚠️ Nenhum cookie salvo encontrado")
             return False
 
         try:
             await self.context.add_cookies(cookies)
-            print(f"✅ {len(cookies)} cookies carregados no contexto")
+            logger.info("✅ %s cookies carregados no contexto", len(cookies))
             return True
         except Exception as e:
-            print(f"❌ Erro ao carregar cookies no contexto: {e}")
+            logger.error("❌ Erro ao carregar cookies no contexto: %s", e)
             return False
 
     def has_saved_cookies(self) -> bool:
@@ -395,11 +809,36 @@ class XCollector:
 
     def delete_saved_cookies(self) -> tuple[bool, str]:
         """Remove os cookies salvos."""
+        self.invalidate_login_cache()
         return self.cookie_manager.delete_cookies()
     
+    async def _install_resource_blocking(self):
+        """
+        Registra o bloqueio de recursos pesados na página de coleta.
+        
+        O roteamento é feito na página (e não no contexto) para não afetar
+        outras abas do Chrome do usuário quando conectado via CDP.
+        """
+        if not CollectorConfig.BLOCK_RESOURCES or self._routed_page is self.page:
+            return
+        try:
+            await self.page.route("**/*", _block_heavy_resources)
+            self._routed_page = self.page
+        except Exception as e:
+            logger.warning("⚠️ Não foi possível bloquear recursos: %s", e)
+            return
+        
+        # O Playwright desliga o cache HTTP em páginas com route(); religar via
+        # CDP para que JS/CSS do X não sejam baixados de novo a cada navegação
+        try:
+            self._cdp = await self.context.new_cdp_session(self.page)
+            await self._cdp.send("Network.setCacheDisabled", {"cacheDisabled": False})
+        except Exception as e:
+            logger.debug("Cache HTTP não reativado: %s", e)
+    
     async def check_for_blocks(self) -> tuple[bool, str]:
         """
-        Verifica se há bloqueios ou verificações pendentes.
+        Verifica se há bloqueios, verificações pendentes ou tela de login.
         
         Returns:
             (tem_bloqueio, mensagem)
@@ -408,22 +847,21 @@ class XCollector:
             return True, "Browser não iniciado"
         
         try:
-            page_content = await self.page.content()
+            # Busca feita no próprio browser: só o índice do indicador cruza o IPC
+            index = await self.page.evaluate(
+                _FIND_BLOCK_INDICATOR_JS,
+                [_BLOCK_NEEDLES, _CHALLENGE_SELECTOR, LOGGED_OUT_SELECTOR],
+            )
             
-            # Verificar diferentes tipos de bloqueio
-            block_indicators = [
-                ("Verify your identity", "Verificação de identidade necessária"),
-                ("Verify your phone", "Verificação de telefone necessária"),
-                ("Something went wrong", "Erro detectado - possível rate limit"),
-                ("Rate limit exceeded", "Rate limit excedido"),
-                ("Suspicious activity", "Atividade suspeita detectada"),
-                ("CAPTCHA", "CAPTCHA detectado"),
-                ("Are you a robot", "Verificação anti-bot detectada"),
-            ]
+            if index == _LOGGED_OUT_INDEX:
+                # Sessão expirou no meio da coleta: não confiar mais no cache
+                self.invalidate_login_cache()
+                return True, "Sessão expirada (tela de login). Faça login novamente."
             
-            for indicator, message in block_indicators:
-                if indicator.lower() in page_content.lower():
-                    return True, message
+            if index is not None and index >= 0:
+                # Bloqueio pode significar sessão inválida: verificar login de novo
+                self.invalidate_login_cache()
+                return True, BLOCK_INDICATORS[index][1]
             
             return False, ""
         except Exception as e:
@@ -454,15 +892,47 @@ class XCollector:
             started_at=utc_now(),
         )
         
+        async for post in self.iter_posts(
+            query_or_url, params, is_url, progress_callback, result=result
+        ):
+            result.posts.append(post)
+        
+        result.total_collected = len(result.posts)
+        return result
+    
+    async def iter_posts(
+        self,
+        query_or_url: str,
+        params: CollectionParams,
+        is_url: bool = False,
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+        result: Optional[CollectionResult] = None,
+    ) -> AsyncGenerator[Post, None]:
+        """
+        Gera os posts conforme são coletados, sem acumular a lista em memória.
+        
+        Se `result` for informado, stop_reason, errors e finished_at são
+        registrados nele (os posts não são adicionados — isso fica com quem
+        consome o generator, como collect()).
+        """
+        if result is None:
+            result = CollectionResult(
+                query_or_url=query_or_url,
+                params=params,
+                started_at=utc_now(),
+            )
+        
         if not self.page:
             result.errors.append("Browser não iniciado")
             result.stop_reason = "error"
-            return result
+            return
         
-        def log(msg: str):
+        collected = 0
+        
+        def log(msg: str, *args):
             if progress_callback:
-                progress_callback(len(result.posts), msg)
-            print(msg)
+                progress_callback(collected, msg % args if args else msg)
+            logger.info(msg, *args)
         
         try:
             # Construir URL
@@ -471,114 +941,192 @@ class XCollector:
             else:
                 url = URLBuilder.build_search_url(query_or_url, params)
             
-            log(f"🔍 Navegando para: {url}")
+            log("🔍 Navegando para: %s", url)
+            
+            await self._install_resource_blocking()
             
-            # Navegar para a página
-            await self.page.goto(url, timeout=CollectorConfig.PAGE_LOAD_TIMEOUT)
-            await asyncio.sleep(3)  # Aguardar carregamento inicial
+            # Navegar para a página e aguardar o primeiro post (ou estado vazio/erro)
+            await self.page.goto(
+                url,
+                timeout=CollectorConfig.PAGE_LOAD_TIMEOUT,
+                wait_until="domcontentloaded",
+            )
+            try:
+                await self.page.wait_for_selector(
+                    TIMELINE_READY_SELECTOR,
+                    state="attached",
+                    timeout=CollectorConfig.FIRST_POST_TIMEOUT,
+                )
+            except Exception:
+                # Segue mesmo assim: bloqueios e falta de posts são tratados abaixo
+                pass
             
             # Verificar bloqueios
             has_block, block_msg = await self.check_for_blocks()
             if has_block:
-                log(f"🚫 {block_msg}")
+                log("🚫 %s", block_msg)
                 result.errors.append(block_msg)
                 result.stop_reason = "blocked"
-                return result
+                result.finished_at = utc_now()
+                return
             
-            # Coletar posts com scroll
-            collected_ids = set()
+            # Coletar posts com scroll (IDs numéricos guardados como int:
+            # hash trivial e bem menos memória que str em coletas grandes)
+            collected_ids: set[int] = set()
             no_new_posts_count = 0
             scroll_count = 0
-            last_scroll_time = datetime.now()
+            feed_stalled = False
+            pacer = AdaptivePacer(bucket=self._scroll_bucket)
+            large_run = (params.max_posts or 0) > CollectorConfig.LARGE_COLLECTION
             
             # Calcular data limite se max_days definido
             date_limit = None
             if params.max_days:
                 date_limit = utc_now() - timedelta(days=params.max_days)
             
-            while True:
-                # Rate limiting
-                time_since_last = (datetime.now() - last_scroll_time).total_seconds()
-                if time_since_last < CollectorConfig.MIN_SCROLL_INTERVAL:
-                    await asyncio.sleep(CollectorConfig.MIN_SCROLL_INTERVAL - time_since_last)
-                
-                # Extrair posts da página atual
-                new_posts = await PostExtractor.extract_all_from_page(self.page)
-                new_count = 0
-                
-                for post in new_posts:
-                    if post.post_id in collected_ids:
-                        continue
+            accepts = self._make_post_filter(params)
+            
+            scroll_task: Optional[asyncio.Task] = None
+            try:
+                # Primeiro lote já carregado; os seguintes vêm junto com cada scroll
+                new_posts = await PostExtractor.extract_new_from_page(self.page)
+                while True:
+                    accepted: list[Post] = []
                     
-                    # Aplicar filtros
-                    if not params.include_reposts and post.is_repost:
-                        continue
-                    if not params.include_replies and post.is_reply:
-                        continue
-                    if not params.include_quotes and post.is_quote:
-                        continue
+                    # Dedup do lote inteiro numa operação de conjunto (em geral a
+                    # maioria dos IDs de um lote remontado já foi coletada)
+                    batch_ids = [int(post.post_id) for post in new_posts]
+                    fresh_ids = set(batch_ids).difference(collected_ids)
                     
-                    # Verificar limite de data
-                    if date_limit and post.datetime and post.datetime < date_limit:
-                        log(f"📅 Atingido limite de data ({params.max_days} dias)")
-                        result.stop_reason = "date_limit"
-                        break
+                    for post, numeric_id in zip(new_posts, batch_ids):
+                        if numeric_id not in fresh_ids:
+                            continue
+                        
+                        # Aplicar filtros
+                        if not accepts(post):
+                            continue
+                        
+                        # Verificar limite de data
+                        if date_limit and post.datetime and post.datetime < date_limit:
+                            log("📅 Atingido limite de data (%s dias)", params.max_days)
+                            result.stop_reason = "date_limit"
+                            break
+                        
+                        collected_ids.add(numeric_id)
+                        collected += 1
+                        accepted.append(post)
+                        
+                        # Verificar limite de posts
+                        if params.max_posts and collected >= params.max_posts:
+                            log("✅ Atingido limite de %s posts", params.max_posts)
+                            result.stop_reason = "max_posts"
+                            break
                     
-                    result.posts.append(post)
-                    collected_ids.add(post.post_id)
-                    new_count += 1
+                    new_count = len(accepted)
+                    log("📊 Scroll #%s: %s posts (%s novos)", scroll_count + 1, collected, new_count)
                     
-                    # Verificar limite de posts
-                    if params.max_posts and len(result.posts) >= params.max_posts:
-                        log(f"✅ Atingido limite de {params.max_posts} posts")
-                        result.stop_reason = "max_posts"
-                        break
-                
-                log(f"📊 Scroll #{scroll_count + 1}: {len(result.posts)} posts ({new_count} novos)")
-                
-                # Verificar condições de parada
-                if result.stop_reason:
-                    break
-                
-                if new_count == 0:
-                    no_new_posts_count += 1
-                    if no_new_posts_count >= CollectorConfig.NO_NEW_POSTS_LIMIT:
-                        log(f"⏹️ Sem novos posts por {no_new_posts_count} scrolls")
-                        result.stop_reason = "no_new_posts"
-                        break
-                else:
-                    no_new_posts_count = 0
-                
-                # Fazer scroll
-                scroll_count += 1
-                last_scroll_time = datetime.now()
-                
-                await self.page.evaluate("window.scrollBy(0, window.innerHeight * 2)")
-                await asyncio.sleep(CollectorConfig.SCROLL_WAIT / 1000)
-                
-                # Verificar bloqueios periodicamente
-                if scroll_count % 10 == 0:
-                    has_block, block_msg = await self.check_for_blocks()
-                    if has_block:
-                        log(f"🚫 {block_msg}")
-                        result.errors.append(block_msg)
-                        result.stop_reason = "blocked"
+                    # Verificar condições de parada
+                    if not result.stop_reason:
+                        if new_count == 0:
+                            no_new_posts_count += 1
+                            if feed_stalled:
+                                # Altura da página parou de crescer: fim real do feed
+                                log("⏹️ Fim do feed (página parou de crescer)")
+                                result.stop_reason = "no_new_posts"
+                            elif no_new_posts_count >= CollectorConfig.NO_NEW_POSTS_LIMIT:
+                                # Fallback para layouts em que a altura não é um bom sinal
+                                log("⏹️ Sem novos posts por %s scrolls", no_new_posts_count)
+                                result.stop_reason = "no_new_posts"
+                            else:
+                                pacer.barren()
+                        else:
+                            no_new_posts_count = 0
+                            pacer.productive()
+                    
+                    # Lote já processado: liberar antes de esperar o próximo scroll
+                    del new_posts, batch_ids, fresh_ids
+                    
+                    # Disparar o próximo scroll (com rate limiting adaptativo) antes
+                    # de entregar os posts: o consumidor trabalha enquanto o browser rola
+                    if not result.stop_reason:
+                        scroll_count += 1
+                        if large_run and scroll_count % CollectorConfig.GC_EVERY_SCROLLS == 0:
+                            gc.collect()
+                        await pacer.before_scroll()
+                        scroll_task = asyncio.create_task(self._scroll_for_new_posts(pacer))
+                    
+                    for post in accepted:
+                        yield post
+                    del accepted
+                    
+                    if result.stop_reason:
                         break
+                    
+                    # Posts adicionados pelo scroll (lidos no mesmo evaluate)
+                    scroll_state, new_posts = await scroll_task
+                    scroll_task = None
+                    feed_stalled = bool(scroll_state and scroll_state.get("stalled"))
+                    
+                    # Verificar bloqueios periodicamente
+                    if scroll_count % 10 == 0:
+                        has_block, block_msg = await self.check_for_blocks()
+                        if has_block:
+                            log("🚫 %s", block_msg)
+                            result.errors.append(block_msg)
+                            result.stop_reason = "blocked"
+                            break
+            finally:
+                # Consumidor saiu no meio (ou erro): não deixar o scroll pendente
+                if scroll_task and not scroll_task.done():
+                    scroll_task.cancel()
             
             result.finished_at = utc_now()
-            result.total_collected = len(result.posts)
             
             if not result.stop_reason:
                 result.stop_reason = "completed"
             
-            log(f"✅ Coleta finalizada: {result.total_collected} posts")
+            log("✅ Coleta finalizada: %s posts", collected)
             
         except Exception as e:
             result.errors.append(str(e))
             result.stop_reason = "error"
             result.finished_at = utc_now()
+    
+    @staticmethod
+    def _make_post_filter(params: CollectionParams) -> Callable[[Post], bool]:
+        """
+        Monta o filtro de reposts/respostas/citações uma vez por coleta.
         
-        return result
+        As opções de params viram variáveis da closure, evitando reler os
+        atributos do modelo a cada post do loop.
+        """
+        skip_reposts = not params.include_reposts
+        skip_replies = not params.include_replies
+        skip_quotes = not params.include_quotes
+        
+        def accepts(post: Post) -> bool:
+            return not (
+                (skip_reposts and post.is_repost)
+                or (skip_replies and post.is_reply)
+                or (skip_quotes and post.is_quote)
+            )
+        
+        return accepts
+    
+    async def _scroll_for_new_posts(self, pacer: AdaptivePacer) -> tuple[Optional[dict], list[Post]]:
+        """
+        Rola a página no browser até surgirem posts novos (ver _SCROLL_UNTIL_NEW_JS).
+        
+        Os posts novos são extraídos no mesmo page.evaluate do scroll: uma
+        única chamada ao browser por iteração da coleta.
+        """
+        return await PostExtractor.extract_new_after(self.page, _SCROLL_UNTIL_NEW_JS, {
+            "selector": f"{PostExtractor.ARTICLE_SELECTOR}:not([{PostExtractor.COLLECTED_ATTR}])",
+            "target": CollectorConfig.SCROLL_BATCH_TARGET,
+            "steps": pacer.steps,
+            "stepMs": CollectorConfig.SCROLL_STEP_MS,
+            "timeoutMs": pacer.timeout_ms,
+        })
     
     async def collect_generator(
         self,
@@ -586,14 +1134,258 @@ class XCollector:
         params: CollectionParams,
         is_url: bool = False,
     ) -> AsyncGenerator[Post, None]:
+        """Alias de iter_posts(), mantido por compatibilidade."""
+        async for post in self.iter_posts(query_or_url, params, is_url):
+            yield post
+
+
+class BrowserPool:
+    """
+    Mantém um único Browser durante a vida do processo.
+    
+    Cada coleta abre uma CollectionSession (contexto + página próprios) ou
+    pega um contexto com acquire()/release(), evitando o custo de iniciar o
+    Chromium e recarregar cookies a cada execução.
+    """
+    
+    def __init__(self, headless: bool = False):
+        self.headless = headless
+        self.browser: Optional[Browser] = None
+        self._playwright = None
+        self._chrome_process = None
+        self.cookie_manager = CookieManager(CollectorConfig.BROWSER_DATA_DIR)
+        self._storage_state: Optional[dict] = None
+        self._owned_contexts: set[BrowserContext] = set()
+        self._lock = asyncio.Lock()
+    
+    async def __aenter__(self):
+        await self.launch_browser()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+    
+    @property
+    def is_running(self) -> bool:
+        """Indica se o browser está conectado."""
+        return self.browser is not None and self.browser.is_connected()
+    
+    async def launch_browser(self):
+        """Conecta ao Chrome em modo debug ou inicia um novo (uma vez por processo)."""
+        if self.is_running:
+            return
+        
+        if not self._playwright:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+        
+        try:
+            self.browser = await self._playwright.chromium.connect_over_cdp(_cdp_url())
+            logger.info("✅ Conectado ao Chrome existente!")
+            self._chrome_process = _SharedChrome.acquire(self.headless, spawn=False)
+        except Exception:
+            logger.warning("⚠️ Chrome não está em modo debug. Iniciando novo...")
+            try:
+                self._chrome_process = _SharedChrome.acquire(self.headless, spawn=True)
+                self.browser = await _connect_cdp_with_retry(self._playwright, self._chrome_process)
+                logger.info("✅ Chrome iniciado com sucesso!")
+            except Exception as e:
+                logger.error("❌ Erro ao iniciar Chrome: %s", e)
+                # Fallback para Playwright puro
+                self.browser = await self._playwright.chromium.launch(headless=self.headless)
+        
+        self.reload_cookies()
+    
+    def reload_cookies(self) -> Optional[list]:
+        """Relê o storage_state salvo do disco para o cache em memória."""
+        self._storage_state = self.cookie_manager.load_storage_state()
+        return self.cookies
+    
+    @property
+    def cookies(self) -> Optional[list]:
+        """Cookies em memória (carregados uma vez em launch_browser)."""
+        if not self._storage_state:
+            return None
+        return self._storage_state.get("cookies") or None
+    
+    @property
+    def storage_state(self) -> Optional[dict]:
+        """storage_state em memória, pronto para browser.new_context()."""
+        return self._storage_state if self.cookies else None
+    
+    async def acquire(self) -> BrowserContext:
         """
-        Versão generator que yield posts conforme são coletados.
-        Útil para streaming/atualização em tempo real.
+        Entrega um contexto pronto para coleta, iniciando o browser se preciso.
+        
+        Com cookies salvos, é um contexto novo carregado via storage_state;
+        sem cookies, é o contexto padrão do Chrome (perfil logado).
         """
-        # Implementação simplificada - usar collect() para MVP
-        result = await self.collect(query_or_url, params, is_url)
-        for post in result.posts:
-            yield post
+        async with self._lock:
+            await self.launch_browser()
+        
+        state = self.storage_state
+        if state or not self.browser.contexts:
+            context = await self.browser.new_context(
+                storage_state=state,
+                **CollectorConfig.CONTEXT_OPTIONS,
+            )
+            self._owned_contexts.add(context)
+            return context
+        return self.browser.contexts[0]
+    
+    async def release(self, context: Optional[BrowserContext]):
+        """Devolve um contexto obtido com acquire(); o browser continua aberto."""
+        if context in self._owned_contexts:
+            self._owned_contexts.discard(context)
+            await context.close()
+    
+    def open_session(self) -> "CollectionSession":
+        """Cria uma sessão de coleta (usar com async with)."""
+        if not self.browser:
+            raise Exception("Browser não iniciado. Chame launch_browser() primeiro.")
+        return CollectionSession(self)
+    
+    async def collect_many(
+        self,
+        jobs: list[tuple[str, CollectionParams, bool]],
+        concurrency: int = CollectorConfig.MULTI_COLLECT_CONCURRENCY,
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+    ) -> list[CollectionResult]:
+        """
+        Executa várias coletas em paralelo, cada uma em seu próprio contexto.
+        
+        Args:
+            jobs: Lista de (query_or_url, params, is_url)
+            concurrency: Máximo de contextos simultâneos
+            progress_callback: Função chamada com (posts_count, log_message)
+            
+        Returns:
+            Lista de CollectionResult na mesma ordem de jobs
+        """
+        await self.launch_browser()
+        sem = asyncio.Semaphore(max(1, concurrency))
+        
+        async def run_one(query_or_url: str, params: CollectionParams, is_url: bool) -> CollectionResult:
+            async with sem:
+                # Atraso aleatório para não sincronizar rajadas contra o rate limit do X
+                await asyncio.sleep(random.uniform(0, CollectorConfig.START_JITTER))
+                try:
+                    async with self.open_session() as session:
+                        return await session.collect(query_or_url, params, is_url, progress_callback)
+                except Exception as e:
+                    return CollectionResult(
+                        query_or_url=query_or_url,
+                        params=params,
+                        finished_at=utc_now(),
+                        stop_reason="error",
+                        errors=[str(e)],
+                    )
+        
+        return list(await asyncio.gather(*(run_one(*job) for job in jobs)))
+    
+    async def close(self):
+        """Encerra o browser e o Playwright."""
+        if self.browser:
+            await self.browser.close()
+            self.browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+        if self._chrome_process:
+            _SharedChrome.release()
+            self._chrome_process = None
+
+
+# Um BrowserPool por event loop (objetos do Playwright ficam presos ao loop)
+_shared_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, BrowserPool]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+async def get_browser_pool(headless: bool = True) -> BrowserPool:
+    """
+    Retorna o BrowserPool compartilhado do event loop atual, já aquecido.
+    
+    O browser é iniciado na primeira chamada; as seguintes só entregam o
+    pool, então cada coleta paga apenas a abertura de um contexto.
+    """
+    loop = asyncio.get_running_loop()
+    pool = _shared_pools.get(loop)
+    if pool is None:
+        pool = _shared_pools[loop] = BrowserPool(headless=headless)
+    
+    async with pool._lock:
+        await pool.launch_browser()
+    return pool
+
+
+async def close_browser_pool():
+    """Encerra o BrowserPool compartilhado do event loop atual (se houver)."""
+    pool = _shared_pools.pop(asyncio.get_running_loop(), None)
+    if pool:
+        await pool.close()
+
+
+class CollectionSession:
+    """
+    Sessão de coleta leve sobre um BrowserPool.
+    
+    Abre um contexto novo (com os cookies em memória) e uma página ao entrar,
+    e fecha o contexto ao sair. Sem cookies salvos, usa o contexto padrão do
+    Chrome (perfil logado) e fecha apenas a página.
+    """
+    
+    def __init__(self, pool: BrowserPool):
+        self.pool = pool
+        self.context: Optional[BrowserContext] = None
+        self.page: Optional[Page] = None
+        self._collector: Optional[XCollector] = None
+    
+    async def __aenter__(self):
+        self.context = await self.pool.acquire()
+        self.page = await self.context.new_page()
+        
+        # Reaproveita a lógica de coleta do XCollector sobre esta página
+        self._collector = XCollector(headless=self.pool.headless)
+        self._collector.browser = self.pool.browser
+        self._collector.context = self.context
+        self._collector.page = self.page
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if self.page and not self.page.is_closed():
+                await self.page.close()
+            await self.pool.release(self.context)
+        finally:
+            self.context = None
+            self.page = None
+            self._collector = None
+    
+    async def is_logged_in(self) -> bool:
+        """Verifica se há sessão ativa nesta sessão."""
+        return await self._collector.is_logged_in()
+    
+    async def collect(
+        self,
+        query_or_url: str,
+        params: CollectionParams,
+        is_url: bool = False,
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+    ) -> CollectionResult:
+        """Coleta posts nesta sessão (ver XCollector.collect)."""
+        return await self._collector.collect(query_or_url, params, is_url, progress_callback)
+    
+    def iter_posts(
+        self,
+        query_or_url: str,
+        params: CollectionParams,
+        is_url: bool = False,
+        progress_callback: Optional[Callable[[int, str], None]] = None,
+        result: Optional[CollectionResult] = None,
+    ) -> AsyncGenerator[Post, None]:
+        """Gera os posts nesta sessão (ver XCollector.iter_posts)."""
+        return self._collector.iter_posts(query_or_url, params, is_url, progress_callback, result)
 
 
 async def quick_collect(
@@ -16,6 +16,18 @@ logger = logging.getLogger(__name__)
 class CookieManager:
     """Gerencia importação e persistência de cookies do X."""
 
+    # Campos obrigatórios de cada cookie do X
+    REQUIRED_FIELDS = frozenset(('name', 'value', 'domain'))
+
+    # sameSite das extensões de exportação -> valor aceito pelo Playwright
+    SAME_SITE_MAP = {
+        'strict': 'Strict',
+        'lax': 'Lax',
+        'none': 'None',
+        'no_restriction': 'None',
+        'unspecified': 'Lax',
+    }
+
     def __init__(self, browser_data_dir: str = "./browser_data"):
         """
         Inicializa o gerenciador de cookies.
@@ -25,10 +37,41 @@ class CookieManager:
         """
         self.browser_data_dir = Path(browser_data_dir)
         self.cookies_file = self.browser_data_dir / "cookies.json"
+        # Mesmos cookies no formato storage_state do Playwright (carga em lote no new_context)
+        self.storage_state_file = self.browser_data_dir / "storage_state.json"
+
+        # JSON já lido, por arquivo: {caminho: ((mtime_ns, tamanho), dados)}
+        self._json_cache: Dict[Path, tuple[tuple[int, int], Any]] = {}
 
         # Cria o diretório se não existir
         self.browser_data_dir.mkdir(parents=True, exist_ok=True)
 
+    def _read_json(self, path: Path) -> Any:
+        """
+        Lê um arquivo JSON, reaproveitando o parse enquanto o arquivo não mudar.
+
+        A validade é dada por (st_mtime_ns, st_size); o resultado é
+        compartilhado, então quem recebe não deve alterá-lo.
+        """
+        stat = path.stat()
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._json_cache.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+
+        data = json.loads(path.read_bytes())
+        self._json_cache[path] = (key, data)
+        return data
+
+    def _write_json(self, path: Path, data: Any, indent: Optional[int] = None) -> None:
+        """
+        Grava JSON de forma atômica: escreve num .tmp ao lado e renomeia com
+        os.replace, para que uma falha no meio não corrompa o arquivo.
+        """
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_text(json.dumps(data, indent=indent, ensure_ascii=False), encoding='utf-8')
+        os.replace(tmp, path)
+
     def validate_json_cookies(self, cookies_json: str) -> tuple[bool, str, Optional[List[Dict[str, Any]]]]:
         """
         Valida se o JSON de cookies está no formato correto.
@@ -51,28 +94,26 @@ class CookieManager:
         if len(cookies) == 0:
             return False, "❌ A lista de cookies está vazia", None
 
-        # Valida se contém cookies do domínio x.com
-        x_cookies = [c for c in cookies if self._is_x_cookie(c)]
-
-        if len(x_cookies) == 0:
-            return False, "❌ Nenhum cookie do domínio x.com encontrado", None
-
-        # Valida estrutura básica dos cookies
-        required_fields = ['name', 'value', 'domain']
-        for cookie in x_cookies:
+        # Filtra cookies do domínio x.com e valida a estrutura numa só passada
+        x_cookies = []
+        for cookie in cookies:
             if not isinstance(cookie, dict):
                 return False, "❌ Cookie com formato inválido (deve ser um objeto)", None
 
-            missing_fields = [f for f in required_fields if f not in cookie]
+            domain = cookie.get('domain', '')
+            if 'x.com' not in domain and '.twitter.com' not in domain:
+                continue
+
+            missing_fields = self.REQUIRED_FIELDS - cookie.keys()
             if missing_fields:
-                return False, f"❌ Cookie faltando campos obrigatórios: {', '.join(missing_fields)}", None
+                return False, f"❌ Cookie faltando campos obrigatórios: {', '.join(sorted(missing_fields))}", None
 
-        return True, f"✅ {len(x_cookies)} cookies válidos do X encontrados", x_cookies
+            x_cookies.append(cookie)
+
+        if len(x_cookies) == 0:
+            return False, "❌ Nenhum cookie do domínio x.com encontrado", None
 
-    def _is_x_cookie(self, cookie: Dict[str, Any]) -> bool:
-        """Verifica se um cookie pertence ao domínio x.com."""
-        domain = cookie.get('domain', '')
-        return 'x.com' in domain or '.twitter.com' in domain
+        return True, f"✅ {len(x_cookies)} cookies válidos do X encontrados", x_cookies
 
     def convert_to_playwright_format(self, cookies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
@@ -86,36 +127,34 @@ class CookieManager:
             Lista de cookies no formato Playwright
         """
         playwright_cookies = []
+        append = playwright_cookies.append
+        same_site_map = self.SAME_SITE_MAP
 
         for cookie in cookies:
+            get = cookie.get
             # Formato Playwright requer campos específicos
             pw_cookie = {
                 'name': cookie['name'],
                 'value': cookie['value'],
-                'domain': cookie.get('domain', '.x.com'),
-                'path': cookie.get('path', '/'),
+                'domain': get('domain', '.x.com'),
+                'path': get('path', '/'),
             }
 
-            # Campos opcionais
-            if 'expirationDate' in cookie:
-                # Converte timestamp para formato Playwright
-                pw_cookie['expires'] = int(cookie['expirationDate'])
-            elif 'expires' in cookie:
-                pw_cookie['expires'] = int(cookie['expires'])
+            # Campos opcionais (expirationDate tem precedência sobre expires)
+            expires = get('expirationDate', get('expires'))
+            if expires is not None:
+                pw_cookie['expires'] = int(expires)
 
-            if 'httpOnly' in cookie:
-                pw_cookie['httpOnly'] = cookie['httpOnly']
+            for field in ('httpOnly', 'secure'):
+                if field in cookie:
+                    pw_cookie[field] = cookie[field]
 
-            if 'secure' in cookie:
-                pw_cookie['secure'] = cookie['secure']
+            # Playwright aceita: 'Strict', 'Lax', 'None'
+            same_site = get('sameSite')
+            if isinstance(same_site, str):
+                pw_cookie['sameSite'] = same_site_map.get(same_site.lower(), same_site.capitalize())
 
-            if 'sameSite' in cookie:
-                # Playwright aceita: 'Strict', 'Lax', 'None'
-                same_site = cookie['sameSite']
-                if isinstance(same_site, str):
-                    pw_cookie['sameSite'] = same_site.capitalize()
-
-            playwright_cookies.append(pw_cookie)
+            append(pw_cookie)
 
         return playwright_cookies
 
@@ -138,8 +177,9 @@ class CookieManager:
             }
 
             # Salva no arquivo
-            with open(self.cookies_file, 'w', encoding='utf-8') as f:
-                json.dump(cookie_data, f, indent=2, ensure_ascii=False)
+            self._write_json(self.cookies_file, cookie_data, indent=2)
+
+            self.save_storage_state(cookies)
 
             logger.info(f"✅ {len(cookies)} cookies salvos em {self.cookies_file}")
             return True, f"✅ {len(cookies)} cookies salvos com sucesso"
@@ -160,10 +200,9 @@ class CookieManager:
             return None
 
         try:
-            with open(self.cookies_file, 'r', encoding='utf-8') as f:
-                cookie_data = json.load(f)
+            cookie_data = self._read_json(self.cookies_file)
 
-            cookies = cookie_data.get('cookies', [])
+            cookies = list(cookie_data.get('cookies', []))
             imported_at = cookie_data.get('imported_at', 'desconhecido')
 
             logger.info(f"✅ {len(cookies)} cookies carregados (importados em {imported_at})")
@@ -173,6 +212,81 @@ class CookieManager:
             logger.error(f"❌ Erro ao carregar cookies: {e}")
             return None
 
+    @staticmethod
+    def _to_storage_cookie(cookie: Dict[str, Any]) -> Dict[str, Any]:
+        """Completa um cookie Playwright com os campos exigidos pelo storage_state."""
+        same_site = cookie.get('sameSite', 'Lax')
+        if same_site not in ('Strict', 'Lax', 'None'):
+            # Cookie-Editor exporta "no_restriction"/"unspecified"
+            same_site = 'None' if str(same_site).lower() == 'no_restriction' else 'Lax'
+
+        return {
+            'name': cookie['name'],
+            'value': cookie['value'],
+            'domain': cookie.get('domain', '.x.com'),
+            'path': cookie.get('path', '/'),
+            'expires': cookie.get('expires', -1),
+            'httpOnly': cookie.get('httpOnly', False),
+            'secure': cookie.get('secure', False),
+            'sameSite': same_site,
+        }
+
+    def save_storage_state(self, cookies: List[Dict[str, Any]]) -> None:
+        """
+        Salva os cookies como storage_state.json ({cookies, origins}).
+
+        Args:
+            cookies: Lista de cookies no formato Playwright
+        """
+        state = {
+            'cookies': [self._to_storage_cookie(c) for c in cookies],
+            'origins': [],
+        }
+        # Arquivo só para o Playwright: sem indentação
+        self._write_json(self.storage_state_file, state)
+
+    def storage_state_path(self) -> Optional[str]:
+        """
+        Caminho do storage_state.json para usar em browser.new_context().
+
+        Cookies importados antes deste formato (só cookies.json) são
+        convertidos uma única vez aqui.
+
+        Returns:
+            Caminho do arquivo ou None se não houver cookies
+        """
+        if not self.has_cookies():
+            return None
+
+        if not self.storage_state_file.exists():
+            cookies = self.load_cookies()
+            if not cookies:
+                return None
+            try:
+                self.save_storage_state(cookies)
+            except Exception as e:
+                logger.error(f"❌ Erro ao converter cookies para storage_state: {e}")
+                return None
+
+        return str(self.storage_state_file)
+
+    def load_storage_state(self) -> Optional[Dict[str, Any]]:
+        """
+        Carrega o storage_state salvo.
+
+        Returns:
+            Dicionário {cookies, origins} ou None se não houver cookies
+        """
+        path = self.storage_state_path()
+        if not path:
+            return None
+
+        try:
+            return self._read_json(Path(path))
+        except Exception as e:
+            logger.error(f"❌ Erro ao carregar storage_state: {e}")
+            return None
+
     def has_cookies(self) -> bool:
         """Verifica se existem cookies salvos."""
         return self.cookies_file.exists() and self.cookies_file.stat().st_size > 0
@@ -193,15 +307,14 @@ class CookieManager:
             }
 
         try:
-            with open(self.cookies_file, 'r', encoding='utf-8') as f:
-                cookie_data = json.load(f)
+            cookie_data = self._read_json(self.cookies_file)
 
             return {
                 'exists': True,
                 'count': cookie_data.get('count', 0),
                 'imported_at': cookie_data.get('imported_at'),
                 'file_path': str(self.cookies_file),
-                'cookies': cookie_data.get('cookies', [])
+                'cookies': list(cookie_data.get('cookies', []))
             }
         except Exception as e:
             logger.error(f"❌ Erro ao obter informações dos cookies: {e}")
@@ -225,6 +338,7 @@ class CookieManager:
 
         try:
             self.cookies_file.unlink()
+            self.storage_state_file.unlink(missing_ok=True)
             logger.info("✅ Cookies removidos com sucesso")
             return True, "✅ Cookies removidos com sucesso"
         except Exception as e:
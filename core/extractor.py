@@ -1,10 +1,30 @@
 """Extrator de dados dos posts do X."""
 from __future__ import annotations
+import itertools
 import re
+import sys
 from datetime import datetime
-from typing import Optional, List
-from playwright.async_api import Page, Locator
-from core.models import Post, PostMetrics
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Optional, List
+from core.models import Post, PostMetrics, utc_now
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page, Locator
+
+# Identificador de lote para a extração incremental
+_batch_counter = itertools.count(1)
+
+# Regexes usadas a cada post, compiladas uma vez
+_POST_ID_RE = re.compile(r'/status/(\d+)')
+_VIEWS_ARIA_RE = re.compile(r'([\d,.\s]+[KMB]?)\s*views?', re.IGNORECASE)
+# fromisoformat aceita o sufixo "Z" a partir do Python 3.11
+_FROMISO_HANDLES_Z = sys.version_info >= (3, 11)
+
+# Hashtags e mentions numa única varredura do texto
+_TAG_RE = re.compile(r'[#@]\w+')
+
+# Sufixos das métricas abreviadas ("1.2K", "5M")
+_METRIC_MULTIPLIERS = {"K": 1_000, "M": 1_000_000, "B": 1_000_000_000}
 
 
 class PostExtractor:
@@ -15,47 +35,133 @@ class PostExtractor:
     ARTICLE_SELECTOR = 'article[data-testid="tweet"]'
     FALLBACK_ARTICLE = 'article'
     
+    # Atributo que marca articles já processados (extração incremental)
+    COLLECTED_ATTR = "data-xc"
+    
+    # Lê os campos brutos de um article no próprio browser (uma ida ao DOM por
+    # post em vez de um round-trip CDP por campo). O parsing fica no Python.
+    _READ_ARTICLE_JS = """
+    (article) => {
+        const q = (sel) => article.querySelector(sel);
+        const qa = (sel) => Array.from(article.querySelectorAll(sel));
+        const text = (el) => (el ? el.innerText : null);
+        const attr = (el, name) => (el ? el.getAttribute(name) : null);
+        
+        // Sem link /status/<id> (anúncios, placeholders) não há post: descarta
+        // antes de ler os demais campos
+        const statusHrefs = qa('a[href*="/status/"]').map((a) => a.getAttribute("href"));
+        if (!statusHrefs.some((href) => /\\/status\\/\\d/.test(href || ""))) return null;
+        
+        const userName = q('[data-testid="User-Name"]');
+        const groups = qa('[role="group"]');
+        const lastGroup = groups.length ? groups[groups.length - 1] : null;
+        const social = q('[data-testid="socialContext"]');
+        
+        // Links t.co, imagens e vídeos numa única busca, separados pela tag
+        const tcoLinks = [], images = [], posters = [];
+        for (const el of article.querySelectorAll('a[href*="t.co"], img[src*="pbs.twimg.com/media"], video')) {
+            if (el.tagName === "A") tcoLinks.push([el.getAttribute("href"), el.getAttribute("title")]);
+            else if (el.tagName === "IMG") images.push(el.getAttribute("src"));
+            else posters.push(el.getAttribute("poster"));
+        }
+        
+        return {
+            status_hrefs: statusHrefs,
+            author_name: userName ? text(userName.querySelector("span")) : null,
+            datetime: attr(q("time"), "datetime"),
+            text: text(q('[data-testid="tweetText"]')),
+            likes: text(q('[data-testid="like"]')),
+            reposts: text(q('[data-testid="retweet"]')),
+            replies: text(q('[data-testid="reply"]')),
+            group_analytics: lastGroup
+                ? Array.from(lastGroup.querySelectorAll("a"))
+                    .filter((a) => (a.getAttribute("href") || "").includes("/analytics"))
+                    .map((a) => a.innerText)
+                : [],
+            views_aria: attr(q('[aria-label*="view"], [aria-label*="View"]'), "aria-label"),
+            analytics: text(q('a[href*="/analytics"]')),
+            group_spans: qa('[role="group"] span').map((s) => s.innerText),
+            tco_links: tcoLinks,
+            images: images,
+            posters: posters,
+            social_context: social ? social.innerText : null,
+            replying_to: article.textContent.includes("Replying to")
+                && qa("div, span").some((el) => el.textContent.trim() === "Replying to"),
+            has_quote: q('[data-testid="quoteTweet"]') !== null,
+        };
+    }
+    """
+    
+    # Lê todos os articles da página de uma vez. Com batch, considera só os
+    # ainda não marcados (COLLECTED_ATTR) e os marca com o id do lote.
+    _READ_ARTICLES_JS = """
+    ([primary, fallback, attr, batch]) => {
+        const read = __READ_ARTICLE__;
+        let nodes = document.querySelectorAll(primary);
+        if (nodes.length === 0) nodes = document.querySelectorAll(fallback);
+        const out = [];
+        for (const el of nodes) {
+            if (batch !== null) {
+                if (el.hasAttribute(attr)) continue;
+                el.setAttribute(attr, batch);
+            }
+            try {
+                const raw = read(el);
+                if (raw) out.push(raw);
+            } catch (e) {
+                // article desmontado/inconsistente: ignora
+            }
+        }
+        return out;
+    }
+    """.replace("__READ_ARTICLE__", _READ_ARTICLE_JS.strip())
+    
     @staticmethod
+    @lru_cache(maxsize=4096)
     def parse_metric(text: str) -> Optional[int]:
         """
         Converte texto de métrica para número.
         Ex: "1.2K" -> 1200, "5M" -> 5000000
+        
+        Os mesmos textos curtos ("", "1", "2"...) se repetem em quase todos
+        os posts, por isso o resultado fica em cache.
         """
-        if not text or text.strip() == "":
+        if not text:
             return None
         
-        text = text.strip().upper().replace(",", "").replace(".", "")
+        text = text.strip()
+        if not text:
+            return None
+        
+        # Sufixo: uma olhada no último caractere em vez de procurar cada letra
+        mult = _METRIC_MULTIPLIERS.get(text[-1].upper())
+        if mult is None:
+            # Sem sufixo, "," e "." são separadores de milhar ("1,234" / "1.234")
+            number = text.replace(",", "").replace(".", "")
+        else:
+            # Com sufixo há casa decimal: "1.5K", ou "1,5K" no formato brasileiro
+            number = text[:-1].strip()
+            number = number.replace(",", "") if "." in number else number.replace(",", ".")
         
         try:
-            # Números simples
-            if text.isdigit():
-                return int(text)
-            
-            # Com sufixos
-            multipliers = {"K": 1000, "M": 1000000, "B": 1000000000}
-            for suffix, mult in multipliers.items():
-                if suffix in text:
-                    num = float(text.replace(suffix, ""))
-                    return int(num * mult)
-            
-            return int(float(text))
+            return round(float(number) * (mult or 1))
         except (ValueError, TypeError):
             return None
     
     @staticmethod
     def extract_post_id_from_url(url: str) -> Optional[str]:
         """Extrai o ID do post de uma URL."""
-        match = re.search(r'/status/(\d+)', url)
+        match = _POST_ID_RE.search(url)
         return match.group(1) if match else None
     
     @staticmethod
     def extract_handle_from_url(url: str) -> str:
-        """Extrai o handle do autor de uma URL de post."""
-        match = re.search(r'x\.com/([^/]+)/status/', url)
-        if match:
-            return match.group(1)
-        match = re.search(r'twitter\.com/([^/]+)/status/', url)
-        return match.group(1) if match else ""
+        """Extrai o handle do autor de uma URL de post (x.com/<handle>/status/...)."""
+        before, sep, _ = url.partition("/status/")
+        if not sep:
+            return ""
+        host, _, handle = before.rpartition("/")
+        return handle if host.endswith(("x.com", "twitter.com")) else ""
     
     @staticmethod
     async def extract_from_article(article: Locator) -> Optional[Post]:
@@ -68,15 +174,67 @@ class PostExtractor:
         Returns:
             Post extraído ou None se falhar
         """
+        try:
+            raw = await article.evaluate(PostExtractor._READ_ARTICLE_JS)
+        except Exception as e:
+            print(f"Erro ao extrair post: {e}")
+            return None
+        return PostExtractor.post_from_raw(raw)
+    
+    @staticmethod
+    def _find_views(raw: dict, likes: Optional[int]) -> Optional[int]:
+        """Views a partir dos campos brutos, com múltiplos métodos (em ordem)."""
+        # Método 1: link de analytics no grupo de métricas
+        for views_text in raw.get("group_analytics") or []:
+            parsed = PostExtractor.parse_metric(views_text)
+            if parsed and parsed > 0:
+                return parsed
+        
+        # Método 2: aria-label que contém "views"
+        aria = raw.get("views_aria")
+        if aria:
+            match = _VIEWS_ARIA_RE.search(aria)
+            if match:
+                val = PostExtractor.parse_metric(match.group(1).strip())
+                if val and val > 0:
+                    return val
+        
+        # Método 3: seletor direto de analytics
+        parsed = PostExtractor.parse_metric(raw.get("analytics") or "")
+        if parsed and parsed > 0:
+            return parsed
+        
+        # Método 4: span com número grande no grupo de métricas (geralmente é views)
+        current_likes = likes or 0
+        for span_text in reversed(raw.get("group_spans") or []):
+            parsed = PostExtractor.parse_metric(span_text)
+            # Se o número for significativamente maior que likes, provavelmente é views
+            if parsed and parsed > current_likes * 2 and parsed > 100:
+                return parsed
+        
+        return None
+    
+    @staticmethod
+    def post_from_raw(raw: dict, collected_at: Optional[datetime] = None) -> Optional[Post]:
+        """
+        Monta um Post a partir dos campos brutos lidos no browser.
+        
+        Args:
+            raw: Dicionário retornado por _READ_ARTICLE_JS
+            collected_at: Momento da leitura (padrão: agora)
+            
+        Returns:
+            Post extraído ou None se faltar o link do post
+        """
+        if not raw:
+            # _READ_ARTICLE_JS já descartou o article (sem link de status)
+            return None
         try:
             # 1. Encontrar link do post (identificador principal)
             post_url = None
             post_id = None
             
-            # Procurar links que contenham /status/
-            links = await article.locator('a[href*="/status/"]').all()
-            for link in links:
-                href = await link.get_attribute("href")
+            for href in raw.get("status_hrefs") or []:
                 if href and "/status/" in href:
                     # Normalizar URL
                     if href.startswith("/"):
@@ -95,218 +253,76 @@ class PostExtractor:
             # 2. Extrair handle do autor
             author_handle = PostExtractor.extract_handle_from_url(post_url)
             
-            # 3. Extrair nome do autor
-            author_name = ""
-            try:
-                # Tentar pelo data-testid primeiro
-                user_name_el = article.locator('[data-testid="User-Name"]').first
-                if await user_name_el.count() > 0:
-                    name_span = user_name_el.locator('span').first
-                    if await name_span.count() > 0:
-                        author_name = await name_span.inner_text()
-            except Exception:
-                pass
-            
-            # Fallback: usar o handle como nome
-            if not author_name:
-                author_name = f"@{author_handle}"
+            # 3. Extrair nome do autor (fallback: usar o handle como nome)
+            author_name = (raw.get("author_name") or f"@{author_handle}").strip()
             
             # 4. Extrair data/hora
             post_datetime = None
-            try:
-                time_el = article.locator('time').first
-                if await time_el.count() > 0:
-                    datetime_str = await time_el.get_attribute("datetime")
-                    if datetime_str:
-                        post_datetime = datetime.fromisoformat(datetime_str.replace("Z", "+00:00"))
-            except Exception:
-                pass
+            datetime_str = raw.get("datetime")
+            if datetime_str:
+                if not _FROMISO_HANDLES_Z:
+                    datetime_str = datetime_str.replace("Z", "+00:00")
+                try:
+                    post_datetime = datetime.fromisoformat(datetime_str)
+                except ValueError:
+                    pass
             
             # 5. Extrair texto do post
-            text = ""
-            try:
-                # Tentar pelo data-testid
-                text_el = article.locator('[data-testid="tweetText"]').first
-                if await text_el.count() > 0:
-                    text = await text_el.inner_text()
-            except Exception:
-                pass
+            text = (raw.get("text") or "").strip()
             
             # 6. Extrair métricas
-            metrics = PostMetrics()
-            try:
-                # Likes
-                like_el = article.locator('[data-testid="like"]').first
-                if await like_el.count() > 0:
-                    like_text = await like_el.inner_text()
-                    metrics.likes = PostExtractor.parse_metric(like_text)
-                
-                # Retweets/Reposts
-                retweet_el = article.locator('[data-testid="retweet"]').first
-                if await retweet_el.count() > 0:
-                    rt_text = await retweet_el.inner_text()
-                    metrics.reposts = PostExtractor.parse_metric(rt_text)
-                
-                # Replies
-                reply_el = article.locator('[data-testid="reply"]').first
-                if await reply_el.count() > 0:
-                    reply_text = await reply_el.inner_text()
-                    metrics.replies = PostExtractor.parse_metric(reply_text)
-                
-                # Views - abordagem robusta com múltiplos métodos
-                views_found = False
-                
-                # Método 1: Procurar link de analytics no grupo de métricas
-                if not views_found:
-                    try:
-                        metrics_group = article.locator('[role="group"]').last
-                        if await metrics_group.count() > 0:
-                            # Procurar todos os links no grupo
-                            all_links = await metrics_group.locator('a').all()
-                            for link in all_links:
-                                href = await link.get_attribute('href') or ''
-                                if '/analytics' in href:
-                                    views_text = await link.inner_text()
-                                    parsed = PostExtractor.parse_metric(views_text)
-                                    if parsed and parsed > 0:
-                                        metrics.views = parsed
-                                        views_found = True
-                                        break
-                    except:
-                        pass
-                
-                # Método 2: Procurar pelo aria-label que contém "views"
-                if not views_found:
-                    try:
-                        views_el = article.locator('[aria-label*="view"], [aria-label*="View"]').first
-                        if await views_el.count() > 0:
-                            aria = await views_el.get_attribute('aria-label')
-                            if aria:
-                                import re
-                                match = re.search(r'([\d,.\s]+[KMB]?)\s*views?', aria, re.IGNORECASE)
-                                if match:
-                                    val = PostExtractor.parse_metric(match.group(1).strip())
-                                    if val and val > 0:
-                                        metrics.views = val
-                                        views_found = True
-                    except:
-                        pass
-                
-                # Método 3: Seletor direto de analytics
-                if not views_found:
-                    try:
-                        analytics_el = article.locator('a[href*="/analytics"]').first
-                        if await analytics_el.count() > 0:
-                            views_text = await analytics_el.inner_text()
-                            parsed = PostExtractor.parse_metric(views_text)
-                            if parsed and parsed > 0:
-                                metrics.views = parsed
-                                views_found = True
-                    except:
-                        pass
-                
-                # Método 4: Procurar por span com número grande (geralmente é views)
-                if not views_found:
-                    try:
-                        # No X, views geralmente é o último número no grupo de métricas
-                        spans = await article.locator('[role="group"] span').all()
-                        for span in reversed(spans):  # Começar do final
-                            text = await span.inner_text()
-                            parsed = PostExtractor.parse_metric(text)
-                            # Views geralmente são maiores que likes
-                            if parsed and parsed > 0:
-                                current_likes = metrics.likes or 0
-                                # Se o número for significativamente maior que likes, provavelmente é views
-                                if parsed > current_likes * 2 and parsed > 100:
-                                    metrics.views = parsed
-                                    views_found = True
-                                    break
-                    except:
-                        pass
-                        
-            except Exception:
-                pass
-            
-            # 7. Extrair links externos
-            links_list = []
-            try:
-                card_links = await article.locator('a[href*="t.co"]').all()
-                for link in card_links:
-                    href = await link.get_attribute("href")
-                    # Tentar pegar a URL expandida do título
-                    title = await link.get_attribute("title")
-                    if title and title.startswith("http"):
-                        links_list.append(title)
-                    elif href and "t.co" in href:
-                        links_list.append(href)
-            except Exception:
-                pass
+            metrics = PostMetrics(
+                likes=PostExtractor.parse_metric(raw.get("likes")),
+                reposts=PostExtractor.parse_metric(raw.get("reposts")),
+                replies=PostExtractor.parse_metric(raw.get("replies")),
+            )
+            metrics.views = PostExtractor._find_views(raw, metrics.likes)
             
-            # 8. Extrair hashtags
-            hashtags = re.findall(r'#\w+', text)
+            # Listas sem duplicatas: dict.fromkeys faz uma única passada e
+            # mantém a ordem em que aparecem no post
+            # 7. Extrair links externos (preferindo a URL expandida do título)
+            links: dict[str, None] = {}
+            for href, title in raw.get("tco_links") or []:
+                if title and title.startswith("http"):
+                    links[title] = None
+                elif href and "t.co" in href:
+                    links[href] = None
             
-            # 9. Extrair mentions
-            mentions = re.findall(r'@\w+', text)
+            # 8/9. Extrair hashtags e mentions (uma passada para os dois)
+            hashtags: dict[str, None] = {}
+            mentions: dict[str, None] = {}
+            for tag in _TAG_RE.findall(text):
+                if tag[0] == "#":
+                    hashtags[tag] = None
+                else:
+                    mentions[tag] = None
             
-            # 10. Extrair URLs de mídia
-            media_urls = []
-            try:
-                # Imagens
-                images = await article.locator('img[src*="pbs.twimg.com/media"]').all()
-                for img in images:
-                    src = await img.get_attribute("src")
-                    if src:
-                        media_urls.append(src)
-                
-                # Vídeos (poster ou thumbnail)
-                videos = await article.locator('video').all()
-                for video in videos:
-                    poster = await video.get_attribute("poster")
-                    if poster:
-                        media_urls.append(poster)
-            except Exception:
-                pass
+            # 10. Extrair URLs de mídia (imagens e poster dos vídeos)
+            media_urls = dict.fromkeys(src for src in raw.get("images") or [] if src)
+            media_urls.update(dict.fromkeys(poster for poster in raw.get("posters") or [] if poster))
             
             # 11. Detectar tipo de post
-            is_repost = False
-            is_reply = False
-            is_quote = False
-            
-            try:
-                # Repost: tem indicador "Reposted" ou "retweeted"
-                repost_indicator = article.locator('[data-testid="socialContext"]')
-                if await repost_indicator.count() > 0:
-                    social_text = await repost_indicator.inner_text()
-                    if "repost" in social_text.lower() or "retweeted" in social_text.lower():
-                        is_repost = True
-                
-                # Reply: começa com "Replying to"
-                reply_indicator = article.locator('text="Replying to"')
-                if await reply_indicator.count() > 0:
-                    is_reply = True
-                
-                # Quote: tem outro tweet embutido
-                quote_container = article.locator('[data-testid="quoteTweet"]')
-                if await quote_container.count() > 0:
-                    is_quote = True
-            except Exception:
-                pass
+            social_text = (raw.get("social_context") or "").lower()
+            is_repost = "repost" in social_text or "retweeted" in social_text
+            is_reply = bool(raw.get("replying_to"))
+            is_quote = bool(raw.get("has_quote"))
             
             return Post(
                 post_id=post_id,
                 url=post_url,
                 datetime=post_datetime,
-                author_name=author_name.strip(),
+                author_name=author_name,
                 author_handle=author_handle,
-                text=text.strip(),
+                text=text,
                 metrics=metrics,
-                links=list(set(links_list)),
-                hashtags=list(set(hashtags)),
-                mentions=list(set(mentions)),
-                media_urls=list(set(media_urls)),
+                links=list(links),
+                hashtags=list(hashtags),
+                mentions=list(mentions),
+                media_urls=list(media_urls),
                 is_reply=is_reply,
                 is_repost=is_repost,
                 is_quote=is_quote,
+                collected_at=collected_at or utc_now(),
             )
         
         except Exception as e:
@@ -325,23 +341,82 @@ class PostExtractor:
         Returns:
             Lista de posts extraídos
         """
-        posts = []
-        seen_ids = set()
+        raws = await page.evaluate(
+            PostExtractor._READ_ARTICLES_JS,
+            [PostExtractor.ARTICLE_SELECTOR, PostExtractor.FALLBACK_ARTICLE, None, None],
+        )
+        return PostExtractor._posts_from_raws(raws)
+    
+    @staticmethod
+    async def extract_new_from_page(page: Page) -> list[Post]:
+        """
+        Extrai apenas os posts adicionados à página desde a última chamada.
+        
+        Os articles são marcados no DOM (atributo COLLECTED_ATTR) e lidos no
+        mesmo page.evaluate, então cada scroll custa uma única chamada ao
+        browser e processa só os posts novos.
+        
+        Args:
+            page: Página do Playwright
+            
+        Returns:
+            Lista de posts extraídos
+        """
+        raws = await page.evaluate(PostExtractor._READ_ARTICLES_JS, PostExtractor._new_batch_args())
+        return PostExtractor._posts_from_raws(raws)
+    
+    @staticmethod
+    async def extract_new_after(page: Page, action_js: str, action_arg: Any) -> tuple[Any, list[Post]]:
+        """
+        Executa uma ação na página e extrai os posts novos no mesmo evaluate.
         
-        # Tentar seletor principal
-        articles = await page.locator(PostExtractor.ARTICLE_SELECTOR).all()
+        A ação (ex.: o scroll do coletor) é uma função JS que pode retornar uma
+        Promise; os articles são lidos assim que ela termina, sem um segundo
+        round-trip ao browser.
         
-        # Fallback se não encontrar
-        if not articles:
-            articles = await page.locator(PostExtractor.FALLBACK_ARTICLE).all()
+        Args:
+            page: Página do Playwright
+            action_js: Função JS que recebe action_arg
+            action_arg: Argumento serializável da ação
+            
+        Returns:
+            Tupla (retorno da ação, posts extraídos)
+        """
+        action_result, raws = await page.evaluate(
+            _after_action_js(action_js),
+            [action_arg, PostExtractor._new_batch_args()],
+        )
+        return action_result, PostExtractor._posts_from_raws(raws)
+    
+    @staticmethod
+    def _new_batch_args() -> list:
+        """Argumentos de _READ_ARTICLES_JS para ler (e marcar) um novo lote."""
+        return [PostExtractor.ARTICLE_SELECTOR, PostExtractor.FALLBACK_ARTICLE,
+                PostExtractor.COLLECTED_ATTR, str(next(_batch_counter))]
+    
+    @staticmethod
+    def _posts_from_raws(raws: list[dict]) -> list[Post]:
+        """Monta posts a partir dos campos brutos, sem duplicatas."""
+        posts = []
+        seen_ids = set()
+        # Lote lido num único evaluate: um só timestamp em vez de um por post
+        collected_at = utc_now()
         
-        for article in articles:
-            try:
-                post = await PostExtractor.extract_from_article(article)
-                if post and post.post_id not in seen_ids:
-                    posts.append(post)
-                    seen_ids.add(post.post_id)
-            except Exception:
-                continue
+        for raw in raws or []:
+            post = PostExtractor.post_from_raw(raw, collected_at)
+            if post and post.post_id not in seen_ids:
+                posts.append(post)
+                seen_ids.add(post.post_id)
         
         return posts
+
+
+@lru_cache(maxsize=None)
+def _after_action_js(action_js: str) -> str:
+    """Compõe `action_js` com a leitura dos articles novos numa única função."""
+    return (
+        "async ([actionArg, readArgs]) => {\n"
+        f"    const result = await ({action_js.strip()})(actionArg);\n"
+        f"    return [result, ({PostExtractor._READ_ARTICLES_JS.strip()})(readArgs)];\n"
+        "}"
+    )
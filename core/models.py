@@ -4,14 +4,51 @@ from datetime import datetime as dt, timezone
 from enum import Enum
 from typing import Optional, List
 from pydantic import BaseModel, Field
+import re
 import uuid
 
+# Caracteres trocados por "_" ao usar o nome do job em nomes de arquivo
+_UNSAFE_FILENAME_RE = re.compile(r"[^\w-]")
+
 
 def utc_now() -> dt:
     """Retorna datetime atual em UTC."""
     return dt.now(timezone.utc)
 
 
+def metric_totals(posts) -> dict:
+    """
+    Soma curtidas, reposts, respostas e views dos posts numa única passada,
+    junto com a data do post mais antigo e do mais recente.
+    
+    Returns:
+        {"likes", "reposts", "replies", "views"} (zero para métricas ausentes)
+        e {"oldest", "newest"} (None se nenhum post tiver data)
+    """
+    likes = reposts = replies = views = 0
+    oldest = newest = None
+    for post in posts:
+        m = post.metrics
+        likes += m.likes or 0
+        reposts += m.reposts or 0
+        replies += m.replies or 0
+        views += m.views or 0
+        posted = post.datetime
+        if posted:
+            if oldest is None or posted < oldest:
+                oldest = posted
+            if newest is None or posted > newest:
+                newest = posted
+    return {
+        "likes": likes,
+        "reposts": reposts,
+        "replies": replies,
+        "views": views,
+        "oldest": oldest,
+        "newest": newest,
+    }
+
+
 class PostMetrics(BaseModel):
     """Métricas de engajamento de um post."""
     likes: Optional[int] = None
@@ -99,7 +136,13 @@ class Job(BaseModel):
     status: JobStatus = JobStatus.ACTIVE
     created_at: dt = Field(default_factory=utc_now)
     last_run: Optional[dt] = None
+    next_run_at: Optional[dt] = None  # Próxima execução (UTC), calculada pelo JobManager
     dry_run: bool = False
+    
+    @property
+    def safe_name(self) -> str:
+        """Nome do job utilizável em nomes de arquivo ("Coleta diária/X" -> "Coleta_diária_X")."""
+        return _UNSAFE_FILENAME_RE.sub("_", self.name)
 
 
 class RunStatus(str, Enum):
@@ -1,7 +1,8 @@
 """Construtor de URLs de busca do X."""
+from functools import lru_cache
 from typing import Optional, Dict
-from urllib.parse import urlencode, quote
-from datetime import datetime, timedelta
+from urllib.parse import quote, urlsplit
+from datetime import datetime, timedelta, timezone
 from core.models import CollectionParams, SearchType
 
 
@@ -25,62 +26,47 @@ class URLBuilder:
         Returns:
             URL completa de busca
         """
-        # Adicionar filtros à query se necessário
-        enhanced_query = URLBuilder._enhance_query(query, params)
-        
-        # Parâmetros da URL
-        url_params = {
-            "q": enhanced_query,
-            "src": "typed_query",
-        }
-        
-        # Tipo de busca (top ou latest)
-        if params.search_type == SearchType.LATEST:
-            url_params["f"] = "live"
-        # Para TOP, não precisa do parâmetro f
-        
-        return f"{URLBuilder.BASE_URL}?{urlencode(url_params, quote_via=quote)}"
+        # Só o filtro de período depende do relógio; o resto da URL é
+        # memoizado (jobs agendados repetem a mesma query a cada execução)
+        return _cached_search_url(
+            query,
+            params.language,
+            URLBuilder._since_filter(query, params),
+            params.include_replies,
+            params.include_reposts,
+            params.search_type,
+        )
     
     @staticmethod
-    def _enhance_query(query: str, params: CollectionParams) -> str:
-        """Adiciona filtros à query baseado nos parâmetros."""
-        parts = [query]
-        
-        # Filtro de idioma
-        if params.language:
-            parts.append(f"lang:{params.language}")
+    def _since_filter(query: str, params: CollectionParams) -> Optional[str]:
+        """Filtro since: derivado de max_minutes/max_days (None se não se aplica)."""
+        if "since:" in query.lower():
+            return None
         
         # Filtro de período em minutos (tem prioridade sobre max_days)
         if params.max_minutes:
-            since_time = datetime.utcnow() - timedelta(minutes=params.max_minutes)
+            since_time = datetime.now(timezone.utc) - timedelta(minutes=params.max_minutes)
             # Formato: YYYY-MM-DD_HH:mm:ss_UTC
-            since_str = since_time.strftime("%Y-%m-%d_%H:%M:%S") + "_UTC"
-            if "since:" not in query.lower():
-                parts.append(f"since:{since_str}")
+            return "since:" + since_time.strftime("%Y-%m-%d_%H:%M:%S") + "_UTC"
         # Filtro de data em dias (se não tiver minutos)
-        elif params.max_days:
-            since_date = (datetime.now() - timedelta(days=params.max_days)).strftime("%Y-%m-%d")
-            if "since:" not in query.lower():
-                parts.append(f"since:{since_date}")
-        
-        # Filtros de tipo de post
-        filters = []
-        if not params.include_replies:
-            filters.append("-filter:replies")
-        if not params.include_reposts:
-            filters.append("-filter:retweets")
-        # Quotes não têm filtro direto, serão filtrados na extração
-        
-        parts.extend(filters)
-        
-        return " ".join(parts)
+        if params.max_days:
+            return "since:" + (datetime.now() - timedelta(days=params.max_days)).strftime("%Y-%m-%d")
+        return None
+    
+    # Domínios do X (subdomínios como mobile.twitter.com também valem)
+    X_DOMAINS = ("x.com", "twitter.com")
     
     @staticmethod
     def is_valid_x_url(url: str) -> bool:
-        """Verifica se é uma URL válida do X."""
-        valid_domains = ["x.com", "twitter.com", "mobile.twitter.com", "mobile.x.com"]
-        url_lower = url.lower()
-        return any(domain in url_lower for domain in valid_domains)
+        """Verifica se é uma URL válida do X (pelo host, não pelo texto da URL)."""
+        if "://" not in url:
+            # Aceita URLs coladas sem esquema ("x.com/usuario")
+            url = f"https://{url}"
+        try:
+            host = urlsplit(url).hostname or ""
+        except ValueError:
+            return False
+        return any(host == d or host.endswith("." + d) for d in URLBuilder.X_DOMAINS)
     
     @staticmethod
     def normalize_url(url: str) -> str:
@@ -102,6 +88,52 @@ class URLBuilder:
         return None
 
 
+def _enhance_query(
+    query: str,
+    language: Optional[str],
+    since: Optional[str],
+    include_replies: bool,
+    include_reposts: bool,
+) -> str:
+    """Junta a query com idioma, período e filtros de tipo de post."""
+    parts = [query]
+    
+    # Filtro de idioma
+    if language:
+        parts.append(f"lang:{language}")
+    
+    if since:
+        parts.append(since)
+    
+    # Filtros de tipo de post
+    if not include_replies:
+        parts.append("-filter:replies")
+    if not include_reposts:
+        parts.append("-filter:retweets")
+    # Quotes não têm filtro direto, serão filtrados na extração
+    
+    return " ".join(parts)
+
+
+@lru_cache(maxsize=256)
+def _cached_search_url(
+    query: str,
+    language: Optional[str],
+    since: Optional[str],
+    include_replies: bool,
+    include_reposts: bool,
+    search_type: SearchType,
+) -> str:
+    """URL de busca para argumentos já resolvidos (hasheáveis, por isso em cache)."""
+    # Só a query precisa de escape; src e f são constantes já seguras na URL
+    q = quote(_enhance_query(query, language, since, include_replies, include_reposts), safe="")
+    
+    # Tipo de busca (top ou latest); para TOP, não precisa do parâmetro f
+    suffix = "&f=live" if search_type == SearchType.LATEST else ""
+    
+    return f"{URLBuilder.BASE_URL}?q={q}&src=typed_query{suffix}"
+
+
 def build_example_queries() -> Dict[str, str]:
     """Retorna exemplos de queries avançadas."""
     return {
@@ -4,6 +4,8 @@ from email_service.sender import (
     EmailSender,
     send_collection_email,
     send_collection_email_sync,
+    get_email_sender,
+    close_email_sender,
     test_email_config,
 )
 
@@ -12,5 +14,7 @@ __all__ = [
     "EmailSender",
     "send_collection_email",
     "send_collection_email_sync",
+    "get_email_sender",
+    "close_email_sender",
     "test_email_config",
 ]
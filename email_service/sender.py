@@ -2,32 +2,121 @@
 from __future__ import annotations
 import os
 import asyncio
+import base64
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime
+from html import escape
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.base import MIMEBase
-from email import encoders
+from email.mime.nonmultipart import MIMENonMultipart
+from email.charset import Charset, QP
 from pathlib import Path
-from typing import Optional, List, Union
+from functools import lru_cache
+from types import MappingProxyType
+from typing import AsyncIterator, Callable, Dict, Mapping, Optional, List, Union
 import aiosmtplib
 from dotenv import load_dotenv
+from core.models import metric_totals
 
 load_dotenv()
 
 
+# Bloco de leitura dos anexos: múltiplo de 57 bytes, então cada bloco vira
+# linhas base64 completas de 76 caracteres
+_ATTACHMENT_CHUNK = 57 * 1024
+
+
+def _encode_attachment(path: Path) -> str:
+    """
+    Codifica um arquivo em base64 (linhas de 76 caracteres) lendo em blocos.
+    
+    O arquivo nunca fica inteiro na memória ao lado da sua versão codificada.
+    """
+    chunks = []
+    with open(path, "rb") as f:
+        while block := f.read(_ATTACHMENT_CHUNK):
+            chunks.append(base64.encodebytes(block).decode("ascii"))
+    return "".join(chunks)
+
+
+# Exportações textuais: vão como texto (quoted-printable) em vez de base64
+_TEXT_ATTACHMENTS = {
+    ".csv": ("text", "csv"),
+    ".json": ("application", "json"),
+    ".txt": ("text", "plain"),
+    ".md": ("text", "markdown"),
+}
+
+# Bytes que o quoted-printable escapa (=XX, 3 bytes cada)
+_QP_ESCAPED = bytes(range(128, 256)) + b"="
+
+_UTF8_QP = Charset("utf-8")
+_UTF8_QP.body_encoding = QP
+
+
+def _make_attachment_part(path: Path) -> MIMEBase:
+    """
+    Monta a parte MIME de um anexo.
+    
+    CSV/JSON/texto em UTF-8 vão como texto quoted-printable (quase sem
+    aumento para conteúdo majoritariamente ASCII); os demais arquivos, ou
+    textos com muitos caracteres acentuados/emoji, vão em base64.
+    """
+    part = None
+    kind = _TEXT_ATTACHMENTS.get(path.suffix.lower())
+    if kind:
+        data = path.read_bytes()
+        # QP cresce 2 bytes por byte escapado; base64 cresce ~37% no total
+        escaped = len(data) - len(data.translate(None, _QP_ESCAPED))
+        if escaped * 2 < len(data) * 0.37:
+            try:
+                text = data.decode("utf-8")
+            except UnicodeDecodeError:
+                pass
+            else:
+                part = MIMENonMultipart(*kind)
+                part.set_payload(text, charset=_UTF8_QP)
+    
+    if part is None:
+        part = MIMEBase("application", "octet-stream")
+        part.set_payload(_encode_attachment(path))
+        part["Content-Transfer-Encoding"] = "base64"
+    
+    part.add_header("Content-Disposition", f"attachment; filename={path.name}")
+    return part
+
+
 class EmailConfig:
-    """Configurações de e-mail do .env."""
+    """
+    Configurações de e-mail do .env.
+    
+    Lidas e convertidas uma vez; use reload() se o ambiente mudar.
+    """
     
     @staticmethod
-    def get_config() -> dict:
-        return {
+    @lru_cache(maxsize=1)
+    def get_config() -> MappingProxyType:
+        return MappingProxyType({
             "host": os.getenv("SMTP_HOST", "smtp.gmail.com"),
             "port": int(os.getenv("SMTP_PORT", "587")),
             "user": os.getenv("SMTP_USER", ""),
             "password": os.getenv("SMTP_PASS", ""),
             "from_email": os.getenv("FROM_EMAIL", ""),
             "use_tls": os.getenv("SMTP_USE_TLS", "true").lower() == "true",
-        }
+            # Sessões SMTP simultâneas e mensagens por sessão antes de reconectar
+            "pool_size": int(os.getenv("SMTP_POOL_SIZE", "5")),
+            "max_per_conn": int(os.getenv("SMTP_MAX_PER_CONN", "100")),
+        })
+    
+    @staticmethod
+    def reload():
+        """Descarta a configuração em cache (relida no próximo get_config)."""
+        EmailConfig.get_config.cache_clear()
     
     @staticmethod
     def is_configured() -> bool:
@@ -35,11 +124,190 @@ class EmailConfig:
         return bool(config["user"] and config["password"] and config["from_email"])
 
 
+# Respostas SMTP de limitação de taxa/recursos do servidor (tentar mais tarde)
+THROTTLE_CODES = frozenset((421, 451, 452, 454))
+
+
+class AIMDController:
+    """
+    Limite de envios simultâneos com aumento aditivo / redução multiplicativa.
+    
+    Cada envio bem-sucedido sobe o limite em `increase` (até `max_concurrency`);
+    uma resposta de throttling do servidor o multiplica por `decrease` (até
+    `min_concurrency`), mantendo a vazão perto do teto real do provedor.
+    """
+    
+    def __init__(
+        self,
+        max_concurrency: int,
+        min_concurrency: int = 1,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.increase = increase
+        self.decrease = decrease
+        self.limit = float(self.max_concurrency)
+        self.in_flight = 0
+        # Latência dos últimos envios (para depuração)
+        self._latencies: deque[float] = deque(maxlen=50)
+        self._cond = asyncio.Condition()
+    
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        async with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+    
+    def success(self, latency: float):
+        self._latencies.append(latency)
+        self.limit = min(self.max_concurrency, self.limit + self.increase)
+    
+    def throttled(self):
+        self.limit = max(self.min_concurrency, self.limit * self.decrease)
+    
+    @property
+    def stats(self) -> dict:
+        """Concorrência atual e latência média recente (segundos)."""
+        latencies = self._latencies
+        return {
+            "concurrency": int(self.limit),
+            "in_flight": self.in_flight,
+            "avg_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+        }
+
+
+class SMTPConnectionPool:
+    """
+    Pool de sessões SMTP autenticadas.
+    
+    Até `size` envios simultâneos, cada um na sua sessão; sessões livres são
+    reaproveitadas (conexão, STARTTLS e login feitos uma vez) e recicladas
+    após `max_per_conn` mensagens, respeitando o limite por conexão dos
+    provedores. As sessões são abertas sob demanda, e a concorrência recua
+    quando o servidor responde com throttling (ver AIMDController).
+    """
+    
+    def __init__(self, config: Mapping, size: int = 5, max_per_conn: int = 100):
+        self.config = config
+        self.max_per_conn = max(1, max_per_conn)
+        # Sessões livres: (cliente, mensagens já enviadas por ele)
+        self._idle: list[tuple[aiosmtplib.SMTP, int]] = []
+        self.controller = AIMDController(size)
+    
+    async def _connect(self) -> aiosmtplib.SMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.config["host"],
+            port=self.config["port"],
+            username=self.config["user"],
+            password=self.config["password"],
+            start_tls=self.config["use_tls"],
+        )
+        # connect() também faz STARTTLS e login
+        await client.connect()
+        return client
+    
+    async def _take(self) -> tuple[aiosmtplib.SMTP, int]:
+        """Sessão livre que ainda responde ao servidor, ou uma nova."""
+        while self._idle:
+            client, sent = self._idle.pop()
+            if not client.is_connected:
+                continue
+            try:
+                await client.noop()
+                return client, sent
+            except aiosmtplib.SMTPException:
+                client.close()
+        return await self._connect(), 0
+    
+    @staticmethod
+    async def _discard(client: aiosmtplib.SMTP):
+        if not client.is_connected:
+            return
+        try:
+            await client.quit()
+        except aiosmtplib.SMTPException:
+            client.close()
+    
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[aiosmtplib.SMTP]:
+        """Empresta uma sessão para enviar uma mensagem."""
+        async with self.controller:
+            client, sent = await self._take()
+            started = time.monotonic()
+            try:
+                yield client
+            except BaseException as e:
+                if isinstance(e, aiosmtplib.SMTPResponseException) and e.code in THROTTLE_CODES:
+                    self.controller.throttled()
+                # Sessão em estado incerto: não volta para o pool
+                client.close()
+                raise
+            self.controller.success(time.monotonic() - started)
+            sent += 1
+            if sent < self.max_per_conn and client.is_connected:
+                self._idle.append((client, sent))
+            else:
+                await self._discard(client)
+    
+    async def close(self):
+        """Encerra (QUIT) as sessões livres."""
+        idle, self._idle = self._idle, []
+        for client, _ in idle:
+            await self._discard(client)
+
+
 class EmailSender:
-    """Envia e-mails com anexos."""
+    """
+    Envia e-mails com anexos.
+    
+    Os envios passam por um SMTPConnectionPool, que reaproveita sessões SMTP
+    abertas entre um e-mail e outro; feche com aclose().
+    """
+    
+    # Tentativas por mensagem e espera inicial após throttling (segundos)
+    SEND_ATTEMPTS = 3
+    THROTTLE_BACKOFF = 5.0
     
     def __init__(self):
         self.config = EmailConfig.get_config()
+        self._pool = SMTPConnectionPool(
+            self.config,
+            size=self.config["pool_size"],
+            max_per_conn=self.config["max_per_conn"],
+        )
+    
+    async def _deliver(self, msg: MIMEMultipart):
+        """
+        Envia por uma sessão do pool.
+        
+        Se a sessão caiu no meio, tenta de novo na hora; se o servidor pediu
+        para esperar (THROTTLE_CODES), tenta de novo após um backoff.
+        """
+        for attempt in range(self.SEND_ATTEMPTS):
+            last_attempt = attempt == self.SEND_ATTEMPTS - 1
+            try:
+                async with self._pool.acquire() as client:
+                    await client.send_message(msg)
+                return
+            except aiosmtplib.SMTPServerDisconnected:
+                if last_attempt:
+                    raise
+            except aiosmtplib.SMTPResponseException as e:
+                if e.code not in THROTTLE_CODES or last_attempt:
+                    raise
+                print(f"⏳ Servidor SMTP limitando envios ({e.code}); nova tentativa em breve")
+                await asyncio.sleep(self.THROTTLE_BACKOFF * 2 ** attempt)
+    
+    async def aclose(self):
+        """Encerra as sessões SMTP abertas."""
+        await self._pool.close()
     
     async def send(
         self,
@@ -86,27 +354,11 @@ class EmailSender:
                         print(f"⚠️ Arquivo não encontrado: {filepath}")
                         continue
                     
-                    # Ler arquivo
-                    with open(filepath, "rb") as f:
-                        part = MIMEBase("application", "octet-stream")
-                        part.set_payload(f.read())
-                    
-                    encoders.encode_base64(part)
-                    part.add_header(
-                        "Content-Disposition",
-                        f"attachment; filename={path.name}",
-                    )
-                    msg.attach(part)
+                    # Ler e codificar fora do event loop (que pode estar coletando)
+                    msg.attach(await asyncio.to_thread(_make_attachment_part, path))
             
             # Enviar
-            await aiosmtplib.send(
-                msg,
-                hostname=self.config["host"],
-                port=self.config["port"],
-                username=self.config["user"],
-                password=self.config["password"],
-                start_tls=self.config["use_tls"],
-            )
+            await self._deliver(msg)
             
             print(f"✅ E-mail enviado para: {', '.join(to)}")
             return True
@@ -114,6 +366,87 @@ class EmailSender:
         except Exception as e:
             print(f"❌ Erro ao enviar e-mail: {e}")
             return False
+    
+    async def send_batch(
+        self,
+        recipients: List[str],
+        build_msg: Callable[[str], MIMEMultipart],
+    ) -> Dict[str, bool]:
+        """
+        Envia uma mensagem individual para cada destinatário.
+        
+        Cada destinatário recebe o seu próprio e-mail (sem expor os demais no
+        To). A lista é dividida em até pool_size fatias enviadas em paralelo;
+        dentro de cada fatia os envios são sequenciais e reaproveitam a mesma
+        sessão do pool.
+        
+        Args:
+            recipients: Destinatários
+            build_msg: Monta a mensagem de um destinatário (From/To são
+                preenchidos se ausentes)
+            
+        Returns:
+            Dicionário destinatário -> True se enviado com sucesso
+        """
+        results = dict.fromkeys(recipients, False)
+        if not recipients:
+            return results
+        if not EmailConfig.is_configured():
+            print("⚠️ E-mail não configurado. Verifique as variáveis de ambiente.")
+            return results
+        
+        from_email = self.config["from_email"]
+        
+        async def send_slice(chunk: List[str]):
+            for recipient in chunk:
+                try:
+                    msg = build_msg(recipient)
+                    if "From" not in msg:
+                        msg["From"] = from_email
+                    if "To" not in msg:
+                        msg["To"] = recipient
+                    await self._deliver(msg)
+                    results[recipient] = True
+                except Exception as e:
+                    print(f"❌ Erro ao enviar e-mail para {recipient}: {e}")
+        
+        slices = max(1, min(self.config["pool_size"], len(recipients)))
+        size = -(-len(recipients) // slices)
+        await asyncio.gather(*(
+            send_slice(recipients[i:i + size])
+            for i in range(0, len(recipients), size)
+        ))
+        
+        sent = sum(results.values())
+        print(f"✅ {sent}/{len(results)} e-mails enviados")
+        return results
+
+
+# Um EmailSender por event loop (a sessão SMTP fica presa ao loop que a abriu)
+_shared_senders: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, EmailSender]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_email_sender() -> EmailSender:
+    """
+    Retorna o EmailSender compartilhado do event loop atual.
+    
+    Envios seguintes no mesmo loop (ex.: jobs do scheduler) reaproveitam a
+    sessão SMTP em vez de refazer conexão, TLS e login a cada e-mail.
+    """
+    loop = asyncio.get_running_loop()
+    sender = _shared_senders.get(loop)
+    if sender is None:
+        sender = _shared_senders[loop] = EmailSender()
+    return sender
+
+
+async def close_email_sender():
+    """Encerra a sessão SMTP compartilhada do event loop atual (se houver)."""
+    sender = _shared_senders.pop(asyncio.get_running_loop(), None)
+    if sender:
+        await sender.aclose()
 
 
 async def send_collection_email(
@@ -146,6 +479,14 @@ async def send_collection_email(
     Returns:
         True se enviado com sucesso
     """
+    # Nada a enviar: evita montar o corpo e gerar o relatório (pode chamar a OpenAI)
+    if not recipients:
+        print("⚠️ Nenhum destinatário informado; e-mail não enviado")
+        return False
+    if not EmailConfig.is_configured():
+        print("⚠️ E-mail não configurado. Verifique as variáveis de ambiente.")
+        return False
+    
     now = datetime.now()
     date_str = now.strftime("%d/%m/%Y às %H:%M")
     
@@ -178,12 +519,17 @@ async def send_collection_email(
             print(f"⚠️ Não foi possível gerar relatório diagnóstico: {e}")
     
     # Calcular métricas
-    total_likes = sum(p.metrics.likes or 0 for p in posts) if posts else 0
-    total_views = sum(p.metrics.views or 0 for p in posts) if posts else 0
-    total_reposts = sum(p.metrics.reposts or 0 for p in posts) if posts else 0
+    totals = metric_totals(posts or [])
+    total_likes = totals["likes"]
+    total_views = totals["views"]
+    total_reposts = totals["reposts"]
     
     subject = f"[X Collector] {_job_name} - {_posts_count} posts coletados"
     
+    # Valores digitados pelo usuário entram escapados no HTML
+    job_name_html = escape(_job_name)
+    query_html = escape(_query)
+    
     body = f"""
 Olá!
 
@@ -216,7 +562,7 @@ Gerado automaticamente
             <p style="margin: 10px 0 0 0; opacity: 0.9;">Relatório de Coleta Automática</p>
         </div>
         
-        <p>A coleta <strong>"{_job_name}"</strong> foi concluída com sucesso.</p>
+        <p>A coleta <strong>"{job_name_html}"</strong> foi concluída com sucesso.</p>
         
         <div style="background: #f5f8fa; padding: 20px; border-radius: 10px; margin: 20px 0;">
             <h3 style="margin-top: 0; color: #14171a;">📊 Resumo da Coleta</h3>
@@ -227,7 +573,7 @@ Gerado automaticamente
                 </tr>
                 <tr style="border-bottom: 1px solid #e1e8ed;">
                     <td style="padding: 8px 0;"><strong>Pesquisa:</strong></td>
-                    <td style="padding: 8px 0; word-break: break-all;">{_query}</td>
+                    <td style="padding: 8px 0; word-break: break-all;">{query_html}</td>
                 </tr>
                 <tr style="border-bottom: 1px solid #e1e8ed;">
                     <td style="padding: 8px 0;"><strong>Posts coletados:</strong></td>
@@ -262,7 +608,7 @@ Gerado automaticamente
     </html>
     """
     
-    sender = EmailSender()
+    sender = get_email_sender()
     return await sender.send(
         to=recipients,
         subject=subject,
@@ -274,23 +620,49 @@ Gerado automaticamente
 
 def send_collection_email_sync(
     recipients: List[str],
-    job_name: str = "Coleta",
+    job_name: str = None,
     query: str = "",
     posts_count: int = 0,
     attachments: List[str] = None,
     result = None,
+    query_or_url: str = "",
 ) -> bool:
-    """Versão síncrona do send_collection_email."""
-    return asyncio.run(
+    """
+    Versão síncrona do send_collection_email.
+    
+    Roda no loop de envios em thread própria (ver _get_sync_loop), então
+    pode ser chamada de qualquer thread, inclusive de uma que já tenha um
+    event loop rodando; bloqueia só a thread chamadora até o envio terminar.
+    """
+    future = asyncio.run_coroutine_threadsafe(
         send_collection_email(
             recipients=recipients,
+            result=result,
+            query_or_url=query_or_url,
+            attachments=attachments,
             job_name=job_name,
             query=query,
             posts_count=posts_count,
-            attachments=attachments,
-            result=result,
-        )
+        ),
+        _get_sync_loop(),
     )
+    return future.result()
+
+
+# Event loop dos envios síncronos: evita criar um loop por e-mail e mantém
+# as sessões SMTP do pool entre chamadas (revalidadas com NOOP ao reusar)
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """Retorna (iniciando se preciso) o loop dos envios síncronos, em thread própria."""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, daemon=True).start()
+        return _sync_loop
 
 
 def test_email_config() -> tuple:
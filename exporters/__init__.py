@@ -1,11 +1,12 @@
 """Módulo de exportação para diferentes formatos."""
-from exporters.docx_exporter import DocxExporter, export_to_docx
+from exporters.docx_exporter import DocxExporter, export_to_docx, export_to_docx_async
 from exporters.json_exporter import JsonExporter, export_to_json
 from exporters.csv_exporter import CsvExporter, export_to_csv
 
 __all__ = [
     "DocxExporter",
     "export_to_docx",
+    "export_to_docx_async",
     "JsonExporter",
     "export_to_json",
     "CsvExporter",
@@ -6,6 +6,9 @@ from datetime import datetime
 from pathlib import Path
 from core.models import Post, CollectionResult
 
+# Quebras de linha (LF e CR) viram espaço no texto do post
+_NEWLINES_TO_SPACE = str.maketrans({"\n": " ", "\r": " "})
+
 
 class CsvExporter:
     """Exporta posts para CSV."""
@@ -71,37 +74,42 @@ class CsvExporter:
         
         filepath = self.output_dir / filename
         
-        with open(filepath, "w", encoding="utf-8", newline="") as f:
+        # Buffer grande: a escrita é sequencial e pode ter milhares de linhas
+        with open(filepath, "w", encoding="utf-8", newline="", buffering=1024 * 1024) as f:
             writer = csv.writer(f, delimiter=delimiter)
             
             # Header
             writer.writerow(self.COLUMNS)
             
-            # Dados
-            for post in posts:
-                row = [
-                    post.post_id,
-                    post.url,
-                    post.datetime.isoformat() if post.datetime else "",
-                    post.author_name,
-                    post.author_handle,
-                    post.text.replace("\n", " "),  # Remover quebras de linha
-                    post.metrics.likes if post.metrics.likes is not None else "",
-                    post.metrics.reposts if post.metrics.reposts is not None else "",
-                    post.metrics.replies if post.metrics.replies is not None else "",
-                    post.metrics.views if post.metrics.views is not None else "",
-                    "|".join(post.hashtags),
-                    "|".join(post.mentions),
-                    "|".join(post.links),
-                    "|".join(post.media_urls),
-                    post.is_reply,
-                    post.is_repost,
-                    post.is_quote,
-                    post.collected_at.isoformat(),
-                ]
-                writer.writerow(row)
+            # Dados (writerows consome o generator direto no módulo csv)
+            writer.writerows(self._post_to_row(post) for post in posts)
         
         return str(filepath)
+    
+    @staticmethod
+    def _post_to_row(post: Post) -> tuple:
+        """Linha do CSV de um post, na ordem de COLUMNS."""
+        metrics = post.metrics
+        return (
+            post.post_id,
+            post.url,
+            post.datetime.isoformat() if post.datetime else "",
+            post.author_name,
+            post.author_handle,
+            post.text.translate(_NEWLINES_TO_SPACE),  # Remover quebras de linha
+            metrics.likes if metrics.likes is not None else "",
+            metrics.reposts if metrics.reposts is not None else "",
+            metrics.replies if metrics.replies is not None else "",
+            metrics.views if metrics.views is not None else "",
+            "|".join(post.hashtags),
+            "|".join(post.mentions),
+            "|".join(post.links),
+            "|".join(post.media_urls),
+            post.is_reply,
+            post.is_repost,
+            post.is_quote,
+            post.collected_at.isoformat(),
+        )
 
 
 def export_to_csv(
@@ -10,7 +10,70 @@ from docx.shared import Inches, Pt, RGBColor, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 from docx.enum.style import WD_STYLE_TYPE
 from docx.enum.table import WD_TABLE_ALIGNMENT
-from core.models import Post, CollectionResult, CollectionParams
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from core.models import Post, CollectionResult, CollectionParams, metric_totals
+
+
+# Separador de milhar no padrão pt_BR (1.234.567)
+_BR_THOUSANDS = str.maketrans({",": "."})
+
+# (ícone, atributo) das métricas exibidas por post
+_POST_METRICS = (
+    ("❤️", "likes"),
+    ("🔁", "reposts"),
+    ("💬", "replies"),
+    ("👁️", "views"),
+)
+
+
+def _fmt_int(n: int) -> str:
+    """Formata inteiro com separador de milhar pt_BR."""
+    return format(n, ",").translate(_BR_THOUSANDS)
+
+
+# OOXML dos parágrafos de posts (mesma marcação que add_paragraph/add_run geram)
+_SEPARATOR = "─" * 50
+_BOLD = "<w:rPr><w:b/></w:rPr>"
+_LINK = '<w:rPr><w:color w:val="1DA1F2"/><w:u w:val="single"/></w:rPr>'  # Azul Twitter
+# Separador entre posts: borda inferior no último parágrafo do post anterior
+_BOTTOM_BORDER = (
+    '<w:pPr><w:pBdr>'
+    '<w:bottom w:val="single" w:sz="6" w:space="6" w:color="auto"/>'
+    '</w:pBdr></w:pPr>'
+)
+
+# Escape XML; tab/quebra de linha viram <w:tab/>/<w:br/> como em Run.text;
+# caracteres de controle inválidos em XML são descartados
+_XML_TEXT = str.maketrans({
+    "&": "&amp;",
+    "<": "&lt;",
+    ">": "&gt;",
+    "\t": '</w:t><w:tab/><w:t xml:space="preserve">',
+    "\n": '</w:t><w:br/><w:t xml:space="preserve">',
+    "\r": '</w:t><w:br/><w:t xml:space="preserve">',
+    **{c: None for c in range(0x20) if chr(c) not in "\t\n\r"},
+})
+
+
+def _run(text: str, rpr: str = "") -> str:
+    return f'<w:r>{rpr}<w:t xml:space="preserve">{text.translate(_XML_TEXT)}</w:t></w:r>'
+
+
+def _para(*runs: str) -> str:
+    return f"<w:p>{''.join(runs)}</w:p>"
+
+
+def _table_rows(rows, widths: List[str]) -> list:
+    """Elementos w:tr de uma tabela: um run por célula, largura da coluna da grade."""
+    xml = "".join(
+        "<w:tr>" + "".join(
+            f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/></w:tcPr>{_para(cell)}</w:tc>'
+            for cell, width in zip(cells, widths)
+        ) + "</w:tr>"
+        for cells in rows
+    )
+    return list(parse_xml(f"<w:tbl {nsdecls('w')}>{xml}</w:tbl>"))
 
 
 class DocxExporter:
@@ -40,7 +103,8 @@ class DocxExporter:
             result: Resultado da coleta
             filename: Nome do arquivo (opcional)
             include_diagnostic: Se deve incluir relatório diagnóstico (padrão: False - apenas posts)
-            diagnostic_report: Relatório pré-gerado (opcional)
+            diagnostic_report: Relatório pré-gerado (necessário para incluir o
+                diagnóstico; para gerá-lo durante a exportação use export_async)
             
         Returns:
             Caminho do arquivo gerado
@@ -76,6 +140,35 @@ class DocxExporter:
         
         return str(filepath)
     
+    async def export_async(
+        self,
+        result: CollectionResult,
+        filename: str = None,
+        include_diagnostic: bool = False,
+        diagnostic_report = None,
+    ) -> str:
+        """
+        Versão assíncrona de export(), para uso dentro de um event loop.
+        
+        Gera o relatório diagnóstico no próprio loop (se pedido e não
+        fornecido) e monta/salva o documento numa thread.
+        
+        Returns:
+            Caminho do arquivo gerado
+        """
+        if include_diagnostic and not diagnostic_report and result.posts:
+            try:
+                from core.analyzer import generate_diagnostic_report
+                diagnostic_report = await generate_diagnostic_report(
+                    result.posts, result.query_or_url
+                )
+            except Exception as e:
+                print(f"⚠️ Não foi possível gerar relatório diagnóstico: {e}")
+        
+        return await asyncio.to_thread(
+            self.export, result, filename, include_diagnostic, diagnostic_report
+        )
+    
     def _setup_styles(self, doc: Document):
         """Configura estilos do documento."""
         # Título
@@ -137,41 +230,41 @@ class DocxExporter:
         doc.add_heading("📊 Resumo da Coleta", level=1)
         
         # Calcular métricas
-        total_likes = sum(p.metrics.likes or 0 for p in result.posts)
-        total_reposts = sum(p.metrics.reposts or 0 for p in result.posts)
-        total_replies = sum(p.metrics.replies or 0 for p in result.posts)
-        total_views = sum(p.metrics.views or 0 for p in result.posts)
-        
-        # Tabela de métricas
-        table = doc.add_table(rows=7, cols=2)
+        totals = metric_totals(result.posts)
+        total_likes = totals["likes"]
+        total_reposts = totals["reposts"]
+        total_replies = totals["replies"]
+        total_views = totals["views"]
+        
+        # Tabela de métricas (linhas montadas como OOXML, ver _table_rows)
+        table = doc.add_table(rows=0, cols=2)
         table.style = 'Table Grid'
         
         metrics_data = [
-            ("📝 Total de posts", f"{result.total_collected:,}".replace(",", ".")),
-            ("❤️ Total de curtidas", f"{total_likes:,}".replace(",", ".")),
-            ("🔁 Total de reposts", f"{total_reposts:,}".replace(",", ".")),
-            ("💬 Total de respostas", f"{total_replies:,}".replace(",", ".")),
-            ("👁️ Total de visualizações", f"{total_views:,}".replace(",", ".")),
+            ("📝 Total de posts", _fmt_int(result.total_collected)),
+            ("❤️ Total de curtidas", _fmt_int(total_likes)),
+            ("🔁 Total de reposts", _fmt_int(total_reposts)),
+            ("💬 Total de respostas", _fmt_int(total_replies)),
+            ("👁️ Total de visualizações", _fmt_int(total_views)),
             ("📈 Média de curtidas/post", f"{total_likes/max(result.total_collected,1):.1f}"),
             ("📊 Média de views/post", f"{total_views/max(result.total_collected,1):.1f}"),
         ]
         
-        for i, (label, value) in enumerate(metrics_data):
-            row = table.rows[i]
-            row.cells[0].text = label
-            row.cells[1].text = str(value)
-            # Negrito na primeira coluna
-            row.cells[0].paragraphs[0].runs[0].bold = True
+        # Negrito na primeira coluna
+        tbl = table._tbl
+        widths = [col.get(qn("w:w")) for col in tbl.tblGrid.gridCol_lst]
+        tbl.extend(_table_rows(
+            ((_run(label, _BOLD), _run(str(value))) for label, value in metrics_data),
+            widths,
+        ))
         
         doc.add_paragraph()
         
-        # Período da coleta
-        if result.posts:
-            dates = [p.datetime for p in result.posts if p.datetime]
-            if dates:
-                oldest = min(dates).strftime("%d/%m/%Y")
-                newest = max(dates).strftime("%d/%m/%Y")
-                doc.add_paragraph(f"📅 Período coberto: {oldest} a {newest}")
+        # Período da coleta (calculado na mesma passada das métricas)
+        if totals["oldest"]:
+            oldest = totals["oldest"].strftime("%d/%m/%Y")
+            newest = totals["newest"].strftime("%d/%m/%Y")
+            doc.add_paragraph(f"📅 Período coberto: {oldest} a {newest}")
         
         # Duração
         if result.finished_at:
@@ -197,21 +290,10 @@ class DocxExporter:
         doc.add_paragraph()
     
     def _add_diagnostic_report(self, doc: Document, result: CollectionResult, diagnostic_report = None):
-        """Adiciona relatório diagnóstico ao documento."""
-        # Gerar relatório se não fornecido
-        if not diagnostic_report and result.posts:
-            try:
-                from core.analyzer import ContentAnalyzer
-                analyzer = ContentAnalyzer()
-                # Versão síncrona básica
-                diagnostic_report = asyncio.run(
-                    analyzer.analyze_posts(result.posts, result.query_or_url)
-                )
-            except Exception as e:
-                print(f"⚠️ Não foi possível gerar relatório diagnóstico: {e}")
-                return
-        
+        """Adiciona relatório diagnóstico ao documento (gerado fora do exportador)."""
         if not diagnostic_report:
+            if result.posts:
+                print("⚠️ Relatório diagnóstico não fornecido; use export_async para gerá-lo")
             return
         
         # Título da seção
@@ -260,7 +342,7 @@ class DocxExporter:
                                   diagnostic_report.observacoes)
         
         doc.add_paragraph()
-        doc.add_paragraph("─" * 50)
+        doc.add_paragraph(_SEPARATOR)
         doc.add_paragraph()
     
     def _add_section(self, doc: Document, title: str, content: str):
@@ -283,89 +365,99 @@ class DocxExporter:
         doc.add_paragraph()
     
     def _add_posts(self, doc: Document, posts: List[Post]):
-        """Adiciona os posts ao documento."""
+        """
+        Adiciona os posts ao documento.
+        
+        Os parágrafos dos posts são montados como OOXML e inseridos de uma
+        vez: add_paragraph/add_run por post dominam o tempo em coletas grandes.
+        """
         doc.add_heading("📝 Posts Coletados", level=1)
         
+        paragraphs = []
         for i, post in enumerate(posts, 1):
-            # Separador entre posts
-            if i > 1:
-                doc.add_paragraph("─" * 50)
-            
-            # Número e autor
-            header = doc.add_paragraph()
-            header.add_run(f"#{i} ").bold = True
-            header.add_run(f"{post.author_name} ").bold = True
-            header.add_run(f"(@{post.author_handle})")
-            
-            # Data
-            if post.datetime:
-                date_str = post.datetime.strftime("%d/%m/%Y às %H:%M")
-                doc.add_paragraph(f"📅 {date_str}")
-            
-            # Texto do post
-            if post.text:
-                text_para = doc.add_paragraph()
-                text_para.add_run(post.text)
-            
-            # Métricas (incluindo views)
-            metrics = []
-            if post.metrics.likes is not None:
-                metrics.append(f"❤️ {post.metrics.likes:,}".replace(",", "."))
-            if post.metrics.reposts is not None:
-                metrics.append(f"🔁 {post.metrics.reposts:,}".replace(",", "."))
-            if post.metrics.replies is not None:
-                metrics.append(f"💬 {post.metrics.replies:,}".replace(",", "."))
-            if post.metrics.views is not None:
-                metrics.append(f"👁️ {post.metrics.views:,}".replace(",", "."))
-            
-            if metrics:
-                metrics_para = doc.add_paragraph()
-                metrics_para.add_run("📊 Engajamento: ").bold = True
-                metrics_para.add_run(" | ".join(metrics))
-            
-            # Link do post
-            link_para = doc.add_paragraph()
-            link_para.add_run("🔗 ").bold = True
-            self._add_hyperlink(link_para, post.url, post.url)
-            
-            # Hashtags
-            if post.hashtags:
-                doc.add_paragraph(f"#️⃣ {' '.join(post.hashtags)}")
-            
-            # Mentions
-            if post.mentions:
-                doc.add_paragraph(f"@ {' '.join(post.mentions)}")
-            
-            # Links externos
-            if post.links:
-                links_para = doc.add_paragraph()
-                links_para.add_run("🔗 Links externos: ").bold = True
-                for link in post.links[:3]:
-                    doc.add_paragraph(f"  • {link}")
-            
-            # Mídia
-            if post.media_urls:
-                media_para = doc.add_paragraph()
-                media_para.add_run("📷 Mídia: ").bold = True
-                media_para.add_run(f"{len(post.media_urls)} arquivo(s)")
-            
-            # Flags (tipo de post)
-            flags = []
-            if post.is_repost:
-                flags.append("🔁 Repost")
-            if post.is_reply:
-                flags.append("↩️ Resposta")
-            if post.is_quote:
-                flags.append("💬 Citação")
-            
-            if flags:
-                doc.add_paragraph(" | ".join(flags))
+            if paragraphs:
+                paragraphs[-1] = paragraphs[-1].replace("<w:p>", f"<w:p>{_BOTTOM_BORDER}", 1)
+            paragraphs.extend(self._post_paragraphs(i, post))
+        
+        body = doc.element.body
+        fragment = parse_xml(f"<w:body {nsdecls('w')}>{''.join(paragraphs)}</w:body>")
+        sect_pr = body.find(qn("w:sectPr"))
+        for element in list(fragment):
+            if sect_pr is not None:
+                sect_pr.addprevious(element)
+            else:
+                body.append(element)
     
-    def _add_hyperlink(self, paragraph, url: str, text: str):
-        """Adiciona hyperlink ao parágrafo."""
-        run = paragraph.add_run(text)
-        run.font.color.rgb = RGBColor(29, 161, 242)  # Azul Twitter
-        run.font.underline = True
+    @staticmethod
+    def _post_paragraphs(i: int, post: Post) -> List[str]:
+        """Gera os parágrafos (OOXML) de um post."""
+        paras = []
+        add = paras.append
+        
+        # Número e autor
+        add(_para(
+            _run(f"#{i} ", _BOLD),
+            _run(f"{post.author_name} ", _BOLD),
+            _run(f"(@{post.author_handle})"),
+        ))
+        
+        # Data
+        if post.datetime:
+            date_str = post.datetime.strftime("%d/%m/%Y às %H:%M")
+            add(_para(_run(f"📅 {date_str}")))
+        
+        # Texto do post
+        if post.text:
+            add(_para(_run(post.text)))
+        
+        # Métricas (incluindo views)
+        post_metrics = post.metrics
+        metrics = []
+        for icon, attr in _POST_METRICS:
+            value = getattr(post_metrics, attr)
+            if value is not None:
+                metrics.append(f"{icon} {_fmt_int(value)}")
+        
+        if metrics:
+            add(_para(_run("📊 Engajamento: ", _BOLD), _run(" | ".join(metrics))))
+        
+        # Link do post
+        add(_para(_run("🔗 ", _BOLD), _run(post.url, _LINK)))
+        
+        # Hashtags
+        if post.hashtags:
+            add(_para(_run(f"#️⃣ {' '.join(post.hashtags)}")))
+        
+        # Mentions
+        if post.mentions:
+            add(_para(_run(f"@ {' '.join(post.mentions)}")))
+        
+        # Links externos
+        if post.links:
+            add(_para(_run("🔗 Links externos: ", _BOLD)))
+            for link in post.links[:3]:
+                add(_para(_run(f"  • {link}")))
+        
+        # Mídia
+        if post.media_urls:
+            add(_para(
+                _run("📷 Mídia: ", _BOLD),
+                _run(f"{len(post.media_urls)} arquivo(s)"),
+            ))
+        
+        # Flags (tipo de post)
+        flags = []
+        if post.is_repost:
+            flags.append("🔁 Repost")
+        if post.is_reply:
+            flags.append("↩️ Resposta")
+        if post.is_quote:
+            flags.append("💬 Citação")
+        
+        if flags:
+            add(_para(_run(" | ".join(flags))))
+        
+        return paras
 
 
 def export_to_docx(
@@ -383,10 +475,29 @@ def export_to_docx(
         output_dir: Diretório de saída
         filename: Nome do arquivo
         include_diagnostic: Se deve incluir relatório diagnóstico (padrão: False)
-        diagnostic_report: Relatório pré-gerado (opcional)
+        diagnostic_report: Relatório pré-gerado (necessário para incluir o diagnóstico)
         
     Returns:
         Caminho do arquivo gerado
     """
     exporter = DocxExporter(output_dir)
     return exporter.export(result, filename, include_diagnostic, diagnostic_report)
+
+
+async def export_to_docx_async(
+    result: CollectionResult,
+    output_dir: str = None,
+    filename: str = None,
+    include_diagnostic: bool = False,
+    diagnostic_report = None,
+) -> str:
+    """
+    Função helper assíncrona para exportar para DOCX.
+    
+    Aguarda o analisador diretamente no loop atual em vez de criar um novo.
+    
+    Returns:
+        Caminho do arquivo gerado
+    """
+    exporter = DocxExporter(output_dir)
+    return await exporter.export_async(result, filename, include_diagnostic, diagnostic_report)
@@ -1,19 +1,77 @@
 """Exportador para JSON."""
 from __future__ import annotations
-import json
 import os
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import BinaryIO, List
+from pydantic_core import to_json
 from core.models import Post, CollectionResult
 
+# Indentação por padrão (EXPORTS_JSON_PRETTY=0 grava compacto, para consumo
+# por outros programas: ~metade dos bytes)
+PRETTY_BY_DEFAULT = os.getenv("EXPORTS_JSON_PRETTY", "1") != "0"
 
-class DateTimeEncoder(json.JSONEncoder):
-    """Encoder customizado para datetime."""
-    def default(self, obj: Any) -> Any:
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
+
+def _write_json(filepath: Path, posts: List[Post], pretty: bool, metadata: dict = None):
+    """
+    Grava os posts em JSON UTF-8, um post por vez.
+    
+    Sem `metadata` grava a lista de posts; com ela, o objeto
+    {"metadata": ..., "posts": [...]}. O serializador do pydantic-core
+    converte os modelos e datetimes direto para bytes, e só o JSON de um
+    post fica na memória de cada vez (a saída é a mesma de serializar tudo).
+    
+    Grava num arquivo temporário ao lado e o renomeia no fim: quem lê (ou
+    anexa ao e-mail) nunca vê um JSON pela metade.
+    """
+    if pretty is None:
+        pretty = PRETTY_BY_DEFAULT
+    indent = 2 if pretty else None
+    tmp_path = filepath.with_name(filepath.name + ".tmp")
+    try:
+        # Buffer grande: um write por post acumularia milhares de syscalls
+        with open(tmp_path, "wb", buffering=1024 * 1024) as f:
+            if metadata is not None:
+                head = to_json({"metadata": metadata}, indent=indent)
+                # Reabrir o objeto (sem o "}" final) para acrescentar "posts"
+                f.write(head[:-2] + b',\n  "posts": ' if pretty else head[:-1] + b',"posts":')
+                _write_posts(f, posts, pretty, level=1)
+                f.write(b"\n}" if pretty else b"}")
+            else:
+                _write_posts(f, posts, pretty, level=0)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _write_posts(f: BinaryIO, posts: List[Post], pretty: bool, level: int):
+    """Grava a lista JSON de posts em `f`, indentada no nível `level` se pretty."""
+    if not posts:
+        f.write(b"[]")
+        return
+    
+    write = f.write
+    if not pretty:
+        write(b"[")
+        for i, post in enumerate(posts):
+            if i:
+                write(b",")
+            write(to_json(post))
+        write(b"]")
+        return
+    
+    # No JSON as quebras de linha do texto vêm escapadas: todo b"\n" é indentação
+    close = b"\n" + b"  " * level
+    item = close + b"  "
+    write(b"[")
+    for i, post in enumerate(posts):
+        if i:
+            write(b",")
+        write(item)
+        write(to_json(post, indent=2).replace(b"\n", item))
+    write(close)
+    write(b"]")
 
 
 class JsonExporter:
@@ -27,7 +85,7 @@ class JsonExporter:
         self,
         result: CollectionResult,
         filename: str = None,
-        pretty: bool = True,
+        pretty: bool = None,
     ) -> str:
         """
         Exporta resultado da coleta para JSON.
@@ -35,23 +93,20 @@ class JsonExporter:
         Args:
             result: Resultado da coleta
             filename: Nome do arquivo (opcional)
-            pretty: Se True, formata com indentação
+            pretty: Se True, formata com indentação (padrão: PRETTY_BY_DEFAULT)
             
         Returns:
             Caminho do arquivo gerado
         """
-        # Converter para dict serializável
-        data = {
-            "metadata": {
-                "query_or_url": result.query_or_url,
-                "params": result.params.model_dump(),
-                "started_at": result.started_at,
-                "finished_at": result.finished_at,
-                "total_collected": result.total_collected,
-                "stop_reason": result.stop_reason,
-                "errors": result.errors,
-            },
-            "posts": [post.model_dump() for post in result.posts],
+        # Modelos entram direto: o serializador do pydantic-core os converte
+        metadata = {
+            "query_or_url": result.query_or_url,
+            "params": result.params,
+            "started_at": result.started_at,
+            "finished_at": result.finished_at,
+            "total_collected": result.total_collected,
+            "stop_reason": result.stop_reason,
+            "errors": result.errors,
         }
         
         # Gerar nome do arquivo
@@ -64,11 +119,7 @@ class JsonExporter:
         
         filepath = self.output_dir / filename
         
-        with open(filepath, "w", encoding="utf-8") as f:
-            if pretty:
-                json.dump(data, f, cls=DateTimeEncoder, indent=2, ensure_ascii=False)
-            else:
-                json.dump(data, f, cls=DateTimeEncoder, ensure_ascii=False)
+        _write_json(filepath, result.posts, pretty, metadata)
         
         return str(filepath)
     
@@ -76,11 +127,9 @@ class JsonExporter:
         self,
         posts: list[Post],
         filename: str = None,
-        pretty: bool = True,
+        pretty: bool = None,
     ) -> str:
         """Exporta apenas a lista de posts."""
-        data = [post.model_dump() for post in posts]
-        
         if not filename:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             filename = f"posts_x_{timestamp}.json"
@@ -90,11 +139,7 @@ class JsonExporter:
         
         filepath = self.output_dir / filename
         
-        with open(filepath, "w", encoding="utf-8") as f:
-            if pretty:
-                json.dump(data, f, cls=DateTimeEncoder, indent=2, ensure_ascii=False)
-            else:
-                json.dump(data, f, cls=DateTimeEncoder, ensure_ascii=False)
+        _write_json(filepath, posts, pretty)
         
         return str(filepath)
 
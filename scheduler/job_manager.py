@@ -1,15 +1,58 @@
 """Gerenciador de jobs agendados."""
 from __future__ import annotations
-from datetime import datetime, timezone
-from typing import Optional
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Callable, Mapping, Optional
 import pytz
-from core.models import Job, JobStatus, Schedule, ScheduleType, CollectionParams
+from apscheduler.triggers.cron import CronTrigger
+from core.models import Job, JobStatus, Schedule, ScheduleType, CollectionParams, utc_now
 from scheduler.persistence import get_db, DatabaseManager
 
 
-def utc_now() -> datetime:
-    """Retorna datetime atual em UTC."""
-    return datetime.now(timezone.utc)
+@lru_cache(maxsize=128)
+def _tz(name: str) -> pytz.BaseTzInfo:
+    """pytz.timezone com cache (chamado a cada verificação de jobs)."""
+    return pytz.timezone(name)
+
+
+@lru_cache(maxsize=128)
+def _cron_trigger(cron_expr: str, tz_name: str) -> Optional[CronTrigger]:
+    """
+    CronTrigger do APScheduler para a expressão (None se inválida).
+    
+    Mesma semântica do cron dos jobs: dia_semana 0=seg e dia/dia_semana
+    precisam casar juntos.
+    """
+    try:
+        return CronTrigger.from_crontab(cron_expr, timezone=_tz(tz_name))
+    except ValueError:
+        return None
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Datetimes sem timezone (como voltam do SQLite) são UTC."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+# Callbacks chamados quando jobs mudam (o runner reagenda a próxima verificação)
+_change_listeners: list[Callable[[], None]] = []
+
+
+def on_jobs_changed(callback: Callable[[], None]) -> None:
+    """Registra um callback chamado ao criar, alterar, pausar, retomar ou remover jobs."""
+    if callback not in _change_listeners:
+        _change_listeners.append(callback)
+
+
+def _notify_changed():
+    """Avisa os callbacks registrados; erros neles não afetam a operação no banco."""
+    for callback in _change_listeners:
+        try:
+            callback()
+        except Exception as e:
+            print(f"⚠️ Erro ao notificar mudança de jobs: {e}")
 
 
 class JobManager:
@@ -55,8 +98,10 @@ class JobManager:
             export_formats=export_formats or ["docx"],
             dry_run=dry_run,
         )
+        job.next_run_at = self._next_run_at(job, utc_now())
         
         self.db.save_job(job)
+        _notify_changed()
         return job
     
     def get_job(self, job_id: str) -> Optional[Job]:
@@ -71,11 +116,16 @@ class JobManager:
     
     def update_job(self, job: Job) -> None:
         """Atualiza um job existente."""
+        job.next_run_at = self._next_run_at(job, utc_now())
         self.db.save_job(job)
+        _notify_changed()
     
     def delete_job(self, job_id: str) -> bool:
         """Remove um job."""
-        return self.db.delete_job(job_id)
+        deleted = self.db.delete_job(job_id)
+        if deleted:
+            _notify_changed()
+        return deleted
     
     def pause_job(self, job_id: str) -> bool:
         """Pausa um job."""
@@ -84,6 +134,7 @@ class JobManager:
             return False
         
         self.db.update_job_status(job_id, JobStatus.PAUSED)
+        _notify_changed()
         return True
     
     def resume_job(self, job_id: str) -> bool:
@@ -93,6 +144,9 @@ class JobManager:
             return False
         
         self.db.update_job_status(job_id, JobStatus.ACTIVE)
+        # Execuções perdidas durante a pausa não são recuperadas
+        self.db.update_job_next_run(job_id, self._next_run_at(job, utc_now()))
+        _notify_changed()
         return True
     
     def mark_completed(self, job_id: str) -> None:
@@ -103,147 +157,101 @@ class JobManager:
         """Atualiza timestamp da última execução."""
         self.db.update_job_last_run(job_id, utc_now())
     
+    def get_next_run_at(self) -> Optional[datetime]:
+        """Próxima execução (UTC) entre os jobs ativos, ou None se não houver."""
+        next_run = self.db.get_next_run_at()
+        return _as_utc(next_run) if next_run else None
+    
     def get_due_jobs(self) -> list[Job]:
         """
         Retorna jobs que precisam ser executados.
         
         Verifica:
         - Jobs ativos
-        - Hora de execução chegou
+        - Próxima execução (next_run_at) já chegou
         """
         due_jobs = []
         now = utc_now()
         
-        for job in self.db.get_active_jobs():
-            if self._is_due(job, now):
+        for job in self.db.get_due_jobs(now):
+            if job.schedule.type == ScheduleType.ONCE and job.last_run is not None:
+                # Job único que já rodou (mesmo sem ter sido marcado concluído)
+                continue
+            
+            next_run = job.next_run_at
+            if next_run is None:
+                # Job salvo antes de existir next_run_at: calcular uma vez
+                next_run = self._next_run_at(job, now)
+                if next_run is None:
+                    continue
+                self.db.update_job_next_run(job.job_id, next_run)
+            
+            if _as_utc(next_run) <= now:
                 due_jobs.append(job)
         
         return due_jobs
     
-    def _is_due(self, job: Job, now: datetime) -> bool:
-        """Verifica se um job está devido para execução."""
-        schedule = job.schedule
+    def schedule_next_run(self, job: Job) -> None:
+        """
+        Avança next_run_at de um job recorrente para o próximo disparo após agora.
         
-        # Converter para timezone do job
-        tz = pytz.timezone(schedule.timezone)
-        now_tz = pytz.utc.localize(now).astimezone(tz)
+        Chamado ao despachar o job: uma execução longa ou com erro não o
+        deixa devido de novo a cada verificação. Jobs únicos continuam
+        devidos até rodarem com sucesso (last_run).
+        """
+        if job.schedule.type == ScheduleType.RECURRING:
+            # +1µs: o disparo de agora (se caiu exatamente no segundo) não conta
+            after = utc_now() + timedelta(microseconds=1)
+            self.db.update_job_next_run(job.job_id, self._next_run_at(job, after))
+    
+    @staticmethod
+    def _next_run_at(job: Job, after: datetime) -> Optional[datetime]:
+        """Próxima execução do job a partir de `after` (UTC), ou None se não houver."""
+        schedule = job.schedule
+        tz = _tz(schedule.timezone)
         
         if schedule.type == ScheduleType.ONCE:
-            # Execução única
-            if schedule.run_at:
-                run_at_tz = schedule.run_at
-                if run_at_tz.tzinfo is None:
-                    run_at_tz = tz.localize(run_at_tz)
-                
-                # Devido se já passou a hora e nunca executou
-                if now_tz >= run_at_tz and job.last_run is None:
-                    return True
+            # Execução única: na hora marcada, se nunca executou
+            if schedule.run_at and job.last_run is None:
+                run_at = schedule.run_at
+                if run_at.tzinfo is None:
+                    run_at = tz.localize(run_at)
+                return run_at.astimezone(timezone.utc)
         
         elif schedule.type == ScheduleType.RECURRING:
             # Execução recorrente (cron)
             if schedule.cron:
-                return self._check_cron(schedule.cron, now_tz, job.last_run, tz)
+                trigger = _cron_trigger(schedule.cron, schedule.timezone)
+                if trigger:
+                    next_fire = trigger.get_next_fire_time(None, _as_utc(after))
+                    if next_fire:
+                        return next_fire.astimezone(timezone.utc)
         
-        return False
-    
-    def _check_cron(
-        self,
-        cron_expr: str,
-        now: datetime,
-        last_run: Optional[datetime],
-        tz: pytz.BaseTzInfo,
-    ) -> bool:
-        """
-        Verifica se o cron deve executar.
-        
-        Simplificação: suporta formatos básicos como:
-        - "0 7 * * *" (diário às 7h)
-        - "0 7 * * 1,3,5" (seg/qua/sex às 7h)
-        - "*/2 * * * *" (a cada 2 minutos - para teste)
-        """
-        try:
-            parts = cron_expr.split()
-            if len(parts) != 5:
-                return False
-            
-            minute, hour, day, month, weekday = parts
-            
-            # Verificar minuto
-            if not self._matches_cron_field(minute, now.minute):
-                return False
-            
-            # Verificar hora
-            if not self._matches_cron_field(hour, now.hour):
-                return False
-            
-            # Verificar dia do mês
-            if not self._matches_cron_field(day, now.day):
-                return False
-            
-            # Verificar mês
-            if not self._matches_cron_field(month, now.month):
-                return False
-            
-            # Verificar dia da semana (0=seg, 6=dom)
-            # Python: weekday() = 0-6 (seg-dom)
-            if not self._matches_cron_field(weekday, now.weekday()):
-                return False
-            
-            # Verificar se já executou neste período
-            if last_run:
-                last_run_tz = last_run
-                if last_run_tz.tzinfo is None:
-                    last_run_tz = pytz.utc.localize(last_run_tz).astimezone(tz)
-                
-                # Se executou no mesmo minuto, não executa novamente
-                if (
-                    last_run_tz.year == now.year
-                    and last_run_tz.month == now.month
-                    and last_run_tz.day == now.day
-                    and last_run_tz.hour == now.hour
-                    and last_run_tz.minute == now.minute
-                ):
-                    return False
-            
-            return True
-        
-        except Exception:
-            return False
-    
-    def _matches_cron_field(self, field: str, value: int) -> bool:
-        """Verifica se um valor casa com um campo cron."""
-        if field == "*":
-            return True
-        
-        # Intervalo (*/N)
-        if field.startswith("*/"):
-            try:
-                interval = int(field[2:])
-                return value % interval == 0
-            except ValueError:
-                return False
-        
-        # Lista (1,3,5)
-        if "," in field:
-            try:
-                values = [int(v) for v in field.split(",")]
-                return value in values
-            except ValueError:
-                return False
-        
-        # Range (1-5)
-        if "-" in field:
-            try:
-                start, end = map(int, field.split("-"))
-                return start <= value <= end
-            except ValueError:
-                return False
-        
-        # Valor exato
-        try:
-            return value == int(field)
-        except ValueError:
-            return False
+        return None
+
+
+# (rótulo, mínimo, máximo) de cada campo, na ordem da expressão
+_CRON_FIELDS = (
+    ("minuto (0-59)", 0, 59),
+    ("hora (0-23)", 0, 23),
+    ("dia (1-31)", 1, 31),
+    ("mês (1-12)", 1, 12),
+    ("dia_semana (0-6)", 0, 6),
+)
+
+# Sintaxe aceita por campo: *, */N ou lista de valores/ranges (1,3-5,7)
+_FIELD_RE = re.compile(r"^(?:\*|\*/\d+|\d+(?:-\d+)?(?:,\d+(?:-\d+)?)*)$")
+_ITEM_RE = re.compile(r"(\d+)(?:-(\d+))?")
+
+_CRON_EXAMPLES = MappingProxyType({
+    "Diário às 7h": "0 7 * * *",
+    "Diário às 19h": "0 19 * * *",
+    "Seg/Qua/Sex às 8h": "0 8 * * 1,3,5",
+    "A cada 2 horas": "0 */2 * * *",
+    "A cada 30 min": "*/30 * * * *",
+    "Sábados às 10h": "0 10 * * 6",
+    "Primeira segunda do mês às 9h": "0 9 1-7 * 1",
+})
 
 
 def validate_cron(cron_expr: str) -> tuple[bool, str]:
@@ -257,53 +265,29 @@ def validate_cron(cron_expr: str) -> tuple[bool, str]:
     if len(parts) != 5:
         return False, "Expressão cron deve ter 5 campos: minuto hora dia mês dia_semana"
     
-    fields = ["minuto (0-59)", "hora (0-23)", "dia (1-31)", "mês (1-12)", "dia_semana (0-6)"]
-    
-    for i, (part, field) in enumerate(zip(parts, fields)):
+    for part, (field, low, high) in zip(parts, _CRON_FIELDS):
+        if not _FIELD_RE.match(part):
+            return False, f"Campo {field}: valor inválido '{part}'"
+        
         if part == "*":
             continue
         
         if part.startswith("*/"):
-            try:
-                int(part[2:])
-                continue
-            except ValueError:
+            if not 1 <= int(part[2:]) <= high:
                 return False, f"Campo {field}: intervalo inválido '{part}'"
+            continue
         
-        if "," in part:
-            try:
-                [int(v) for v in part.split(",")]
-                continue
-            except ValueError:
-                return False, f"Campo {field}: lista inválida '{part}'"
-        
-        if "-" in part:
-            try:
-                parts_range = part.split("-")
-                if len(parts_range) != 2:
-                    return False, f"Campo {field}: range inválido '{part}'"
-                int(parts_range[0])
-                int(parts_range[1])
-                continue
-            except ValueError:
+        for item in _ITEM_RE.finditer(part):
+            start = int(item.group(1))
+            end = int(item.group(2)) if item.group(2) else start
+            if start > end:
                 return False, f"Campo {field}: range inválido '{part}'"
-        
-        try:
-            int(part)
-        except ValueError:
-            return False, f"Campo {field}: valor inválido '{part}'"
+            if start < low or end > high:
+                return False, f"Campo {field}: valor fora do intervalo '{part}'"
     
     return True, "Válido"
 
 
-def cron_examples() -> dict[str, str]:
-    """Retorna exemplos de expressões cron."""
-    return {
-        "Diário às 7h": "0 7 * * *",
-        "Diário às 19h": "0 19 * * *",
-        "Seg/Qua/Sex às 8h": "0 8 * * 1,3,5",
-        "A cada 2 horas": "0 */2 * * *",
-        "A cada 30 min": "*/30 * * * *",
-        "Sábados às 10h": "0 10 * * 6",
-        "Primeira segunda do mês às 9h": "0 9 1-7 * 1",
-    }
+def cron_examples() -> Mapping[str, str]:
+    """Retorna exemplos de expressões cron (somente leitura)."""
+    return _CRON_EXAMPLES
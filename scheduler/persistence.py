@@ -2,12 +2,16 @@
 from __future__ import annotations
 import json
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
-from sqlalchemy import create_engine, Column, String, DateTime, Text, Boolean
-from sqlalchemy.orm import sessionmaker, declarative_base
-from core.models import Job, JobStatus, RunHistory, RunStatus
+from sqlalchemy import (
+    create_engine, event, func, inspect, or_, text, bindparam, select, update, delete,
+    Column, String, DateTime, Text, Boolean, Index, Integer,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import declarative_base
+from core.models import CollectionParams, Job, JobStatus, RunHistory, RunStatus, Schedule
 
 Base = declarative_base()
 
@@ -27,7 +31,11 @@ class JobModel(Base):
     status = Column(String, default="active")
     created_at = Column(DateTime)
     last_run = Column(DateTime, nullable=True)
+    next_run_at = Column(DateTime, nullable=True)
     dry_run = Column(Boolean, default=False)
+    
+    # Busca de jobs devidos a cada verificação do scheduler
+    __table_args__ = (Index("ix_jobs_status_next", "status", "next_run_at"),)
 
 
 class RunHistoryModel(Base):
@@ -40,15 +48,60 @@ class RunHistoryModel(Base):
     started_at = Column(DateTime)
     finished_at = Column(DateTime, nullable=True)
     status = Column(String)
-    posts_collected = Column(String, default="0")
+    posts_collected = Column(Integer, default=0)
     export_files_json = Column(Text)
     email_sent = Column(Boolean, default=False)
     error_message = Column(Text, nullable=True)
     logs_json = Column(Text)
 
 
+_jobs = JobModel.__table__
+_runs = RunHistoryModel.__table__
+
+
+def _upsert(table):
+    """INSERT ... ON CONFLICT DO UPDATE de todas as colunas pela chave primária."""
+    stmt = sqlite_insert(table)
+    key = [col.name for col in table.primary_key]
+    return stmt.on_conflict_do_update(
+        index_elements=key,
+        set_={col.name: stmt.excluded[col.name] for col in table.c if col.name not in key},
+    )
+
+
+# Instruções montadas uma vez (o SQLAlchemy reaproveita a compilação)
+_UPSERT_JOB = _upsert(_jobs)
+_SELECT_JOB = select(_jobs).where(_jobs.c.job_id == bindparam("job_id"))
+_SELECT_ALL_JOBS = select(_jobs)
+_SELECT_ACTIVE_JOBS = select(_jobs).where(_jobs.c.status == "active")
+_SELECT_DUE_JOBS = select(_jobs).where(
+    _jobs.c.status == "active",
+    or_(_jobs.c.next_run_at <= bindparam("now"), _jobs.c.next_run_at.is_(None)),
+).order_by(_jobs.c.next_run_at)  # Mais atrasados primeiro (NULL, a preencher, antes)
+_DELETE_JOB = delete(_jobs).where(_jobs.c.job_id == bindparam("job_id"))
+# Colunas do SET vêm dos parâmetros ("b_job_id": o nome da coluna é reservado no UPDATE)
+_UPDATE_JOB = update(_jobs).where(_jobs.c.job_id == bindparam("b_job_id"))
+_UPSERT_RUN = _upsert(_runs)
+_SELECT_RUN = select(_runs).where(_runs.c.run_id == bindparam("run_id"))
+_SELECT_RUNS_BY_JOB = (
+    select(_runs)
+    .where(_runs.c.job_id == bindparam("job_id"))
+    .order_by(_runs.c.started_at.desc())
+    .limit(bindparam("limit"))
+)
+_SELECT_ALL_RUNS = select(_runs).order_by(_runs.c.started_at.desc()).limit(bindparam("limit"))
+_SELECT_NEXT_RUN_AT = select(func.min(_jobs.c.next_run_at)).where(_jobs.c.status == "active")
+_COUNT_JOBS = select(func.count()).select_from(_jobs)
+_COUNT_RUNS = select(func.count()).select_from(_runs)
+
+
 class DatabaseManager:
-    """Gerenciador de banco de dados SQLite."""
+    """
+    Gerenciador de banco de dados SQLite.
+    
+    Cada operação é uma única instrução (Core) numa conexão do engine, sem
+    Session/identity map: o scheduler faz várias destas a cada verificação.
+    """
     
     def __init__(self, db_path: str = None):
         if not db_path:
@@ -58,96 +111,134 @@ class DatabaseManager:
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
         
         self.engine = create_engine(f"sqlite:///{db_path}")
+        event.listen(self.engine, "connect", self._set_sqlite_pragmas)
         # checkfirst=True evita erro se tabelas já existem
         Base.metadata.create_all(self.engine, checkfirst=True)
-        self.Session = sessionmaker(bind=self.engine)
+        self._migrate()
+    
+    @staticmethod
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """
+        WAL: leituras da interface não bloqueiam as escritas do scheduler (e
+        vice-versa). synchronous=NORMAL é seguro com WAL e dispensa o fsync
+        a cada commit (só no checkpoint).
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.close()
+    
+    def _migrate(self):
+        """Atualiza bancos antigos (create_all não altera tabelas existentes)."""
+        inspector = inspect(self.engine)
+        
+        existing = {col["name"] for col in inspector.get_columns("jobs")}
+        if "next_run_at" not in existing:
+            with self.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE jobs ADD COLUMN next_run_at DATETIME"))
+        for index in JobModel.__table__.indexes:
+            index.create(self.engine, checkfirst=True)
+        
+        # posts_collected era texto: o SQLite não muda o tipo de uma coluna,
+        # então a tabela é recriada convertendo os valores
+        run_types = {col["name"]: col["type"] for col in inspector.get_columns("run_history")}
+        if not isinstance(run_types["posts_collected"], Integer):
+            columns = [col.name for col in _runs.c]
+            values = ", ".join(
+                "CAST(posts_collected AS INTEGER)" if name == "posts_collected" else name
+                for name in columns
+            )
+            with self.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE run_history RENAME TO run_history_old"))
+                _runs.create(conn)
+                conn.execute(text(
+                    f"INSERT INTO run_history ({', '.join(columns)}) "
+                    f"SELECT {values} FROM run_history_old"
+                ))
+                conn.execute(text("DROP TABLE run_history_old"))
+    
+    def _execute(self, stmt, params: dict = None):
+        """Executa uma instrução de escrita numa transação própria."""
+        with self.engine.begin() as conn:
+            return conn.execute(stmt, params or {})
+    
+    def _fetch(self, stmt, params: dict = None) -> list:
+        """Executa uma consulta e retorna as linhas."""
+        with self.engine.connect() as conn:
+            return conn.execute(stmt, params or {}).all()
     
     # === JOBS ===
     
     def save_job(self, job: Job) -> None:
         """Salva ou atualiza um job."""
-        session = self.Session()
-        try:
-            job_model = JobModel(
-                job_id=job.job_id,
-                name=job.name,
-                query_or_url=job.query_or_url,
-                is_url=job.is_url,
-                params_json=job.params.model_dump_json(),
-                schedule_json=job.schedule.model_dump_json(),
-                email_recipients_json=json.dumps(job.email_recipients),
-                export_formats_json=json.dumps(job.export_formats),
-                status=job.status.value,
-                created_at=job.created_at,
-                last_run=job.last_run,
-                dry_run=job.dry_run,
-            )
-            session.merge(job_model)
-            session.commit()
-        finally:
-            session.close()
+        self._execute(_UPSERT_JOB, {
+            "job_id": job.job_id,
+            "name": job.name,
+            "query_or_url": job.query_or_url,
+            "is_url": job.is_url,
+            "params_json": job.params.model_dump_json(),
+            "schedule_json": job.schedule.model_dump_json(),
+            "email_recipients_json": json.dumps(job.email_recipients),
+            "export_formats_json": json.dumps(job.export_formats),
+            "status": job.status.value,
+            "created_at": job.created_at,
+            "last_run": job.last_run,
+            "next_run_at": job.next_run_at,
+            "dry_run": job.dry_run,
+        })
     
     def get_job(self, job_id: str) -> Optional[Job]:
         """Busca um job por ID."""
-        session = self.Session()
-        try:
-            job_model = session.query(JobModel).filter_by(job_id=job_id).first()
-            if not job_model:
-                return None
-            return self._job_from_model(job_model)
-        finally:
-            session.close()
+        rows = self._fetch(_SELECT_JOB, {"job_id": job_id})
+        if not rows:
+            return None
+        return self._job_from_model(rows[0])
     
     def get_all_jobs(self) -> list[Job]:
         """Retorna todos os jobs."""
-        session = self.Session()
-        try:
-            job_models = session.query(JobModel).all()
-            return [self._job_from_model(jm) for jm in job_models]
-        finally:
-            session.close()
+        return [self._job_from_model(row) for row in self._fetch(_SELECT_ALL_JOBS)]
+    
+    def count_jobs(self) -> int:
+        """Total de jobs cadastrados (sem carregá-los)."""
+        return self._fetch(_COUNT_JOBS)[0][0]
     
     def get_active_jobs(self) -> list[Job]:
         """Retorna jobs ativos."""
-        session = self.Session()
-        try:
-            job_models = session.query(JobModel).filter_by(status="active").all()
-            return [self._job_from_model(jm) for jm in job_models]
-        finally:
-            session.close()
+        return [self._job_from_model(row) for row in self._fetch(_SELECT_ACTIVE_JOBS)]
+    
+    def get_due_jobs(self, now: datetime) -> list[Job]:
+        """
+        Retorna jobs ativos com next_run_at <= now (pelo índice status/next_run_at).
+        
+        Inclui jobs ativos ainda sem next_run_at, para o JobManager calcular.
+        """
+        # O SQLite guarda datetimes sem timezone, em UTC
+        now_utc = now.astimezone(timezone.utc).replace(tzinfo=None)
+        rows = self._fetch(_SELECT_DUE_JOBS, {"now": now_utc})
+        return [self._job_from_model(row) for row in rows]
+    
+    def get_next_run_at(self) -> Optional[datetime]:
+        """Menor next_run_at entre os jobs ativos (UTC sem timezone), ou None."""
+        return self._fetch(_SELECT_NEXT_RUN_AT)[0][0]
     
     def delete_job(self, job_id: str) -> bool:
         """Remove um job."""
-        session = self.Session()
-        try:
-            result = session.query(JobModel).filter_by(job_id=job_id).delete()
-            session.commit()
-            return result > 0
-        finally:
-            session.close()
+        return self._execute(_DELETE_JOB, {"job_id": job_id}).rowcount > 0
     
     def update_job_status(self, job_id: str, status: JobStatus) -> None:
         """Atualiza o status de um job."""
-        session = self.Session()
-        try:
-            session.query(JobModel).filter_by(job_id=job_id).update({"status": status.value})
-            session.commit()
-        finally:
-            session.close()
+        self._execute(_UPDATE_JOB, {"b_job_id": job_id, "status": status.value})
     
     def update_job_last_run(self, job_id: str, last_run: datetime) -> None:
         """Atualiza a última execução de um job."""
-        session = self.Session()
-        try:
-            session.query(JobModel).filter_by(job_id=job_id).update({"last_run": last_run})
-            session.commit()
-        finally:
-            session.close()
+        self._execute(_UPDATE_JOB, {"b_job_id": job_id, "last_run": last_run})
     
-    def _job_from_model(self, model: JobModel) -> Job:
-        """Converte modelo SQLAlchemy para Pydantic."""
-        from core.models import CollectionParams, Schedule
-        
+    def update_job_next_run(self, job_id: str, next_run_at: Optional[datetime]) -> None:
+        """Atualiza a próxima execução de um job."""
+        self._execute(_UPDATE_JOB, {"b_job_id": job_id, "next_run_at": next_run_at})
+    
+    def _job_from_model(self, model) -> Job:
+        """Converte linha da tabela jobs para Pydantic."""
         return Job(
             job_id=model.job_id,
             name=model.name,
@@ -160,6 +251,7 @@ class DatabaseManager:
             status=JobStatus(model.status),
             created_at=model.created_at,
             last_run=model.last_run,
+            next_run_at=model.next_run_at,
             dry_run=model.dry_run,
         )
     
@@ -167,68 +259,43 @@ class DatabaseManager:
     
     def save_run(self, run: RunHistory) -> None:
         """Salva ou atualiza uma execução."""
-        session = self.Session()
-        try:
-            run_model = RunHistoryModel(
-                run_id=run.run_id,
-                job_id=run.job_id,
-                job_name=run.job_name,
-                started_at=run.started_at,
-                finished_at=run.finished_at,
-                status=run.status.value,
-                posts_collected=str(run.posts_collected),
-                export_files_json=json.dumps(run.export_files),
-                email_sent=run.email_sent,
-                error_message=run.error_message,
-                logs_json=json.dumps(run.logs),
-            )
-            session.merge(run_model)
-            session.commit()
-        finally:
-            session.close()
+        self._execute(_UPSERT_RUN, {
+            "run_id": run.run_id,
+            "job_id": run.job_id,
+            "job_name": run.job_name,
+            "started_at": run.started_at,
+            "finished_at": run.finished_at,
+            "status": run.status.value,
+            "posts_collected": run.posts_collected,
+            "export_files_json": json.dumps(run.export_files),
+            "email_sent": run.email_sent,
+            "error_message": run.error_message,
+            "logs_json": json.dumps(run.logs),
+        })
     
     def get_run(self, run_id: str) -> Optional[RunHistory]:
         """Busca uma execução por ID."""
-        session = self.Session()
-        try:
-            run_model = session.query(RunHistoryModel).filter_by(run_id=run_id).first()
-            if not run_model:
-                return None
-            return self._run_from_model(run_model)
-        finally:
-            session.close()
+        rows = self._fetch(_SELECT_RUN, {"run_id": run_id})
+        if not rows:
+            return None
+        return self._run_from_model(rows[0])
     
     def get_runs_by_job(self, job_id: str, limit: int = 10) -> list[RunHistory]:
         """Retorna últimas execuções de um job."""
-        session = self.Session()
-        try:
-            run_models = (
-                session.query(RunHistoryModel)
-                .filter_by(job_id=job_id)
-                .order_by(RunHistoryModel.started_at.desc())
-                .limit(limit)
-                .all()
-            )
-            return [self._run_from_model(rm) for rm in run_models]
-        finally:
-            session.close()
+        rows = self._fetch(_SELECT_RUNS_BY_JOB, {"job_id": job_id, "limit": limit})
+        return [self._run_from_model(row) for row in rows]
     
     def get_all_runs(self, limit: int = 50) -> list[RunHistory]:
         """Retorna últimas execuções de todos os jobs."""
-        session = self.Session()
-        try:
-            run_models = (
-                session.query(RunHistoryModel)
-                .order_by(RunHistoryModel.started_at.desc())
-                .limit(limit)
-                .all()
-            )
-            return [self._run_from_model(rm) for rm in run_models]
-        finally:
-            session.close()
+        rows = self._fetch(_SELECT_ALL_RUNS, {"limit": limit})
+        return [self._run_from_model(row) for row in rows]
+    
+    def count_runs(self) -> int:
+        """Total de execuções registradas (sem carregá-las)."""
+        return self._fetch(_COUNT_RUNS)[0][0]
     
-    def _run_from_model(self, model: RunHistoryModel) -> RunHistory:
-        """Converte modelo SQLAlchemy para Pydantic."""
+    def _run_from_model(self, model) -> RunHistory:
+        """Converte linha da tabela run_history para Pydantic."""
         return RunHistory(
             run_id=model.run_id,
             job_id=model.job_id,
@@ -236,7 +303,7 @@ class DatabaseManager:
             started_at=model.started_at,
             finished_at=model.finished_at,
             status=RunStatus(model.status),
-            posts_collected=int(model.posts_collected),
+            posts_collected=model.posts_collected,
             export_files=json.loads(model.export_files_json) if model.export_files_json else [],
             email_sent=model.email_sent,
             error_message=model.error_message,
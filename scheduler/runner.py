@@ -1,23 +1,46 @@
 """Executor de jobs agendados."""
 from __future__ import annotations
 import asyncio
+import os
 import threading
-from datetime import datetime, timezone
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Callable, Optional
 from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.date import DateTrigger
 import pytz
 
-from core.models import Job, RunHistory, RunStatus, ScheduleType
-from core.collector import XCollector
-from scheduler.job_manager import JobManager
+from core.models import CollectionResult, Job, RunHistory, RunStatus, ScheduleType, utc_now
+from core.collector import XCollector, get_browser_pool, close_browser_pool
+from scheduler.job_manager import JobManager, on_jobs_changed
 from scheduler.persistence import get_db
 from exporters import export_to_docx, export_to_json, export_to_csv
 
+# Fuso do BackgroundScheduler (resolvido uma vez, não a cada JobRunner)
+SCHEDULER_TIMEZONE = pytz.timezone("America/Sao_Paulo")
 
-def utc_now() -> datetime:
-    """Retorna datetime atual em UTC."""
-    return datetime.now(timezone.utc)
+# Verificação de jobs: dorme até o próximo next_run_at, com estes limites
+CHECK_MAX_INTERVAL = timedelta(hours=1)  # Rede de segurança (mudanças feitas fora do processo)
+CHECK_RETRY_INTERVAL = timedelta(minutes=1)  # Jobs ainda devidos (único que falhou ou em execução)
+
+# Threads do executor padrão do loop dos jobs (exportações, anexos, asyncio.to_thread)
+JOB_THREAD_POOL_SIZE = int(os.getenv("JOB_THREAD_POOL_SIZE", "4"))
+
+# (extensão, função, rótulo no log) dos formatos de exportação
+_EXPORTS = (
+    ("docx", export_to_docx, "📄 DOCX"),
+    ("json", export_to_json, "📋 JSON"),
+    ("csv", export_to_csv, "📊 CSV"),
+)
+
+
+@lru_cache(maxsize=1)
+def _clock(second: int) -> str:
+    """HH:MM:SS local do segundo; logs do mesmo segundo reusam a string."""
+    return time.strftime("%H:%M:%S", time.localtime(second))
 
 
 class JobRunner:
@@ -33,27 +56,33 @@ class JobRunner:
         self.on_job_complete = on_job_complete
         self.on_job_error = on_job_error
         
-        self.scheduler = BackgroundScheduler(
-            timezone=pytz.timezone("America/Sao_Paulo")
-        )
+        self.scheduler = BackgroundScheduler(timezone=SCHEDULER_TIMEZONE)
         self._running = False
         self._current_run: Optional[RunHistory] = None
+        
+        # Event loop dedicado aos jobs: mantém o browser aquecido entre execuções
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._batches: set[Future] = set()  # Lotes de jobs em execução (futures do scheduler)
+        self._batch_tasks: set[asyncio.Task] = set()  # As tasks desses lotes, no loop dos jobs
+        # job_ids despachados e ainda não terminados: um job único continua
+        # devido até concluir e não pode ser despachado de novo enquanto roda
+        self._in_flight: set[str] = set()
+        self._loop_lock = threading.Lock()
     
     def start(self):
         """Inicia o scheduler em background."""
         if self._running:
             return
         
-        # Verificar jobs a cada minuto
-        self.scheduler.add_job(
-            self._check_and_run_jobs,
-            trigger=IntervalTrigger(minutes=1),
-            id="job_checker",
-            replace_existing=True,
-        )
-        
         self.scheduler.start()
         self._running = True
+        
+        # Primeira verificação já (preenche next_run_at antigos); depois a
+        # próxima é reagendada a cada verificação e a cada mudança nos jobs
+        self._arm_checker(utc_now())
+        on_jobs_changed(self._arm_checker)
         print("🚀 Scheduler iniciado")
     
     def stop(self):
@@ -63,31 +92,169 @@ class JobRunner:
         
         self.scheduler.shutdown(wait=False)
         self._running = False
+        self._stop_loop()
         print("🛑 Scheduler parado")
     
+    def _arm_checker(self, run_date: datetime = None):
+        """
+        Agenda a próxima verificação de jobs (substituindo a anterior).
+        
+        Sem `run_date`, usa o menor next_run_at dos jobs ativos: não há
+        despertares enquanto nada está para vencer, e horários com segundos
+        disparam na hora certa.
+        """
+        if not self._running:
+            return
+        
+        if run_date is None:
+            now = utc_now()
+            try:
+                next_run = self.job_manager.get_next_run_at()
+            except Exception as e:
+                print(f"⚠️ Erro ao calcular próxima verificação: {e}")
+                next_run = now
+            if next_run is None:
+                run_date = now + CHECK_MAX_INTERVAL
+            elif next_run <= now:
+                # Ainda devido após a verificação: tentar de novo em breve
+                run_date = now + CHECK_RETRY_INTERVAL
+            else:
+                run_date = min(next_run, now + CHECK_MAX_INTERVAL)
+        
+        self.scheduler.add_job(
+            self._check_and_run_jobs,
+            trigger=DateTrigger(run_date=run_date),
+            id="job_checker",
+            replace_existing=True,
+            misfire_grace_time=None,
+        )
+    
     def _check_and_run_jobs(self):
         """Verifica e executa jobs devidos."""
-        due_jobs = self.job_manager.get_due_jobs()
-        
-        for job in due_jobs:
-            print(f"⏰ Job devido: {job.name} ({job.job_id})")
-            
-            # Executar em thread separada para não bloquear
-            thread = threading.Thread(
-                target=self._run_job_sync,
-                args=(job,),
-                daemon=True,
-            )
-            thread.start()
-    
-    def _run_job_sync(self, job: Job):
-        """Wrapper síncrono para executar job assíncrono."""
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(self.run_job(job))
+            due_jobs = [
+                job for job in self.job_manager.get_due_jobs()
+                if job.job_id not in self._in_flight
+            ]
+            
+            for job in due_jobs:
+                self._in_flight.add(job.job_id)
+                print(f"⏰ Job devido: {job.name} ({job.job_id})")
+                self.job_manager.schedule_next_run(job)
+            
+            # Executar no loop dos jobs para não bloquear o scheduler
+            if due_jobs:
+                # Um carimbo de data por lote: arquivos da mesma verificação se alinham
+                stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                future = asyncio.run_coroutine_threadsafe(
+                    self._run_due_jobs(self._group_jobs(due_jobs), stamp), self._get_loop()
+                )
+                self._batches.add(future)
+                future.add_done_callback(self._on_batch_done)
         finally:
+            self._arm_checker()
+    
+    def _on_batch_done(self, future: Future):
+        """Remove o lote dos pendentes e registra erros que escaparam dele."""
+        self._batches.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            print(f"❌ Erro no lote de jobs: {future.exception()!r}")
+    
+    @staticmethod
+    def _group_jobs(jobs: list[Job]) -> list[list[Job]]:
+        """Agrupa jobs que fazem exatamente a mesma coleta (query/URL e parâmetros)."""
+        groups: dict[tuple, list[Job]] = defaultdict(list)
+        for job in jobs:
+            groups[(job.query_or_url, job.is_url, job.params.model_dump_json())].append(job)
+        return list(groups.values())
+    
+    async def _run_due_jobs(self, groups: list[list[Job]], stamp: str):
+        """
+        Executa os grupos de jobs devidos concorrentemente, como um lote.
+        
+        _run_group não deixa erros escaparem: a falha de um grupo não cancela
+        os demais; o TaskGroup só propaga o cancelamento do stop().
+        """
+        task = asyncio.current_task()
+        self._batch_tasks.add(task)
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for jobs in groups:
+                    tg.create_task(self._run_group(jobs, stamp))
+        finally:
+            self._batch_tasks.discard(task)
+    
+    async def _cancel_batches(self):
+        """Cancela os lotes em andamento e espera a limpeza deles (browser, histórico)."""
+        tasks = list(self._batch_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def _run_group(self, jobs: list[Job], stamp: Optional[str] = None):
+        """
+        Executa um grupo de jobs com a mesma coleta.
+        
+        A coleta roda uma vez (no primeiro job que conseguir coletar) e o
+        resultado é reaproveitado pelos demais; exportação e e-mail continuam
+        individuais por job.
+        """
+        result = None
+        try:
+            for job in jobs:
+                try:
+                    _, collected = await self._execute(job, result, stamp)
+                except Exception as e:
+                    # Erro fora da execução (histórico, callbacks): isolar o job
+                    print(f"❌ Erro no job {job.name} ({job.job_id}): {e!r}")
+                    continue
+                finally:
+                    self._in_flight.discard(job.job_id)
+                result = result or collected
+        finally:
+            # Cancelado no meio: liberar também os jobs que nem começaram
+            self._in_flight.difference_update(job.job_id for job in jobs)
+            # Jobs únicos concluídos deixam de contar para a próxima verificação
+            self._arm_checker()
+    
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        """Retorna (iniciando se preciso) o event loop dos jobs, em thread própria."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=JOB_THREAD_POOL_SIZE, thread_name_prefix="job"
+                )
+                self._loop = asyncio.new_event_loop()
+                self._loop.set_default_executor(self._executor)
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+                self._loop_thread.start()
+            return self._loop
+    
+    def _stop_loop(self, timeout: float = 10):
+        """Fecha browser e SMTP no loop dos jobs e encerra a thread do loop."""
+        with self._loop_lock:
+            loop, thread, executor = self._loop, self._loop_thread, self._executor
+            self._loop = self._loop_thread = self._executor = None
+        if loop is None:
+            return
+        
+        from email_service.sender import close_email_sender
+        
+        # Cancelar lotes em andamento e esperar que terminem antes de fechar o
+        # browser que eles usam (lotes recém-submetidos já estão registrados:
+        # o loop executa os callbacks na ordem de submissão)
+        for coro in (self._cancel_batches(), close_browser_pool(), close_email_sender()):
+            try:
+                asyncio.run_coroutine_threadsafe(coro, loop).result(timeout)
+            except Exception as e:
+                print(f"⚠️ Erro ao encerrar recursos dos jobs: {e}")
+        
+        self._in_flight.clear()  # Lotes cancelados antes de começar não liberam os seus
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        if not thread.is_alive():
             loop.close()
+        executor.shutdown(wait=False)
     
     async def run_job(self, job: Job) -> RunHistory:
         """
@@ -99,6 +266,23 @@ class JobRunner:
         Returns:
             Histórico da execução
         """
+        run, _ = await self._execute(job)
+        return run
+    
+    async def _execute(
+        self,
+        job: Job,
+        result: Optional[CollectionResult] = None,
+        stamp: Optional[str] = None,
+    ) -> tuple[RunHistory, Optional[CollectionResult]]:
+        """
+        Executa um job, coletando apenas se `result` não for fornecido.
+        
+        `stamp` (YYYYmmdd_HHMMSS) entra no nome dos arquivos; padrão: agora.
+        
+        Returns:
+            (histórico da execução, resultado da coleta ou None se ela falhou)
+        """
         run = RunHistory(
             job_id=job.job_id,
             job_name=job.name,
@@ -107,8 +291,7 @@ class JobRunner:
         self._current_run = run
         
         def log(msg: str):
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            log_entry = f"[{timestamp}] {msg}"
+            log_entry = f"[{_clock(int(time.time()))}] {msg}"
             run.logs.append(log_entry)
             print(f"  {log_entry}")
         
@@ -116,22 +299,26 @@ class JobRunner:
             log(f"Iniciando job: {job.name}")
             log(f"Query/URL: {job.query_or_url}")
             
-            # Coletar posts (headless para jobs automáticos)
-            async with XCollector(headless=True) as collector:
-                # Verificar se está logado
-                is_logged = await collector.is_logged_in()
-                if not is_logged:
-                    raise Exception("Sessão expirada. Faça login novamente.")
-                
-                def progress_callback(count: int, msg: str):
-                    log(msg)
-                
-                result = await collector.collect(
-                    query_or_url=job.query_or_url,
-                    params=job.params,
-                    is_url=job.is_url,
-                    progress_callback=progress_callback,
-                )
+            if result is not None:
+                log("♻️ Reaproveitando coleta de job idêntico")
+            else:
+                # Coletar posts (headless para jobs automáticos, browser compartilhado)
+                pool = await get_browser_pool(headless=True)
+                async with XCollector(headless=True, pool=pool) as collector:
+                    # Verificar se está logado
+                    is_logged = await collector.is_logged_in()
+                    if not is_logged:
+                        raise Exception("Sessão expirada. Faça login novamente.")
+                    
+                    def progress_callback(count: int, msg: str):
+                        log(msg)
+                    
+                    result = await collector.collect(
+                        query_or_url=job.query_or_url,
+                        params=job.params,
+                        is_url=job.is_url,
+                        progress_callback=progress_callback,
+                    )
             
             run.posts_collected = result.total_collected
             log(f"Coletados: {run.posts_collected} posts")
@@ -140,25 +327,21 @@ class JobRunner:
                 for error in result.errors:
                     log(f"⚠️ {error}")
             
-            # Exportar arquivos
-            export_files = []
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            base_name = f"{job.name.replace(' ', '_')}_{timestamp}"
-            
-            if "docx" in job.export_formats:
-                filepath = export_to_docx(result, filename=f"{base_name}.docx")
-                export_files.append(filepath)
-                log(f"📄 DOCX: {filepath}")
-            
-            if "json" in job.export_formats:
-                filepath = export_to_json(result, filename=f"{base_name}.json")
-                export_files.append(filepath)
-                log(f"📋 JSON: {filepath}")
+            # Exportar arquivos em paralelo nas threads do loop (sem bloqueá-lo).
+            # Não usar processos: com spawn, cada worker reexecutaria o script
+            # do Streamlit (__main__) e subiria outro scheduler
+            stamp = stamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+            # job_id no nome: jobs homônimos (ou com o mesmo safe_name) no
+            # mesmo lote não gravam por cima dos arquivos um do outro
+            base_name = f"{job.safe_name}_{job.job_id[:8]}_{stamp}"
+            exports = [e for e in _EXPORTS if e[0] in job.export_formats]
             
-            if "csv" in job.export_formats:
-                filepath = export_to_csv(result, filename=f"{base_name}.csv")
-                export_files.append(filepath)
-                log(f"📊 CSV: {filepath}")
+            export_files = list(await asyncio.gather(*(
+                asyncio.to_thread(export, result, filename=f"{base_name}.{ext}")
+                for ext, export, _ in exports
+            )))
+            for (_, _, label), filepath in zip(exports, export_files):
+                log(f"{label}: {filepath}")
             
             run.export_files = export_files
             
@@ -200,6 +383,13 @@ class JobRunner:
             log(f"✅ Job concluído: {run.status.value}")
             
         except Exception as e:
+            task = asyncio.current_task()
+            if task is not None and task.cancelling():
+                # Erro na limpeza de uma coleta cancelada (ex.: Playwright ao
+                # fechar a página): registrar como cancelamento, não como falha
+                self._mark_cancelled(run, log)
+                raise asyncio.CancelledError() from e
+            
             run.status = RunStatus.FAILED
             run.error_message = str(e)
             run.finished_at = utc_now()
@@ -208,6 +398,10 @@ class JobRunner:
             if self.on_job_error:
                 self.on_job_error(job.job_id, str(e))
         
+        except asyncio.CancelledError:
+            self._mark_cancelled(run, log)
+            raise
+        
         finally:
             # Salvar histórico
             get_db().save_run(run)
@@ -216,7 +410,15 @@ class JobRunner:
             if self.on_job_complete:
                 self.on_job_complete(run)
         
-        return run
+        return run, result
+    
+    @staticmethod
+    def _mark_cancelled(run: RunHistory, log: Callable[[str], None]):
+        """Marca a execução como interrompida pelo stop() do scheduler."""
+        run.status = RunStatus.FAILED
+        run.error_message = "Cancelado: scheduler parado"
+        run.finished_at = utc_now()
+        log("❌ Cancelado: scheduler parado")
     
     async def run_job_now(self, job_id: str) -> Optional[RunHistory]:
         """Executa um job imediatamente."""
@@ -224,7 +426,10 @@ class JobRunner:
         if not job:
             return None
         
-        return await self.run_job(job)
+        # Roda no loop dos jobs (onde vive o browser compartilhado), mesmo
+        # quando chamado de outro loop, como o asyncio.run da interface
+        future = asyncio.run_coroutine_threadsafe(self.run_job(job), self._get_loop())
+        return await asyncio.wrap_future(future)
     
     def get_current_run(self) -> Optional[RunHistory]:
         """Retorna a execução atual (se houver)."""
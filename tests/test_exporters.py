@@ -5,6 +5,9 @@ import json
 import csv
 from pathlib import Path
 from datetime import datetime
+from pydantic_core import to_json
+from docx import Document
+from docx.oxml.ns import qn
 from core.models import Post, PostMetrics, CollectionResult, CollectionParams
 from exporters import DocxExporter, JsonExporter, CsvExporter
 
@@ -71,6 +74,49 @@ class TestDocxExporter:
             filepath = exporter.export(result)
             
             assert Path(filepath).exists()
+    
+    def test_export_posts_escapes_and_formats_text(self, sample_posts):
+        """Posts com &, <, quebra de linha, tab e caractere de controle reabrem íntegros."""
+        post = sample_posts[0].model_copy(update={
+            "author_name": "A & <B>\tC\x01",
+            "text": "linha 1 & <tag>\nlinha\t2\x01",
+        })
+        result = CollectionResult(
+            posts=[post, sample_posts[1]],
+            query_or_url="test",
+            total_collected=2,
+        )
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exporter = DocxExporter(tmpdir)
+            filepath = exporter.export(result, "test.docx")
+            doc = Document(filepath)
+        
+        paragraphs = doc.paragraphs
+        start = next(i for i, p in enumerate(paragraphs) if p.text == "📝 Posts Coletados") + 1
+        posts_paragraphs = paragraphs[start:]
+        texts = [p.text for p in posts_paragraphs]
+        
+        header = posts_paragraphs[0]
+        assert header.text == "#1 A & <B>\tC (@user1)"
+        assert [(run.text, bool(run.bold)) for run in header.runs] == [
+            ("#1 ", True),
+            ("A & <B>\tC ", True),
+            ("(@user1)", False),
+        ]
+        assert "linha 1 & <tag>\nlinha\t2" in texts
+        
+        engagement = next(p for p in posts_paragraphs if p.text.startswith("📊 Engajamento: "))
+        assert engagement.runs[0].bold
+        assert not engagement.runs[1].bold
+        
+        # Borda só no último parágrafo do primeiro post, antes do segundo
+        second = texts.index("#2 Outro Usuário (@user2)")
+        bordered = [
+            i for i, p in enumerate(posts_paragraphs)
+            if p._p.find(f"{qn('w:pPr')}/{qn('w:pBdr')}/{qn('w:bottom')}") is not None
+        ]
+        assert bordered == [second - 1]
 
 
 class TestJsonExporter:
@@ -100,6 +146,41 @@ class TestJsonExporter:
             
             assert isinstance(data, list)
             assert len(data) == 2
+    
+    @pytest.mark.parametrize("pretty", [True, False])
+    @pytest.mark.parametrize("empty", [True, False])
+    def test_export_matches_whole_document_to_json(self, sample_result, pretty, empty):
+        """A gravação post a post gera os mesmos bytes que to_json do documento inteiro."""
+        if empty:
+            sample_result = sample_result.model_copy(update={"posts": [], "total_collected": 0})
+        metadata = {
+            "query_or_url": sample_result.query_or_url,
+            "params": sample_result.params,
+            "started_at": sample_result.started_at,
+            "finished_at": sample_result.finished_at,
+            "total_collected": sample_result.total_collected,
+            "stop_reason": sample_result.stop_reason,
+            "errors": sample_result.errors,
+        }
+        document = {"metadata": metadata, "posts": sample_result.posts}
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exporter = JsonExporter(tmpdir)
+            filepath = exporter.export(sample_result, pretty=pretty)
+            
+            assert Path(filepath).read_bytes() == to_json(document, indent=2 if pretty else None)
+    
+    @pytest.mark.parametrize("pretty", [True, False])
+    @pytest.mark.parametrize("empty", [True, False])
+    def test_export_posts_only_matches_to_json(self, sample_posts, pretty, empty):
+        """Sem metadados, a saída é a mesma de to_json da lista de posts."""
+        posts = [] if empty else sample_posts
+        
+        with tempfile.TemporaryDirectory() as tmpdir:
+            exporter = JsonExporter(tmpdir)
+            filepath = exporter.export_posts_only(posts, pretty=pretty)
+            
+            assert Path(filepath).read_bytes() == to_json(posts, indent=2 if pretty else None)
 
 
 class TestCsvExporter:
@@ -47,3 +47,29 @@ class TestPostExtractor:
         
         url2 = "https://twitter.com/openai/status/456"
         assert PostExtractor.extract_handle_from_url(url2) == "openai"
+    
+    def test_post_from_raw(self):
+        """Testa montagem do post a partir dos campos lidos no browser."""
+        raw = {
+            "status_hrefs": ["/user/status/123"],
+            "author_name": "User",
+            "datetime": "2024-01-01T12:00:00.000Z",
+            "text": "Olá #python @fulano",
+            "likes": "12",
+            "reposts": "3",
+            "replies": "",
+            "views_aria": "3400 views",
+            "social_context": "User reposted",
+            "has_quote": False,
+        }
+        post = PostExtractor.post_from_raw(raw)
+        assert post.post_id == "123"
+        assert post.url == "https://x.com/user/status/123"
+        assert post.author_handle == "user"
+        assert post.metrics.likes == 12
+        assert post.metrics.replies is None
+        assert post.metrics.views == 3400
+        assert post.hashtags == ["#python"]
+        assert post.is_repost and not post.is_reply
+        
+        assert PostExtractor.post_from_raw({"status_hrefs": ["/home"]}) is None
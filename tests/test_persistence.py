@@ -0,0 +1,123 @@
+"""Testes para a persistência do scheduler."""
+import sqlite3
+import pytest
+from scheduler.persistence import DatabaseManager
+
+# Esquema original (antes de next_run_at e com posts_collected em texto)
+OLD_SCHEMA = """
+CREATE TABLE jobs (
+    job_id VARCHAR NOT NULL,
+    name VARCHAR NOT NULL,
+    query_or_url VARCHAR NOT NULL,
+    is_url BOOLEAN,
+    params_json TEXT,
+    schedule_json TEXT,
+    email_recipients_json TEXT,
+    export_formats_json TEXT,
+    status VARCHAR,
+    created_at DATETIME,
+    last_run DATETIME,
+    dry_run BOOLEAN,
+    PRIMARY KEY (job_id)
+);
+CREATE TABLE run_history (
+    run_id VARCHAR NOT NULL,
+    job_id VARCHAR NOT NULL,
+    job_name VARCHAR,
+    started_at DATETIME,
+    finished_at DATETIME,
+    status VARCHAR,
+    posts_collected VARCHAR,
+    export_files_json TEXT,
+    email_sent BOOLEAN,
+    error_message TEXT,
+    logs_json TEXT,
+    PRIMARY KEY (run_id)
+);
+INSERT INTO jobs VALUES (
+    'job-1', 'Diário', 'teste', 0, '{}',
+    '{"type": "recurring", "run_at": null, "cron": "0 7 * * *", "timezone": "America/Sao_Paulo"}',
+    '["a@b.com"]', '["docx"]', 'active', '2024-01-01 10:00:00.000000', NULL, 0
+);
+INSERT INTO run_history VALUES (
+    'run-1', 'job-1', 'Diário', '2024-01-02 10:00:00.000000', '2024-01-02 10:05:00.000000',
+    'success', '42', '["a.docx"]', 1, NULL, '["[10:00:00] ok"]'
+);
+INSERT INTO run_history VALUES (
+    'run-2', 'job-1', 'Diário', '2024-01-03 10:00:00.000000', NULL,
+    'failed', '0', '[]', 0, 'erro', '[]'
+);
+"""
+
+
+def column_types(conn: sqlite3.Connection, table: str) -> dict:
+    return {row[1]: row[2] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+@pytest.fixture
+def old_db(tmp_path):
+    """Banco SQLite com o esquema original e alguns dados."""
+    path = tmp_path / "scheduler.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(OLD_SCHEMA)
+    conn.close()
+    return path
+
+
+class TestMigration:
+    """Testes da migração de bancos antigos."""
+    
+    def test_migrates_old_schema(self, old_db):
+        """Abrir um banco antigo adiciona next_run_at/índice e converte posts_collected."""
+        db = DatabaseManager(str(old_db))
+        db.engine.dispose()
+        
+        conn = sqlite3.connect(old_db)
+        assert column_types(conn, "jobs")["next_run_at"] == "DATETIME"
+        assert column_types(conn, "run_history")["posts_collected"] == "INTEGER"
+        
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(jobs)")}
+        assert "ix_jobs_status_next" in indexes
+        
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+        assert tables == {"jobs", "run_history"}
+        
+        # Valores guardados como inteiro, não como texto
+        assert conn.execute(
+            "SELECT typeof(posts_collected) FROM run_history WHERE run_id='run-1'"
+        ).fetchone() == ("integer",)
+        conn.close()
+    
+    def test_preserves_rows(self, old_db):
+        """Jobs e execuções existentes continuam legíveis após a migração."""
+        db = DatabaseManager(str(old_db))
+        
+        job = db.get_job("job-1")
+        assert job.name == "Diário"
+        assert job.schedule.cron == "0 7 * * *"
+        assert job.email_recipients == ["a@b.com"]
+        assert job.next_run_at is None  # preenchido na primeira verificação
+        
+        runs = {run.run_id: run for run in db.get_runs_by_job("job-1")}
+        assert set(runs) == {"run-1", "run-2"}
+        assert runs["run-1"].posts_collected == 42
+        assert runs["run-1"].export_files == ["a.docx"]
+        assert runs["run-1"].logs == ["[10:00:00] ok"]
+        assert runs["run-2"].error_message == "erro"
+        assert db.count_runs() == 2
+    
+    def test_second_open_does_nothing(self, old_db):
+        """Um banco já migrado não é alterado ao abrir de novo."""
+        DatabaseManager(str(old_db)).engine.dispose()
+        
+        conn = sqlite3.connect(old_db)
+        schema_version = conn.execute("PRAGMA schema_version").fetchone()
+        rows = conn.execute("SELECT * FROM run_history ORDER BY run_id").fetchall()
+        conn.close()
+        
+        DatabaseManager(str(old_db)).engine.dispose()
+        
+        conn = sqlite3.connect(old_db)
+        assert conn.execute("PRAGMA schema_version").fetchone() == schema_version
+        assert conn.execute("SELECT * FROM run_history ORDER BY run_id").fetchall() == rows
+        conn.close()
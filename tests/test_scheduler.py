@@ -0,0 +1,361 @@
+"""Testes para o agendamento de jobs."""
+import asyncio
+import threading
+import time
+import pytest
+from datetime import datetime, timedelta, timezone
+import scheduler.job_manager as job_manager_module
+from core.models import CollectionResult, Job, Post, Schedule, ScheduleType
+from scheduler.job_manager import JobManager, cron_examples, validate_cron
+from scheduler.persistence import DatabaseManager
+import scheduler.runner as runner_module
+from scheduler.runner import JobRunner
+
+
+def utc(*args) -> datetime:
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def recurring(cron: str, tz: str = "UTC") -> Job:
+    return Job(
+        name="Teste",
+        query_or_url="teste",
+        schedule=Schedule(type=ScheduleType.RECURRING, cron=cron, timezone=tz),
+    )
+
+
+@pytest.fixture
+def manager(tmp_path):
+    """JobManager com banco SQLite temporário."""
+    return JobManager(DatabaseManager(str(tmp_path / "scheduler.db")))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Relógio do JobManager controlado pelo teste: clock.now = <datetime UTC>."""
+    class Clock:
+        now = utc(2024, 1, 15, 12, 0)
+    
+    monkeypatch.setattr(job_manager_module, "utc_now", lambda: Clock.now)
+    return Clock
+
+
+class TestNextRunAt:
+    """Testes do cálculo de next_run_at."""
+    
+    def test_weekday_zero_is_monday(self):
+        """Dia da semana 0 é segunda (como o antigo now.weekday())."""
+        after = utc(2024, 1, 17, 12, 0)  # quarta
+        
+        monday = JobManager._next_run_at(recurring("0 9 * * 0"), after)
+        assert monday == utc(2024, 1, 22, 9, 0)
+        assert monday.weekday() == 0
+        
+        sunday = JobManager._next_run_at(recurring("0 9 * * 6"), after)
+        assert sunday == utc(2024, 1, 21, 9, 0)
+    
+    def test_day_and_weekday_must_both_match(self):
+        """Dia do mês e dia da semana precisam casar juntos (não é OU)."""
+        # Primeira segunda do mês: 15/01 é segunda, mas não está em 1-7
+        job = recurring("0 9 1-7 * 0")
+        assert JobManager._next_run_at(job, utc(2024, 1, 10)) == utc(2024, 2, 5, 9, 0)
+    
+    def test_day_interval_counts_from_first_day(self):
+        """*/N no dia do mês segue o cron padrão: dias 1, 1+N, 1+2N..."""
+        job = recurring("0 0 */2 * *")
+        assert JobManager._next_run_at(job, utc(2024, 1, 1, 0, 0, 1)) == utc(2024, 1, 3)
+    
+    def test_cron_uses_job_timezone(self):
+        """O cron é avaliado no fuso do job e o resultado volta em UTC."""
+        job = recurring("0 7 * * *", tz="America/Sao_Paulo")
+        assert JobManager._next_run_at(job, utc(2024, 1, 15, 12, 0)) == utc(2024, 1, 16, 10, 0)
+
+
+class TestDueJobs:
+    """Testes de jobs devidos e reagendamento."""
+    
+    def test_next_run_after_fire_at_exact_second(self, manager, clock):
+        """Despachado exatamente no horário, o próximo disparo é o seguinte."""
+        job = recurring("0 7 * * *")
+        clock.now = utc(2024, 1, 15, 6, 0)
+        manager.db.save_job(job)
+        
+        clock.now = utc(2024, 1, 15, 7, 0)
+        job.next_run_at = clock.now
+        manager.db.save_job(job)
+        assert [j.job_id for j in manager.get_due_jobs()] == [job.job_id]
+        
+        manager.schedule_next_run(job)
+        assert manager.get_job(job.job_id).next_run_at == datetime(2024, 1, 16, 7, 0)
+        assert manager.get_due_jobs() == []
+    
+    def test_null_next_run_at_is_backfilled(self, manager, clock):
+        """Jobs salvos antes de existir next_run_at recebem o valor na verificação."""
+        job = recurring("0 7 * * *")
+        manager.db.save_job(job)  # next_run_at=None, como nos bancos antigos
+        assert manager.get_job(job.job_id).next_run_at is None
+        
+        assert manager.get_due_jobs() == []
+        assert manager.get_job(job.job_id).next_run_at == datetime(2024, 1, 16, 7, 0)
+        
+        clock.now = utc(2024, 1, 16, 7, 0)
+        assert [j.job_id for j in manager.get_due_jobs()] == [job.job_id]
+    
+    def test_once_job_due_until_last_run(self, manager, clock):
+        """Job único continua devido até ter last_run (ex.: falhou); o runner ignora os em execução."""
+        job = manager.create_job(
+            name="Único",
+            query_or_url="teste",
+            schedule=Schedule(
+                type=ScheduleType.ONCE,
+                run_at=datetime(2024, 1, 15, 11, 0),
+                timezone="UTC",
+            ),
+        )
+        assert [j.job_id for j in manager.get_due_jobs()] == [job.job_id]
+        
+        # Despachar não o tira da lista; só a execução concluída (last_run)
+        manager.schedule_next_run(job)
+        clock.now += timedelta(minutes=1)
+        assert [j.job_id for j in manager.get_due_jobs()] == [job.job_id]
+        
+        manager.update_last_run(job.job_id)
+        clock.now += timedelta(minutes=1)
+        assert manager.get_due_jobs() == []
+    
+    def test_once_job_not_due_before_run_at(self, manager, clock):
+        """Job único não fica devido antes do horário marcado."""
+        manager.create_job(
+            name="Único",
+            query_or_url="teste",
+            schedule=Schedule(
+                type=ScheduleType.ONCE,
+                run_at=datetime(2024, 1, 15, 13, 0),
+                timezone="UTC",
+            ),
+        )
+        assert manager.get_due_jobs() == []
+
+    
+    def test_changes_notify_listeners(self, manager, monkeypatch):
+        """Criar, alterar, pausar, retomar e remover avisam o runner (reagendar verificação)."""
+        monkeypatch.setattr(job_manager_module, "_change_listeners", [])
+        calls = []
+        job_manager_module.on_jobs_changed(lambda: calls.append(1))
+        
+        job = manager.create_job(name="Teste", query_or_url="teste")
+        manager.update_job(job)
+        manager.pause_job(job.job_id)
+        manager.resume_job(job.job_id)
+        manager.delete_job(job.job_id)
+        assert len(calls) == 5
+        
+        manager.delete_job(job.job_id)  # já removido: nada mudou
+        assert len(calls) == 5
+
+
+def wait_until(condition, timeout: float = 5):
+    """Espera (polling) uma condição satisfeita por outra thread."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "tempo esgotado"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def runner(manager):
+    """JobRunner sem o BackgroundScheduler (verificações chamadas pelo teste)."""
+    runner = JobRunner(job_manager=manager)
+    yield runner
+    runner._stop_loop()
+
+
+class TestJobRunner:
+    """Testes do despacho de jobs devidos."""
+    
+    def test_running_once_job_is_not_redispatched(self, manager, clock, runner, monkeypatch):
+        """Job único ainda em execução não é despachado de novo nas verificações seguintes."""
+        job = manager.create_job(
+            name="Único",
+            query_or_url="teste",
+            schedule=Schedule(
+                type=ScheduleType.ONCE,
+                run_at=datetime(2024, 1, 15, 11, 0),
+                timezone="UTC",
+            ),
+        )
+        started = []
+        release = threading.Event()
+        
+        async def fake_execute(job, result=None, stamp=None):
+            started.append(job.job_id)
+            while not release.is_set():
+                await asyncio.sleep(0.01)
+            manager.update_last_run(job.job_id)
+            return None, None
+        
+        monkeypatch.setattr(runner, "_execute", fake_execute)
+        
+        runner._check_and_run_jobs()
+        wait_until(lambda: started)
+        
+        # Coleta longa: as verificações seguintes não o disparam outra vez
+        for _ in range(3):
+            clock.now += timedelta(minutes=1)
+            runner._check_and_run_jobs()
+        time.sleep(0.1)
+        assert started == [job.job_id]
+        
+        release.set()
+        wait_until(lambda: not runner._batches)
+        assert runner._in_flight == set()
+        
+        clock.now += timedelta(minutes=1)
+        runner._check_and_run_jobs()
+        time.sleep(0.1)
+        assert started == [job.job_id]
+
+    
+    def test_same_safe_name_in_batch_exports_distinct_files(self, manager, runner, monkeypatch, tmp_path):
+        """Jobs cujo nome vira o mesmo safe_name, no mesmo lote, não sobrescrevem arquivos."""
+        class FakeCollector:
+            def __init__(self, **kwargs):
+                pass
+            
+            async def __aenter__(self):
+                return self
+            
+            async def __aexit__(self, *exc):
+                pass
+            
+            async def is_logged_in(self):
+                return True
+            
+            async def collect(self, query_or_url, **kwargs):
+                return CollectionResult(
+                    posts=[Post(post_id="1", url="https://x.com/a/status/1")],
+                    query_or_url=query_or_url,
+                    total_collected=1,
+                )
+        
+        async def fake_pool(**kwargs):
+            return None
+        
+        monkeypatch.setenv("EXPORTS_DIR", str(tmp_path / "exports"))
+        monkeypatch.setattr(runner_module, "XCollector", FakeCollector)
+        monkeypatch.setattr(runner_module, "get_browser_pool", fake_pool)
+        monkeypatch.setattr(runner_module, "get_db", lambda: manager.db)
+        
+        formats = ["docx", "json", "csv"]
+        jobs = [
+            manager.create_job(name="Coleta: A", query_or_url="a", export_formats=formats),
+            manager.create_job(name="Coleta/ A", query_or_url="b", export_formats=formats),
+        ]
+        assert jobs[0].safe_name == jobs[1].safe_name
+        
+        async def run_batch():
+            await runner._run_due_jobs(runner._group_jobs(jobs), "20240115_120000")
+        
+        asyncio.run(run_batch())
+        
+        runs = manager.db.get_all_runs()
+        files = [path for run in runs for path in run.export_files]
+        assert len(runs) == 2
+        assert len(files) == 6
+        assert len(set(files)) == 6
+        for run in runs:
+            assert all(run.job_id[:8] in path for path in run.export_files)
+
+    
+    def test_stop_waits_for_cancelled_batches(self, manager, clock, runner, monkeypatch):
+        """stop() espera a limpeza das coletas canceladas antes de fechar o browser."""
+        events = []
+        
+        class SlowCollector:
+            def __init__(self, **kwargs):
+                pass
+            
+            async def __aenter__(self):
+                return self
+            
+            async def __aexit__(self, *exc):
+                # Limpeza demorada que falha, como o Playwright ao fechar a página
+                await asyncio.sleep(0.1)
+                events.append("cleanup")
+                raise RuntimeError("Target closed")
+            
+            async def is_logged_in(self):
+                return True
+            
+            async def collect(self, **kwargs):
+                events.append("collect")
+                await asyncio.sleep(60)
+        
+        async def fake_pool(**kwargs):
+            return None
+        
+        async def fake_close_pool():
+            events.append("close_pool")
+        
+        monkeypatch.setattr(runner_module, "XCollector", SlowCollector)
+        monkeypatch.setattr(runner_module, "get_browser_pool", fake_pool)
+        monkeypatch.setattr(runner_module, "close_browser_pool", fake_close_pool)
+        monkeypatch.setattr(runner_module, "get_db", lambda: manager.db)
+        
+        job = manager.create_job(
+            name="Único",
+            query_or_url="teste",
+            schedule=Schedule(
+                type=ScheduleType.ONCE,
+                run_at=datetime(2024, 1, 15, 11, 0),
+                timezone="UTC",
+            ),
+        )
+        runner._check_and_run_jobs()
+        wait_until(lambda: "collect" in events)
+        
+        runner._stop_loop()
+        assert events == ["collect", "cleanup", "close_pool"]
+        
+        [run] = manager.db.get_runs_by_job(job.job_id)
+        assert run.status.value == "failed"
+        assert run.error_message == "Cancelado: scheduler parado"
+
+
+class TestValidateCron:
+    """Testes da validação de expressões cron."""
+    
+    @pytest.mark.parametrize("expr", [
+        "0 7 * * *",
+        "*/30 * * * *",
+        "0 8 * * 1,3,5",
+        "0 9 1-7 * 0",
+        "1-3,5 * * * *",  # lista com range (antes rejeitada)
+        "59 23 31 12 6",
+    ])
+    def test_accepts(self, expr):
+        """Aceita a sintaxe suportada dentro dos limites de cada campo."""
+        assert validate_cron(expr) == (True, "Válido")
+    
+    @pytest.mark.parametrize("expr, message", [
+        ("0 7 * *", "5 campos"),
+        ("60 * * * *", "fora do intervalo"),
+        ("0 24 * * *", "fora do intervalo"),
+        ("0 0 0 * *", "fora do intervalo"),
+        ("0 0 * 13 *", "fora do intervalo"),
+        ("0 0 * * 7", "fora do intervalo"),
+        ("*/0 * * * *", "intervalo inválido"),
+        ("5-1 * * * *", "range inválido"),
+        ("1-2-3 * * * *", "valor inválido"),
+        ("a * * * *", "valor inválido"),
+        ("-1 * * * *", "valor inválido"),
+    ])
+    def test_rejects(self, expr, message):
+        """Rejeita sintaxe inválida e valores fora dos limites, indicando o motivo."""
+        valid, msg = validate_cron(expr)
+        assert not valid
+        assert message in msg
+    
+    def test_examples_are_valid(self):
+        """Todos os exemplos mostrados na interface são válidos."""
+        assert all(validate_cron(expr)[0] for expr in cron_examples().values())